@@ -0,0 +1,104 @@
+"""Compare committing N file edits file by file against ``git_bulk_commit``.
+
+The per-file path is what ``apply_git_changes`` used to do: write every edit into a checkout,
+``index.add`` the paths and ``index.commit``. The bulk path streams the same edits through
+``git fast-import``, with and without updating a checkout. Each sample uses a fresh
+repository. Run from ``devops-agent/agent``:
+
+    python benchmarks/git_commit.py --files 10 100 1000 --runs 3
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from git import Repo  # noqa: E402
+
+from app.models import FileEdit  # noqa: E402
+from app.services.git_bulk_commit import bulk_commit  # noqa: E402
+
+
+def _repo(root: Path, files: int) -> Repo:
+    repo = Repo.init(root, initial_branch="main")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Bench")
+        writer.set_value("user", "email", "bench@example.com")
+    paths = [f"modules/m{index % 20}/f{index}.tf" for index in range(files)]
+    for path in paths:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(f'# base {path}\nresource "null_resource" "r" {{}}\n')
+    repo.index.add(paths)
+    repo.index.commit("base")
+    repo.git.checkout("-b", "ticket")
+    return repo
+
+
+def _edits(files: int) -> list[FileEdit]:
+    # Half the edits rewrite existing files, half add new ones.
+    return [
+        FileEdit(path=f"modules/m{index % 20}/f{index}.tf", content=f"# edited {index}\n")
+        if index % 2
+        else FileEdit(path=f"modules/m{index % 20}/new{index}.tf", content=f"# new {index}\n")
+        for index in range(files)
+    ]
+
+
+def per_file(repo: Repo, edits: list[FileEdit]) -> None:
+    root = Path(repo.working_tree_dir)
+    for edit in edits:
+        (root / edit.path).parent.mkdir(parents=True, exist_ok=True)
+        (root / edit.path).write_text(edit.content, encoding="utf-8")
+    repo.index.add([edit.path for edit in edits])
+    repo.index.commit("bench")
+
+
+def bulk_checkout(repo: Repo, edits: list[FileEdit]) -> None:
+    bulk_commit(repo.working_tree_dir, "ticket", "HEAD", edits, "bench", update_working_tree=True)
+
+
+def bulk_objects_only(repo: Repo, edits: list[FileEdit]) -> None:
+    bulk_commit(repo.working_tree_dir, "objects-only", "main", edits, "bench")
+
+
+STRATEGIES: dict[str, Callable[[Repo, list[FileEdit]], None]] = {
+    "per-file (index.add)": per_file,
+    "bulk, update checkout": bulk_checkout,
+    "bulk, objects only": bulk_objects_only,
+}
+
+
+def measure(files: int, runs: int) -> dict[str, list[float]]:
+    edits = _edits(files)
+    samples: dict[str, list[float]] = {name: [] for name in STRATEGIES}
+    for _ in range(runs):
+        for name, strategy in STRATEGIES.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                repo = _repo(Path(tmp), files)
+                start = time.perf_counter()
+                strategy(repo, edits)
+                samples[name].append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'edits':>6}  {'strategy':<24}{'median':>10}{'min':>10}")
+    for files in args.files:
+        for name, seconds in measure(files, args.runs).items():
+            print(f"{files:>6}  {name:<24}{statistics.median(seconds):>9.3f}s{min(seconds):>9.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Measure how long a fresh interpreter takes to import ``app.main``.
+
+Each run starts a new Python process so module caches do not leak between samples, and
+reports how many agents were constructed during the import (the lazy registry keeps this
+at zero). Run from ``devops-agent/agent``:
+
+    python benchmarks/import_time.py --runs 5 [--max-seconds 2.0]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+from app.agents import agent_registry
+print(json.dumps({"seconds": elapsed, "agents_built": len(agent_registry.built())}))
+"""
+
+
+def measure(runs: int) -> list[dict]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC), os.environ.get("PYTHONPATH")]))}
+    env.setdefault("TOOLS_AUTO_INSTALL", "false")
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True, env=env
+        )
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, help="Fail when the median import time exceeds this")
+    args = parser.parse_args(argv)
+
+    samples = measure(args.runs)
+    seconds = [sample["seconds"] for sample in samples]
+    median = statistics.median(seconds)
+    print(
+        f"import app.main: median {median:.3f}s, min {min(seconds):.3f}s, max {max(seconds):.3f}s "
+        f"over {args.runs} runs; agents built at import: {samples[-1]['agents_built']}"
+    )
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"FAIL: median import time exceeds {args.max_seconds:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,10 @@
-"""Aggregate exports for all agents."""
+"""Aggregate exports for all agents.
 
-from .apply_agent import agent as apply_agent
-from .architect_agent import agent as architect_agent
-from .coding_agent import agent as coding_agent
-from .cost_agent import agent as cost_agent
-from .documentation_agent import agent as documentation_agent
-from .drift_agent import agent as drift_agent
-from .gitops_agent import agent as gitops_agent
-from .naming_agent import agent as naming_agent
-from .orchestrator_agent import agent as orchestrator_agent
-from .plan_agent import agent as plan_agent
-from .plan_reviewer_agent import agent as plan_reviewer_agent
-from .qa_agent import agent as qa_agent
-from .security_agent import agent as security_agent
-from .supervisor_agent import agent as supervisor_agent
+Agents are built lazily: ``from app.agents import cost_agent`` constructs the cost agent on
+first access, and ``agent_registry`` enumerates every agent without building any of them.
+"""
+
+from .registry import AGENT_MODULES, AgentRegistry, agent_registry
 
 __all__ = [
     "apply_agent",
@@ -31,3 +22,9 @@ __all__ = [
     "security_agent",
     "supervisor_agent",
 ]
+
+
+def __getattr__(name: str):
+    if name in AGENT_MODULES:
+        return agent_registry.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
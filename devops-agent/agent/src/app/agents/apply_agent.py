@@ -22,6 +22,3 @@ def create_agent():
         tools=_TOOLS,
         response_format=ApplyResponse,
     )
-
-
-agent = create_agent()
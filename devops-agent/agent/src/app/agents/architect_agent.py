@@ -12,16 +12,11 @@ to ensure modules comply with docs/terraform-standards.md. Produce a concise arc
 required Terraform modules, and highlight risks or unknowns. Return JSON matching DesignResponse.
 """
 
-_ARCHITECT_TOOLS = [get_terraform_standards, *get_terraform_mcp_tools(), *get_ms_learn_mcp_tools()]
-
 
 def create_agent():
     return build_logic_agent(
         name="ArchitectAgent",
         instructions=INSTRUCTIONS,
-        tools=_ARCHITECT_TOOLS,
+        tools=[get_terraform_standards, *get_terraform_mcp_tools(), *get_ms_learn_mcp_tools()],
         response_format=DesignResponse,
     )
-
-
-agent = create_agent()
@@ -3,12 +3,14 @@ from __future__ import annotations
 
 from app.agents.base import build_coding_agent
 from app.agents.schemas import CodingResponse
-from app.tools import get_gitops_repo_path, get_terraform_standards
+from app.tools import get_gitops_repo_path, get_terraform_standards, validate_terraform_changes
 
 INSTRUCTIONS = """
 You are the implementation engineer. Translate design decisions into Terraform and documentation
 changes. Call the Terraform standards tool before authoring code and enforce module reuse per docs/terraform-standards.md.
 Only describe intended edits and produce a GitOpsChangeRequest payload referencing specific files.
+Before answering, call validate_terraform_changes with that payload; it runs terraform fmt -check and validate
+on every module in seconds. Fix every error diagnostic (file contents must already be fmt-formatted) and validate again.
 Never run terraform or git directly; the GitOps agent handles file mutations.
 """
 
@@ -17,9 +19,6 @@ def create_agent():
     return build_coding_agent(
         name="CodingAgent",
         instructions=INSTRUCTIONS,
-        tools=[get_terraform_standards, get_gitops_repo_path],
+        tools=[get_terraform_standards, get_gitops_repo_path, validate_terraform_changes],
         response_format=CodingResponse,
     )
-
-
-agent = create_agent()
@@ -6,7 +6,8 @@ from app.agents.schemas import CostResponse
 from app.tools import estimate_cost
 
 INSTRUCTIONS = """
-Estimate the monthly cost impact of the proposed Terraform plan using the estimate_cost tool.
+Estimate the monthly cost impact of the proposed Terraform plan using the estimate_cost tool, passing the
+PlanArtifact's plan_json_path whenever a plan exists so the plan is priced directly.
 Highlight delta values and confidence along with any assumptions and include the resulting CostReport
 in your response under 'report'.
 """
@@ -21,6 +22,3 @@ def create_agent():
         tools=_TOOLS,
         response_format=CostResponse,
     )
-
-
-agent = create_agent()
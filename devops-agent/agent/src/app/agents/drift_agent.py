@@ -21,6 +21,3 @@ def create_agent():
         tools=_TOOLS,
         response_format=DriftResponse,
     )
-
-
-agent = create_agent()
@@ -21,6 +21,3 @@ def create_agent():
         tools=_TOOLS,
         response_format=GitOpsResponse,
     )
-
-
-agent = create_agent()
@@ -11,16 +11,11 @@ produce deterministic names and cross-check Microsoft Learn governance guidance.
 resources list entries shaped as {"resource_type": str, "proposed_name": str} and governance_notes.
 """
 
-_TOOLS = [generate_resource_name, *get_ms_learn_mcp_tools()]
-
 
 def create_agent():
     return build_logic_agent(
         name="NamingAgent",
         instructions=INSTRUCTIONS,
-        tools=_TOOLS,
+        tools=[generate_resource_name, *get_ms_learn_mcp_tools()],
         response_format=NamingResponse,
     )
-
-
-agent = create_agent()
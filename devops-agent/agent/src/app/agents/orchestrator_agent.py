@@ -29,6 +29,3 @@ def create_agent():
 
 def get_agent():
     return create_agent()
-
-
-agent = create_agent()
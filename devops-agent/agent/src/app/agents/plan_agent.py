@@ -6,8 +6,9 @@ from app.agents.schemas import PlanResponse
 from app.tools import run_terraform_plan
 
 INSTRUCTIONS = """
-You handle terraform init/plan flows. Acquire workspace locks via the lock service
-before running the plan tool. Summarize the resulting plan and provide the lock ID.
+You handle terraform init/plan flows. The plan tool acquires and releases the workspace lock
+itself and fails if another ticket holds it too long; report that blocker instead of retrying.
+Summarize the resulting plan.
 Always call the run_terraform_plan tool with accurate parameters and include the returned
 PlanArtifact in the PlanResponse under plan_artifact.
 """
@@ -22,6 +23,3 @@ def create_agent():
         tools=_TOOLS,
         response_format=PlanResponse,
     )
-
-
-agent = create_agent()
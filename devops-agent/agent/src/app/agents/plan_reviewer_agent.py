@@ -16,6 +16,3 @@ def create_agent():
         instructions=INSTRUCTIONS,
         response_format=PlanReviewResponse,
     )
-
-
-agent = create_agent()
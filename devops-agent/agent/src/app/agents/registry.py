@@ -0,0 +1,63 @@
+"""Registry that builds each agent (and its chat client and tools) on first use."""
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+
+from agent_framework import ChatAgent
+
+AGENT_MODULES: dict[str, str] = {
+    name: f"app.agents.{name}"
+    for name in (
+        "apply_agent",
+        "architect_agent",
+        "coding_agent",
+        "cost_agent",
+        "documentation_agent",
+        "drift_agent",
+        "gitops_agent",
+        "naming_agent",
+        "orchestrator_agent",
+        "plan_agent",
+        "plan_reviewer_agent",
+        "qa_agent",
+        "security_agent",
+        "supervisor_agent",
+    )
+}
+
+
+class AgentRegistry:
+    """Maps agent names to their modules' ``create_agent`` and caches one instance per name."""
+
+    def __init__(self, modules: dict[str, str]) -> None:
+        self._modules = dict(modules)
+        self._agents: dict[str, ChatAgent] = {}
+        self._lock = threading.RLock()
+
+    def names(self) -> list[str]:
+        return list(self._modules)
+
+    def built(self) -> list[str]:
+        return [name for name in self._modules if name in self._agents]
+
+    def get(self, name: str) -> ChatAgent:
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        if name not in self._modules:
+            raise KeyError(f"Unknown agent '{name}'")
+        with self._lock:
+            if name not in self._agents:
+                module = importlib.import_module(self._modules[name])
+                self._agents[name] = module.create_agent()
+                # Importing binds the submodule on its package, where it would shadow the package's
+                # lazy ``__getattr__`` for the agent of the same name.
+                package, _, attribute = self._modules[name].rpartition(".")
+                if vars(sys.modules[package]).get(attribute) is module:
+                    delattr(sys.modules[package], attribute)
+            return self._agents[name]
+
+
+agent_registry = AgentRegistry(AGENT_MODULES)
@@ -7,7 +7,9 @@ from app.tools import run_security_scan
 
 INSTRUCTIONS = """
 You coordinate IaC security scans via Checkov/tfsec. Always call run_security_scan with
-accurate directory metadata, summarize blocking findings, and map them back to Terraform resources.
+accurate directory metadata (tool="all" runs both scanners concurrently and merges duplicate findings),
+pass the plan's plan_json_path when a PlanArtifact is available so only changed resources are scanned,
+summarize blocking findings, and map them back to Terraform resources.
 Include the returned SecurityReport object in your response under 'report'.
 """
 
@@ -21,6 +23,3 @@ def create_agent():
         tools=_TOOLS,
         response_format=SecurityResponse,
     )
-
-
-agent = create_agent()
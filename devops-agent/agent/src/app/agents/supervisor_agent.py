@@ -47,23 +47,17 @@ INSTRUCTIONS = dedent(
 ).strip()
 
 
-_GITHUB_TOOLS = get_github_mcp_tools()
-_TOOLS = [
-    devops_capability_tool,
-    drift_monitor_tool,
-    project_onboarding_tool,
-    *(_GITHUB_TOOLS or []),
-    repo_discovery_tool,
-]
-
-
 def create_agent():
+    tools = [
+        devops_capability_tool,
+        drift_monitor_tool,
+        project_onboarding_tool,
+        *(get_github_mcp_tools() or []),
+        repo_discovery_tool,
+    ]
     return build_logic_agent(
         name="SupervisorAgent",
         instructions=INSTRUCTIONS,
-        tools=_TOOLS,
+        tools=tools,
         response_format=SupervisorResponse,
     )
-
-
-agent = create_agent()
@@ -178,8 +178,9 @@ class WorkflowChatAgent(BaseAgent):
         error_message: str,
     ) -> tuple[ChatMessage, ChatResponse]:
         """If workflow context is missing, fall back to the supervisor agent so users can still interact."""
-        from app.agents.supervisor_agent import agent as supervisor_agent
+        from app.agents import agent_registry
 
+        supervisor_agent = agent_registry.get("supervisor_agent")
         supervisor_response = await supervisor_agent.run(messages=list(messages), thread=thread)
         if supervisor_response.messages:
             supervisor_message = supervisor_response.messages[-1]
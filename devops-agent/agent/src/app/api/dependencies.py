@@ -0,0 +1,28 @@
+"""Shared FastAPI dependencies."""
+from __future__ import annotations
+
+from typing import Callable
+
+from fastapi import HTTPException, status
+
+from app.services.startup import startup
+
+STARTUP_RETRY_AFTER_SECONDS = 5
+
+
+def require_ready(*components: str) -> Callable[[], None]:
+    """Reject requests with 503 until the named startup components are ready."""
+
+    def _dependency() -> None:
+        for name in components:
+            component = startup.status(name)
+            if component is None or component.ready:
+                continue
+            headers = {"Retry-After": str(STARTUP_RETRY_AFTER_SECONDS)} if component.state == "running" else None
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"component": name, "state": component.state, "detail": component.detail},
+                headers=headers,
+            )
+
+    return _dependency
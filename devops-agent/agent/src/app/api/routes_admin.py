@@ -1,13 +1,14 @@
 """Admin endpoints for inspecting tickets and artifacts."""
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
 from app.models import DeploymentTicket
 from app.services.artifact_store import artifact_store
+from app.services.audit_log import AuditEventPage, audit_log
 from app.services.ticket_store import ticket_store
 
 router = APIRouter(prefix="/tickets", tags=["tickets"])
@@ -35,3 +36,15 @@ async def get_ticket(ticket_id: str) -> TicketDetail:
 @router.get("/", response_model=list[DeploymentTicket])
 async def list_tickets() -> list[DeploymentTicket]:
     return await ticket_store.list_tickets()
+
+
+@router.get("/{ticket_id}/audit", response_model=AuditEventPage)
+async def list_ticket_audit_events(
+    ticket_id: str,
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+) -> AuditEventPage:
+    try:
+        return await audit_log.list_events(ticket_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
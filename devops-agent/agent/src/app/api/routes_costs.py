@@ -0,0 +1,33 @@
+"""Cost rollup time series API."""
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter
+
+from app.models import CostRollupPoint, RollupGranularity
+from app.services.cost_rollup import cost_rollup
+
+router = APIRouter(prefix="/costs", tags=["costs"])
+
+
+@router.get("/rollup", response_model=list[CostRollupPoint])
+async def get_cost_rollup(
+    project_id: Optional[str] = None,
+    environment: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    granularity: RollupGranularity = "day",
+) -> list[CostRollupPoint]:
+    """Monthly cost time series per project, environment and resource type."""
+
+    return await cost_rollup.query(
+        project_id=project_id,
+        environment=environment,
+        resource_type=resource_type,
+        since=since,
+        until=until,
+        granularity=granularity,
+    )
@@ -0,0 +1,16 @@
+"""Workspace lock inspection API."""
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.models import WorkspaceLockView
+from app.services.lock_manager import lock_manager
+
+router = APIRouter(prefix="/locks", tags=["locks"])
+
+
+@router.get("/", response_model=list[WorkspaceLockView])
+async def list_locks() -> list[WorkspaceLockView]:
+    """Return current holders and queued waiters for every locked workspace."""
+
+    return await lock_manager.list_workspace_locks()
@@ -17,7 +17,10 @@ async def list_projects() -> ProjectList:
 
 @router.post("/", response_model=Project, status_code=status.HTTP_201_CREATED)
 async def create_project(payload: ProjectCreate) -> Project:
-    return await project_store.create_project(payload)
+    try:
+        return await project_store.create_project(payload)
+    except project_store.ProjectConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
 
 
 @router.get("/{project_id}", response_model=Project)
@@ -30,7 +33,10 @@ async def get_project(project_id: str) -> Project:
 
 @router.put("/{project_id}", response_model=Project)
 async def update_project(project_id: str, payload: ProjectUpdate) -> Project:
-    project = await project_store.update_project(project_id, payload)
+    try:
+        project = await project_store.update_project(project_id, payload)
+    except project_store.ProjectConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     if project is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     return project
@@ -2,6 +2,7 @@
 from fastapi import APIRouter
 
 from app.models.tooling import ToolsHealthResponse
+from app.services.startup import startup
 from app.services.tool_health import list_tool_statuses
 
 
@@ -10,4 +11,4 @@ router = APIRouter(prefix="/tools", tags=["tools"])
 
 @router.get("/health", response_model=ToolsHealthResponse)
 async def get_tools_health() -> ToolsHealthResponse:
-    return ToolsHealthResponse(items=list_tool_statuses())
+    return ToolsHealthResponse(items=list_tool_statuses(), components=startup.statuses())
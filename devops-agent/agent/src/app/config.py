@@ -1,10 +1,37 @@
 """Application configuration and runtime settings."""
 from functools import lru_cache
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import AliasChoices, AnyHttpUrl, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Registry lookups the Terraform MCP servers expose (HashiCorp's and the npm terraform-mcp-server),
+# which are safe to cache; anything else, such as workspace or run tools, always goes to the server.
+_TERRAFORM_MCP_READ_ONLY_TOOLS = (
+    "search_providers",
+    "get_provider_details",
+    "get_latest_provider_version",
+    "search_modules",
+    "get_module_details",
+    "get_latest_module_version",
+    "search_policies",
+    "get_policy_details",
+    "providerDetails",
+    "providerGuides",
+    "resourceUsage",
+    "resourceArgumentDetails",
+    "dataSourceLookup",
+    "functionDetails",
+    "moduleSearch",
+    "moduleRecommendations",
+    "moduleDetails",
+    "policySearch",
+    "policyDetails",
+)
+_DEFAULT_MCP_CACHE_TTLS = ",".join(
+    [*(f"terraform-mcp:{tool}=86400" for tool in _TERRAFORM_MCP_READ_ONLY_TOOLS), "ms-learn:*=21600"]
+)
+
 
 class Settings(BaseSettings):
     """Central application settings loaded from environment."""
@@ -30,8 +57,20 @@ class Settings(BaseSettings):
     tf_backend_account: Optional[str] = Field(default=None, alias="TF_BACKEND_ACCOUNT")
     tf_backend_container: Optional[str] = Field(default=None, alias="TF_BACKEND_CONTAINER")
 
+    tf_lock_ttl_seconds: int = Field(default=120, alias="TF_LOCK_TTL_SECONDS")
+    tf_lock_wait_seconds: float = Field(default=300.0, alias="TF_LOCK_WAIT_SECONDS")
+    tf_workspace_cache_dir: Optional[str] = Field(default=".cache/workspaces", alias="TF_WORKSPACE_CACHE_DIR")
+    tf_workspace_cache_max_gb: float = Field(default=20.0, alias="TF_WORKSPACE_CACHE_MAX_GB")
+    tf_validate_concurrency: int = Field(default=4, alias="TF_VALIDATE_CONCURRENCY")
+    tf_validate_max_fix_rounds: int = Field(default=2, alias="TF_VALIDATE_MAX_FIX_ROUNDS")
+    plan_store_dir: str = Field(default="./plan-store", alias="PLAN_STORE_DIR")
+    plan_store_keep_per_ticket: int = Field(default=5, alias="PLAN_STORE_KEEP_PER_TICKET")
+    plan_store_retention_days: float = Field(default=30.0, alias="PLAN_STORE_RETENTION_DAYS")
+
     # Git
     gitops_repo_path: str = Field(default="./gitops", alias="GITOPS_REPO_PATH")
+    gitops_worktree_dir: str = Field(default="./.worktrees", alias="GITOPS_WORKTREE_DIR")
+    gitops_worktree_ttl_hours: float = Field(default=72.0, alias="GITOPS_WORKTREE_TTL_HOURS")
     default_project_id: Optional[str] = Field(default=None, alias="DEFAULT_PROJECT_ID")
     default_repo_url: Optional[AnyHttpUrl] = Field(default=None, alias="DEFAULT_REPO_URL")
     default_workspace_dir: Optional[str] = Field(default=None, alias="DEFAULT_WORKSPACE_DIR")
@@ -41,12 +80,72 @@ class Settings(BaseSettings):
 
     # Projects / onboarding
     projects_root: str = Field(default="./projects", alias="PROJECTS_ROOT")
+    project_clone_depth: int = Field(default=1, alias="PROJECT_CLONE_DEPTH")
+    project_clone_filter: Optional[str] = Field(default="blob:none", alias="PROJECT_CLONE_FILTER")
+    project_clone_cache_dir: Optional[str] = Field(default="~/.cache/devops-agent/git", alias="PROJECT_CLONE_CACHE_DIR")
 
-    # Misc env
+    # Database
     database_url: str = Field(default="sqlite+aiosqlite:///./agent.db", alias="DATABASE_URL")
+    database_pool_min_size: int = Field(default=1, alias="DATABASE_POOL_MIN_SIZE")
+    database_pool_max_size: int = Field(default=10, alias="DATABASE_POOL_MAX_SIZE")
+    database_statement_cache_size: int = Field(default=100, alias="DATABASE_STATEMENT_CACHE_SIZE")
+    database_connect_timeout: float = Field(default=10.0, alias="DATABASE_CONNECT_TIMEOUT")
+    database_command_timeout: float = Field(default=60.0, alias="DATABASE_COMMAND_TIMEOUT")
+    sqlite_performance_mode: bool = Field(default=True, alias="SQLITE_PERFORMANCE_MODE")
+    sqlite_busy_timeout_ms: int = Field(default=5000, alias="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_mmap_size: int = Field(default=256 * 1024 * 1024, alias="SQLITE_MMAP_SIZE")
+    sqlite_read_pool_size: int = Field(default=4, alias="SQLITE_READ_POOL_SIZE")
+    sqlite_write_batch_size: int = Field(default=64, alias="SQLITE_WRITE_BATCH_SIZE")
+
+    # Audit log
+    audit_queue_size: int = Field(default=10_000, alias="AUDIT_QUEUE_SIZE")
+    audit_batch_size: int = Field(default=500, alias="AUDIT_BATCH_SIZE")
+    audit_overflow_policy: Literal["block", "drop_newest", "drop_oldest"] = Field(
+        default="block", alias="AUDIT_OVERFLOW_POLICY"
+    )
+    audit_retention_days: int = Field(default=90, alias="AUDIT_RETENTION_DAYS")
+    audit_archive_interval_seconds: float = Field(default=3600.0, alias="AUDIT_ARCHIVE_INTERVAL_SECONDS")
+    audit_archive_dir: str = Field(default="./audit-archive", alias="AUDIT_ARCHIVE_DIR")
+
+    # Security scanning
+    security_scan_cache_dir: str = Field(default=".cache/security-scans", alias="SECURITY_SCAN_CACHE_DIR")
+    security_scan_concurrency: int = Field(default=4, alias="SECURITY_SCAN_CONCURRENCY")
+    checkov_worker_enabled: bool = Field(default=True, alias="CHECKOV_WORKER_ENABLED")
+    checkov_worker_max_jobs: int = Field(default=50, alias="CHECKOV_WORKER_MAX_JOBS")
+    checkov_worker_max_rss_mb: int = Field(default=1024, alias="CHECKOV_WORKER_MAX_RSS_MB")
+    checkov_worker_timeout_seconds: float = Field(default=600.0, alias="CHECKOV_WORKER_TIMEOUT_SECONDS")
+
+    # Cost estimation
+    cost_price_cache_dir: str = Field(default=".cache/prices", alias="COST_PRICE_CACHE_DIR")
+    cost_pricing_source: Literal["auto", "infracost", "snapshot"] = Field(default="auto", alias="COST_PRICING_SOURCE")
+    pricing_snapshot_path: Optional[str] = Field(default=None, alias="PRICING_SNAPSHOT_PATH")
+
+    # GitHub repo discovery
+    github_api_url: str = Field(default="https://api.github.com", alias="GITHUB_API_URL")
+    github_discovery_concurrency: int = Field(default=4, alias="GITHUB_DISCOVERY_CONCURRENCY")
+
+    # MCP server pools
+    mcp_pool_size: int = Field(default=2, alias="MCP_POOL_SIZE")
+    terraform_mcp_pool_size: Optional[int] = Field(default=None, alias="TERRAFORM_MCP_POOL_SIZE")
+    github_mcp_pool_size: Optional[int] = Field(default=None, alias="GITHUB_MCP_POOL_SIZE")
+    mcp_health_check_interval_seconds: float = Field(default=30.0, alias="MCP_HEALTH_CHECK_INTERVAL_SECONDS")
+    mcp_restart_backoff_max_seconds: float = Field(default=60.0, alias="MCP_RESTART_BACKOFF_MAX_SECONDS")
+    mcp_acquire_timeout_seconds: float = Field(default=60.0, alias="MCP_ACQUIRE_TIMEOUT_SECONDS")
+
+    # MCP response cache
+    mcp_cache_dir: str = Field(default=".cache/mcp", alias="MCP_CACHE_DIR")
+    mcp_cache_memory_entries: int = Field(default=256, alias="MCP_CACHE_MEMORY_ENTRIES")
+    mcp_cache_ttls: str = Field(default=_DEFAULT_MCP_CACHE_TTLS, alias="MCP_CACHE_TTLS")
+    mcp_offline_retry_seconds: float = Field(default=30.0, alias="MCP_OFFLINE_RETRY_SECONDS")
+
+    # Misc env
     environment: str = Field(default="dev", alias="ENVIRONMENT")
     tools_install_dir: str = Field(default=".tools/bin", alias="TOOLS_INSTALL_DIR")
     tools_auto_install: bool = Field(default=True, alias="TOOLS_AUTO_INSTALL")
+    tools_cache_dir: str = Field(default="~/.cache/devops-agent/tools", alias="TOOLS_CACHE_DIR")
+    tools_mirror_url: Optional[str] = Field(default=None, alias="TOOLS_MIRROR_URL")
+    tools_download_retries: int = Field(default=3, alias="TOOLS_DOWNLOAD_RETRIES")
+    tools_trust_checksum_files: bool = Field(default=False, alias="TOOLS_TRUST_CHECKSUM_FILES")
 
 
 @lru_cache()
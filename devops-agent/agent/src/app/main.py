@@ -4,23 +4,32 @@ from __future__ import annotations
 import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import Any, List, AsyncIterator
+from typing import Any, AsyncIterator, Callable, List
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 
-from app import agents
+from app.agents import agent_registry
 from app.agui.workflow_agent import WorkflowChatAgent
+from app.api.dependencies import require_ready
 from app.api.routes_admin import router as tickets_router
 from app.api.routes_chat import router as chat_router
 from app.api.routes_capabilities import router as capabilities_router
+from app.api.routes_costs import router as costs_router
+from app.api.routes_locks import router as locks_router
 from app.api.routes_projects import router as projects_router
 from app.api.routes_tools import router as tools_router
 from app.config import settings
+from app.models.tooling import HealthResponse
+from app.services.audit_log import audit_log
+from app.services.checkov_worker import checkov_worker
 from app.services.database import init_database, shutdown_database
+from app.services.mcp_pool import mcp_pools
+from app.services.repo_discovery import close_http_client
+from app.services.startup import startup
 from app.services.tool_installer import ensure_tool_binaries
-from app.workflows.terraform_workflow import workflow
+from app.workflows.terraform_workflow import get_workflow
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -39,32 +48,87 @@ api_app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-api_app.include_router(chat_router)
+# Everything that can run the workflow waits for migrations and the CLI tools.
+_WORKFLOW_COMPONENTS = ("database", "tools")
+_needs_database = [Depends(require_ready("database"))]
+api_app.include_router(chat_router, dependencies=[Depends(require_ready(*_WORKFLOW_COMPONENTS))])
 api_app.include_router(capabilities_router)
-api_app.include_router(projects_router)
+api_app.include_router(costs_router, dependencies=_needs_database)
+api_app.include_router(locks_router, dependencies=_needs_database)
+api_app.include_router(projects_router, dependencies=_needs_database)
 api_app.include_router(tools_router)
-api_app.include_router(tickets_router)
+api_app.include_router(tickets_router, dependencies=_needs_database)
 
 devui_app = None
 
 
 @asynccontextmanager
 async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
-    """Manage application startup/shutdown without deprecated on_event hooks."""
+    """Manage application startup/shutdown without deprecated on_event hooks.
+
+    Migrations and tool installation run in the background so the server accepts traffic
+    (and answers health probes) immediately; dependent routes return 503 until they finish.
+    """
     logger.info("Starting application bootstrap")
+    startup.begin("database", _start_database)
     if settings.tools_auto_install:
-        await asyncio.to_thread(ensure_tool_binaries)
-    await init_database()
+        startup.begin("tools", lambda: asyncio.to_thread(ensure_tool_binaries))
+    else:
+        startup.disable("tools", "TOOLS_AUTO_INSTALL=false")
     _register_devui(app)
     try:
         yield
     finally:
+        await startup.stop()
+        await audit_log.stop()
+        await asyncio.to_thread(checkov_worker.close)
+        await mcp_pools.close()
+        await close_http_client()
         await shutdown_database()
 
 
+async def _start_database() -> None:
+    await init_database()
+    audit_log.start()
+
+
 app = FastAPI(title="Terraform Agentic Orchestrator", docs_url=None, redoc_url=None, lifespan=_lifespan)
 app.mount("/api", api_app)
 
+class _ReadyGate:
+    """ASGI wrapper that answers like ``require_ready`` until the startup components are ready."""
+
+    def __init__(self, app: Any, *components: str) -> None:
+        self._app = app
+        self._check = require_ready(*components)
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] in ("http", "websocket"):
+            try:
+                self._check()
+            except HTTPException as exc:
+                if scope["type"] == "websocket":
+                    await send({"type": "websocket.close", "code": 1013})  # try again later
+                    return
+                response = JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+                await response(scope, receive, send)
+                return
+        await self._app(scope, receive, send)
+
+
+class _LazyASGIApp:
+    """ASGI app that builds the wrapped app on its first request."""
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self._factory = factory
+        self._app: Any = None
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if self._app is None:
+            self._app = self._factory()
+        await self._app(scope, receive, send)
+
+
 def _register_devui(app: FastAPI) -> None:
     global devui_app
     if not settings.agent_framework_devui_enabled:
@@ -84,27 +148,18 @@ def _register_devui(app: FastAPI) -> None:
                 return {"detail": "Dev UI dependencies missing"}
         return
 
-    entities: List[Any] = [
-        workflow,
-        agents.orchestrator_agent,
-        agents.architect_agent,
-        agents.naming_agent,
-        agents.qa_agent,
-        agents.coding_agent,
-        agents.gitops_agent,
-        agents.plan_agent,
-        agents.plan_reviewer_agent,
-        agents.security_agent,
-        agents.cost_agent,
-        agents.apply_agent,
-        agents.documentation_agent,
-        agents.drift_agent,
-    ]
-    server = DevServer(port=0, host="127.0.0.1", ui_enabled=True, mode="developer")
-    server.register_entities(entities)
-    devui_app = server.get_app()
-    app.mount("/", devui_app)
-    logger.info("Mounted Dev UI at root path")
+    # The Dev UI is mounted now but only built (with the workflow and every agent) on its first request.
+    entity_names = [name for name in agent_registry.names() if name != "supervisor_agent"]
+
+    def _build_devui() -> Any:
+        entities: List[Any] = [get_workflow(), *(agent_registry.get(name) for name in entity_names)]
+        server = DevServer(port=0, host="127.0.0.1", ui_enabled=True, mode="developer")
+        server.register_entities(entities)
+        return server.get_app()
+
+    devui_app = _LazyASGIApp(_build_devui)
+    app.mount("/", _ReadyGate(devui_app, *_WORKFLOW_COMPONENTS))
+    logger.info("Mounted Dev UI at root path (workflow + %d agents load on first request)", len(entity_names))
 
 
 def _register_agui(app: FastAPI) -> None:
@@ -119,11 +174,14 @@ def _register_agui(app: FastAPI) -> None:
 
     logger.info("Registering AG-UI endpoint on /agui/agentic_chat (workflow-backed)")
     workflow_agent = WorkflowChatAgent()
+    # A sub-app so the readiness dependency applies to the route the helper registers.
+    agui_app = FastAPI(docs_url=None, redoc_url=None, dependencies=[Depends(require_ready(*_WORKFLOW_COMPONENTS))])
     add_agent_framework_fastapi_endpoint(
-        app,
+        agui_app,
         agent=workflow_agent,
-        path="/agui/agentic_chat",
+        path="/agentic_chat",
     )
+    app.mount("/agui", agui_app)
     logger.info("Registered AG-UI endpoint at /agui/agentic_chat")
 
 _register_agui(app)
@@ -146,9 +204,32 @@ async def global_openapi() -> RedirectResponse:
     return RedirectResponse("/api/openapi.json")
 
 
-@api_app.get("/healthz")
-async def healthz() -> dict[str, str]:
-    return {"status": "ok"}
+@api_app.get("/healthz", response_model=HealthResponse)
+async def healthz() -> HealthResponse:
+    """Liveness: always 200 once the server is up, with per-component startup state."""
+
+    return _health()
+
+
+@api_app.get("/readyz", response_model=HealthResponse)
+async def readyz(response: Response) -> HealthResponse:
+    """Readiness: 503 until every startup component is ready."""
+
+    health = _health()
+    if health.status != "ok":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return health
+
+
+def _health() -> HealthResponse:
+    components = startup.statuses()
+    if any(component.state == "failed" for component in components):
+        state = "degraded"
+    elif all(component.ready for component in components):
+        state = "ok"
+    else:
+        state = "starting"
+    return HealthResponse(status=state, components=components)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -11,8 +11,9 @@ from .artifacts import (
     SecurityIssue,
     SecurityReport,
 )
+from .costs import CostRollupPoint, RollupGranularity
 from .gitops import FileEdit, GitOpsChangeRequest, GitOpsResult
-from .locks import WorkspaceLock
+from .locks import LockMode, WorkspaceLock, WorkspaceLockView
 from .ticket import Constraints, DeploymentTicket, GitReference, TicketSummary
 
 __all__ = [
@@ -26,10 +27,14 @@ __all__ = [
     "PlanResourceChange",
     "SecurityIssue",
     "SecurityReport",
+    "CostRollupPoint",
+    "RollupGranularity",
     "FileEdit",
     "GitOpsChangeRequest",
     "GitOpsResult",
+    "LockMode",
     "WorkspaceLock",
+    "WorkspaceLockView",
     "Constraints",
     "DeploymentTicket",
     "GitReference",
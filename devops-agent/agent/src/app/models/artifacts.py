@@ -20,6 +20,7 @@ class PlanArtifact(BaseModel):
     workspace: str
     timestamp_utc: datetime
     raw_plan_path: Optional[str] = None
+    plan_json_path: Optional[str] = None
     changes: List[PlanResourceChange] = Field(default_factory=list)
     summary: str
     terraform_version: Optional[str] = None
@@ -31,14 +32,16 @@ class SecurityIssue(BaseModel):
     description: str
     resource: Optional[str] = None
     remediation: Optional[str] = None
+    detected_by: List[str] = Field(default_factory=list)
 
 
 class SecurityReport(BaseModel):
     ticket_id: str
     plan_id: Optional[str]
-    tool: Literal["checkov", "tfsec"]
+    tool: Literal["checkov", "tfsec", "all"]
     timestamp_utc: datetime
     issues: List[SecurityIssue] = Field(default_factory=list)
+    scanner_durations: Dict[str, float] = Field(default_factory=dict)
 
     @property
     def has_blocking_findings(self) -> bool:
@@ -60,6 +63,7 @@ class CostReport(BaseModel):
     delta_monthly_cost: float
     currency: str = "USD"
     components: List[CostComponent] = Field(default_factory=list)
+    pricing_snapshot_version: Optional[str] = None
 
 
 class DriftFinding(BaseModel):
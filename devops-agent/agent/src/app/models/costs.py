@@ -0,0 +1,20 @@
+"""Cost rollup time series models."""
+from __future__ import annotations
+
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel
+
+RollupGranularity = Literal["day", "month"]
+
+
+class CostRollupPoint(BaseModel):
+    project_id: str
+    environment: str
+    resource_type: str
+    period_start: date
+    monthly_cost: float
+    delta_monthly_cost: float
+    cumulative_delta_monthly_cost: float = 0.0
+    report_count: int
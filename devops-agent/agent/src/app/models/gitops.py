@@ -19,6 +19,8 @@ class GitOpsChangeRequest(BaseModel):
     base_branch: str
     preferred_branch_name: str
     file_edits: List[FileEdit] = Field(default_factory=list)
+    # False commits straight to the branch in the shared clone without checking anything out.
+    update_working_tree: bool = True
 
 
 class GitOpsResult(BaseModel):
@@ -28,3 +30,4 @@ class GitOpsResult(BaseModel):
     pull_request_url: Optional[HttpUrl]
     ci_status: Optional[Literal["pending", "success", "failed"]]
     error_message: Optional[str]
+    commit_sha: Optional[str] = None
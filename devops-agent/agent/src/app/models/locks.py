@@ -2,14 +2,30 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+LockMode = Literal["shared", "exclusive"]
 
 
 class WorkspaceLock(BaseModel):
     lock_id: str
     workspace: str
     ticket_id: str
-    status: Literal["locked_for_plan", "locked_for_apply"]
-    locked_at: datetime
+    purpose: str = Field(description="Operation holding the lock (plan, drift, apply, init)")
+    mode: LockMode
+    status: Literal["waiting", "held"]
+    fencing_token: Optional[int] = Field(
+        default=None, description="Monotonic per-workspace token assigned on grant; larger tokens are newer"
+    )
+    requested_at: datetime
+    locked_at: Optional[datetime] = None
+    heartbeat_at: datetime
+    expires_at: datetime
+
+
+class WorkspaceLockView(BaseModel):
+    workspace: str
+    holders: list[WorkspaceLock] = Field(default_factory=list)
+    waiting: list[WorkspaceLock] = Field(default_factory=list, description="Queued requests, oldest first")
@@ -1,9 +1,23 @@
 """Models describing tool health and connectivity."""
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
+class MCPPoolStats(BaseModel):
+    name: str
+    size: int = Field(description="Configured number of server processes")
+    ready: int = Field(description="Processes connected and passing health checks")
+    busy: int = Field(description="Processes with at least one tool call in flight")
+    in_flight: int = 0
+    calls: int = 0
+    restarts: int = 0
+    last_error: str | None = None
+
+
 class ToolStatus(BaseModel):
     name: str = Field(description="Unique identifier for the tool or integration")
     description: str
@@ -11,7 +25,31 @@ class ToolStatus(BaseModel):
     reason: str | None = Field(
         default=None, description="Optional explanation when a tool is unavailable or degraded"
     )
+    pool: MCPPoolStats | None = Field(default=None, description="Process pool utilisation for stdio MCP servers")
 
 
 class ToolsHealthResponse(BaseModel):
     items: list[ToolStatus] = Field(default_factory=list)
+    components: list["ComponentStatus"] = Field(
+        default_factory=list, description="Readiness of background startup work such as tool installation"
+    )
+
+
+ComponentState = Literal["pending", "running", "ready", "failed", "disabled"]
+
+
+class ComponentStatus(BaseModel):
+    name: str = Field(description="Startup component, e.g. database or tools")
+    state: ComponentState = "pending"
+    detail: str | None = Field(default=None, description="Failure message or why the component is disabled")
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "disabled")
+
+
+class HealthResponse(BaseModel):
+    status: Literal["ok", "starting", "degraded"]
+    components: list[ComponentStatus] = Field(default_factory=list)
@@ -6,6 +6,7 @@ from typing import List, Optional
 from sqlalchemy import select
 
 from app.models import CostReport, DriftReport, PlanArtifact, SecurityReport
+from app.services.cost_rollup import cost_rollup
 from app.services.database import artifacts_table, database
 
 
@@ -24,6 +25,7 @@ class ArtifactStore:
     async def save_cost_report(self, report: CostReport) -> CostReport:
         artifact_id = self._build_artifact_id("cost", report.ticket_id, report.plan_id, report.timestamp_utc.isoformat())
         await self._upsert(artifact_id, "cost", report.ticket_id, report.model_dump(mode="json"))
+        await cost_rollup.record(report)
         return report
 
     async def save_drift_report(self, report: DriftReport) -> DriftReport:
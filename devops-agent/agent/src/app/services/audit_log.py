@@ -1,14 +1,26 @@
 """Audit logging to support Dev UI observability."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict, List
+import asyncio
+import base64
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from uuid import uuid4
 
-from pydantic import BaseModel
-from sqlalchemy import select
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, or_, select
 
+from app.config import settings
 from app.services.database import audits_table, database
 
+logger = logging.getLogger(__name__)
+
+_ARCHIVE_CHUNK_SIZE = 5_000
+
 
 class AuditEvent(BaseModel):
     event_id: str
@@ -20,14 +32,207 @@ class AuditEvent(BaseModel):
     metadata: Dict[str, str] | None = None
 
 
+class AuditEventPage(BaseModel):
+    items: List[AuditEvent] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(default=None, description="Pass back as `cursor` to fetch the next page")
+
+
+def build_event(ticket_id: str, actor: str, actor_type: str, action: str, **metadata: str) -> AuditEvent:
+    return AuditEvent(
+        event_id=str(uuid4()),
+        ticket_id=ticket_id,
+        actor=actor,
+        actor_type=actor_type,
+        action=action,
+        timestamp=datetime.now(timezone.utc),
+        metadata={key: str(value) for key, value in metadata.items()} or None,
+    )
+
+
+def _encode_cursor(event: AuditEvent) -> str:
+    raw = json.dumps([event.timestamp.isoformat(), event.event_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        timestamp, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp), event_id
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid audit cursor") from exc
+
+
 class AuditLogService:
+    """Append-only audit log.
+
+    Once ``start()`` runs on the application loop, ``record_event`` only enqueues into a
+    bounded queue and a single flusher inserts whatever accumulated while the previous
+    insert was in flight as one batch. When the queue is full ``AUDIT_OVERFLOW_POLICY``
+    either applies backpressure (``block``) or drops events and counts them.
+    """
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[AuditEvent | None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._flusher: asyncio.Task | None = None
+        self._archiver: asyncio.Task | None = None
+        self._stopping: asyncio.Event | None = None
+        self.dropped_events = 0
+
+    @property
+    def running(self) -> bool:
+        return self._flusher is not None and not self._flusher.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=settings.audit_queue_size)
+        self._stopping = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop(), name="audit-log-flusher")
+        self._archiver = asyncio.create_task(self._archive_loop(), name="audit-log-archiver")
+
+    async def stop(self) -> None:
+        """Flush everything queued, then stop background tasks.
+
+        An archive pass already in progress is allowed to finish so its gzip file is never cut off.
+        """
+
+        if not self.running:
+            return
+        self._stopping.set()
+        await self._queue.put(None)
+        await self._flusher
+        if self._archiver is not None:
+            await self._archiver
+        self._flusher = self._archiver = self._queue = self._loop = self._stopping = None
+
     async def record_event(self, event: AuditEvent) -> None:
-        await database.execute(audits_table.insert().values(**event.model_dump()))
+        if not self.running or self._loop is not asyncio.get_running_loop():
+            await database.execute(audits_table.insert().values(**event.model_dump()))
+            return
+        if settings.audit_overflow_policy == "block":
+            await self._queue.put(event)
+            return
+        try:
+            self._queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            if settings.audit_overflow_policy == "drop_oldest":
+                self._queue.get_nowait()
+                self._queue.put_nowait(event)
+        self._count_dropped(1)
+
+    async def list_events(
+        self,
+        ticket_id: Optional[str] = None,
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> AuditEventPage:
+        """Page through events in (timestamp, event_id) order, optionally bounded to a time window."""
 
-    async def list_events(self, ticket_id: str) -> List[AuditEvent]:
-        query = select(audits_table).where(audits_table.c.ticket_id == ticket_id)
+        query = select(audits_table)
+        if ticket_id is not None:
+            query = query.where(audits_table.c.ticket_id == ticket_id)
+        if since is not None:
+            query = query.where(audits_table.c.timestamp >= since)
+        if until is not None:
+            query = query.where(audits_table.c.timestamp < until)
+        if cursor:
+            after_ts, after_id = _decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    audits_table.c.timestamp > after_ts,
+                    and_(audits_table.c.timestamp == after_ts, audits_table.c.event_id > after_id),
+                )
+            )
+        query = query.order_by(audits_table.c.timestamp, audits_table.c.event_id).limit(limit + 1)
         rows = await database.fetch_all(query)
-        return [AuditEvent.model_validate(dict(row)) for row in rows]
+        events = [AuditEvent.model_validate(dict(row)) for row in rows]
+        next_cursor = _encode_cursor(events[limit - 1]) if len(events) > limit else None
+        return AuditEventPage(items=events[:limit], next_cursor=next_cursor)
+
+    async def archive_events(
+        self, *, older_than: Optional[datetime] = None, archive_dir: Optional[str | Path] = None
+    ) -> Optional[Path]:
+        """Move events older than the retention window into a gzip-compressed JSONL file.
+
+        Rows are deleted only after the archive file is fully written, so a crash can at worst
+        leave events both archived and still in the table.
+        """
+
+        cutoff = older_than or datetime.now(timezone.utc) - timedelta(days=settings.audit_retention_days)
+        target_dir = Path(archive_dir or settings.audit_archive_dir).expanduser()
+        archived_ids: list[str] = []
+        path: Optional[Path] = None
+        handle = None
+        cursor: Optional[str] = None
+        try:
+            while True:
+                page = await self.list_events(until=cutoff, limit=_ARCHIVE_CHUNK_SIZE, cursor=cursor)
+                if not page.items:
+                    break
+                if handle is None:
+                    target_dir.mkdir(parents=True, exist_ok=True)
+                    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+                    path = target_dir / f"audit-events-{stamp}-{uuid4().hex[:8]}.jsonl.gz"
+                    handle = gzip.open(path, "wt", encoding="utf-8")
+                lines = "".join(event.model_dump_json() + "\n" for event in page.items)
+                await asyncio.to_thread(handle.write, lines)
+                archived_ids.extend(event.event_id for event in page.items)
+                if page.next_cursor is None:
+                    break
+                cursor = page.next_cursor
+        finally:
+            if handle is not None:
+                await asyncio.to_thread(handle.close)
+        for start in range(0, len(archived_ids), _ARCHIVE_CHUNK_SIZE):
+            chunk = archived_ids[start : start + _ARCHIVE_CHUNK_SIZE]
+            await database.execute(audits_table.delete().where(audits_table.c.event_id.in_(chunk)))
+        if path is not None:
+            logger.info("[AUDIT] Archived %d events older than %s to %s", len(archived_ids), cutoff.isoformat(), path)
+        return path
+
+    async def _flush_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            batch: list[AuditEvent] = []
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= settings.audit_batch_size or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+            if not batch:
+                continue
+            try:
+                await database.execute_many(audits_table.insert(), [event.model_dump() for event in batch])
+            except Exception:  # noqa: BLE001 - never let audit failures kill the flusher
+                logger.exception("[AUDIT] Failed to persist batch of %d events", len(batch))
+                self._count_dropped(len(batch))
+
+    async def _archive_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.archive_events()
+            except Exception:  # noqa: BLE001 - retry on the next interval
+                logger.exception("[AUDIT] Archival run failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), settings.audit_archive_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _count_dropped(self, count: int) -> None:
+        previous = self.dropped_events
+        self.dropped_events += count
+        if previous // 1000 != self.dropped_events // 1000 or previous == 0:
+            logger.warning("[AUDIT] %d audit events dropped so far", self.dropped_events)
 
 
 audit_log = AuditLogService()
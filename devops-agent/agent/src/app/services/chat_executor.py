@@ -21,8 +21,9 @@ from app.constants import (
 from app.models import Constraints, DeploymentTicket, GitReference
 from app.models.chat import ChatRequest, ChatResponse
 from app.services import project_store
+from app.services.audit_log import audit_log, build_event
 from app.services.ticket_store import ticket_store
-from app.workflows.terraform_workflow import workflow
+from app.workflows.terraform_workflow import get_workflow
 
 
 def _normalize(text: str) -> str:
@@ -169,7 +170,16 @@ class ChatService:
     async def run_chat(self, payload: ChatRequest) -> ChatResponse:
         payload, project_context = await self._apply_project_context(payload)
         ticket = await self._ensure_ticket(payload)
-        apply_supervisor_flags(ticket, payload.message)
+        if apply_supervisor_flags(ticket, payload.message):
+            await audit_log.record_event(
+                build_event(
+                    ticket.ticket_id,
+                    ticket.requested_by,
+                    "human",
+                    "supervisor_flags_updated",
+                    **{flag: value for flag, value in ticket.flags.items()},
+                )
+            )
         guardrails = guardrail_summary(ticket)
         augmented_message = (
             f"Ticket {ticket.ticket_id} ({ticket.environment}) request from {ticket.requested_by}:\n"
@@ -179,7 +189,7 @@ class ChatService:
         )
 
         async with self._workflow_lock:
-            result = await workflow.run(message=augmented_message)
+            result = await get_workflow().run(message=augmented_message)
 
         raw_outputs = result.get_outputs()
         outputs: list[Any] = []
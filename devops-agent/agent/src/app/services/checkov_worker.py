@@ -0,0 +1,179 @@
+"""Long-lived checkov process that keeps its policy registry loaded between scans.
+
+The parent talks to ``python -m app.services.checkov_worker`` over stdin/stdout with one
+JSON object per line: ``{"args": [...]}`` in, ``{"exit_code", "stdout", "rss_mb"}`` out.
+The worker imports the ``checkov`` Python package, so it is only used when that package
+is installed; otherwise callers fall back to the one-shot ``checkov`` binary.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from typing import IO, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class CheckovWorkerError(RuntimeError):
+    """Raised when the worker dies, times out or speaks garbage; callers fall back to one-shot."""
+
+
+class CheckovWorker:
+    """Client for a single recyclable worker process.
+
+    Jobs are serialized; the process is replaced after ``max_jobs`` scans or once its peak
+    RSS passes ``max_rss_mb``, and killed if a job exceeds ``timeout`` seconds. Blocking
+    pipe I/O runs in a thread so the client works from any event loop.
+    """
+
+    def __init__(
+        self,
+        command: Optional[Sequence[str]] = None,
+        *,
+        max_jobs: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self._command = list(command) if command else [sys.executable, "-m", "app.services.checkov_worker"]
+        self._max_jobs = max_jobs
+        self._max_rss_mb = max_rss_mb
+        self._timeout = timeout
+        self._process: Optional[subprocess.Popen[str]] = None
+        self._jobs = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        from app.config import settings
+
+        return settings.checkov_worker_enabled and importlib.util.find_spec("checkov") is not None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
+    async def run(self, args: Sequence[str]) -> tuple[int, str]:
+        """Run ``checkov <args>`` in the worker, returning its exit code and stdout."""
+
+        return await asyncio.to_thread(self._run_blocking, list(args))
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+    def _run_blocking(self, args: list[str]) -> tuple[int, str]:
+        from app.config import settings
+
+        timeout = self._timeout or settings.checkov_worker_timeout_seconds
+        with self._lock:
+            process = self._ensure_process()
+            watchdog = threading.Timer(timeout, process.kill)
+            watchdog.start()
+            try:
+                process.stdin.write(json.dumps({"args": args}) + "\n")
+                process.stdin.flush()
+                line = process.stdout.readline()
+            except OSError as exc:
+                self._stop()
+                raise CheckovWorkerError(f"checkov worker pipe failed: {exc}") from exc
+            finally:
+                watchdog.cancel()
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                self._stop()
+                raise CheckovWorkerError("checkov worker exited or timed out") from None
+            self._jobs += 1
+            if "error" in reply:
+                self._stop()
+                raise CheckovWorkerError(reply["error"])
+            max_jobs = self._max_jobs or settings.checkov_worker_max_jobs
+            max_rss_mb = self._max_rss_mb or settings.checkov_worker_max_rss_mb
+            if self._jobs >= max_jobs or reply.get("rss_mb", 0) >= max_rss_mb:
+                logger.info("[SEC] Recycling checkov worker after %d job(s), %s MiB", self._jobs, reply.get("rss_mb"))
+                self._stop()
+            return reply["exit_code"], reply["stdout"]
+
+    def _ensure_process(self) -> subprocess.Popen[str]:
+        if self._process is None or self._process.poll() is not None:
+            logger.info("[SEC] Starting checkov worker")
+            self._process = subprocess.Popen(
+                self._command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+            self._jobs = 0
+        return self._process
+
+    def _stop(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+
+checkov_worker = CheckovWorker()
+
+
+def _peak_rss_mb() -> int:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - non-unix
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def _run_checkov(args: list[str]) -> tuple[int, str]:
+    from checkov.main import Checkov
+    from checkov.version import version
+
+    if args == ["--version"]:
+        return 0, f"{version}\n"
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            exit_code = Checkov(argv=args).run() or 0
+    except SystemExit as exc:
+        exit_code = exc.code if isinstance(exc.code, int) else 1
+    return exit_code, buffer.getvalue()
+
+
+def _serve(requests: IO[str], replies: IO[str]) -> None:
+    # Load every policy once by scanning an empty directory before taking jobs.
+    with tempfile.TemporaryDirectory() as empty:
+        _run_checkov(["-d", empty, "--framework", "terraform", "-o", "json", "--quiet"])
+    for line in requests:
+        try:
+            exit_code, stdout = _run_checkov(json.loads(line)["args"])
+            reply = {"exit_code": exit_code, "stdout": stdout, "rss_mb": _peak_rss_mb()}
+        except Exception as exc:  # noqa: BLE001 - report and let the parent recycle us
+            reply = {"error": f"{type(exc).__name__}: {exc}"}
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+def main() -> None:
+    # Keep the protocol channel private: anything checkov prints outside a job goes to stderr.
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    _serve(sys.stdin, replies)
+
+
+if __name__ == "__main__":
+    main()
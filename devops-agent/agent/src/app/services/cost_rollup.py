@@ -0,0 +1,228 @@
+"""Incremental per-project cost time series maintained as cost reports are saved."""
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, select
+
+from app.models import CostReport, CostRollupPoint, RollupGranularity
+from app.services.database import (
+    cost_rollup_tickets_table,
+    cost_rollups_table,
+    database,
+    insert_ignoring_conflicts,
+    projects_table,
+)
+from app.services.repo_identity import repo_identity
+from app.services.ticket_store import ticket_store
+
+_UNKNOWN = "unknown"
+# `module.net["a"].azurerm_subnet.this[0]` -> `azurerm_subnet`
+_RESOURCE_TYPE = re.compile(r"(?:^|\.)([A-Za-z0-9_]+)\.[A-Za-z0-9_-]+(?:\[[^\]]*\])?$")
+
+
+def _as_date(value: date | str) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _next_period(period: date, granularity: RollupGranularity) -> date:
+    if granularity == "month":
+        return date(period.year + period.month // 12, period.month % 12 + 1, 1)
+    return period + timedelta(days=1)
+
+
+def _contributions(row) -> dict[str, list[float]]:  # noqa: ANN001 - databases Record
+    value = row["contributions"]
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def resource_type_of(address: str) -> str:
+    match = _RESOURCE_TYPE.search(address)
+    return match.group(1) if match else _UNKNOWN
+
+
+class CostRollupService:
+    """Daily buckets of (project, environment, resource type) cost, updated in place.
+
+    Each ticket contributes its latest cost report only: when a ticket is re-estimated its
+    previous delta is subtracted from the bucket it landed in before the new one is added,
+    so reads never have to look at raw cost artifacts.
+
+    A report prices the whole project, so ``monthly_cost`` is a level rather than a flow: a
+    point reports the total from the project's latest report as of the end of its period,
+    while ``delta_monthly_cost`` sums the deltas of every ticket estimated in it.
+    """
+
+    async def record(self, report: CostReport) -> None:
+        project_id, environment = await self._dimensions(report.ticket_id)
+        contributions: dict[str, list[float]] = defaultdict(lambda: [0.0, 0.0])
+        for component in report.components:
+            totals = contributions[resource_type_of(component.name)]
+            totals[0] += component.monthly_cost
+            totals[1] += component.delta_monthly_cost
+        period_start = report.timestamp_utc.astimezone(timezone.utc).date()
+        now = datetime.now(timezone.utc)
+
+        async with database.transaction():
+            previous = await database.fetch_one(
+                select(cost_rollup_tickets_table).where(cost_rollup_tickets_table.c.ticket_id == report.ticket_id)
+            )
+            if previous is not None:
+                old_period = _as_date(previous["period_start"])
+                for resource_type, (_, delta) in _contributions(previous).items():
+                    old_key = (previous["project_id"], previous["environment"], resource_type, old_period)
+                    await self._add(old_key, -delta, -1, now)
+            for resource_type, (_, delta) in contributions.items():
+                await self._add((project_id, environment, resource_type, period_start), delta, 1, now)
+
+            values = {
+                "project_id": project_id,
+                "environment": environment,
+                "period_start": period_start,
+                "contributions": dict(contributions),
+                "updated_at": now,
+            }
+            if previous is None:
+                await database.execute(
+                    cost_rollup_tickets_table.insert().values(ticket_id=report.ticket_id, **values)
+                )
+            else:
+                await database.execute(
+                    cost_rollup_tickets_table.update()
+                    .where(cost_rollup_tickets_table.c.ticket_id == report.ticket_id)
+                    .values(**values)
+                )
+
+    async def query(
+        self,
+        *,
+        project_id: Optional[str] = None,
+        environment: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        granularity: RollupGranularity = "day",
+    ) -> list[CostRollupPoint]:
+        """Return the series ordered by period, with a running delta per (project, environment, type)."""
+
+        levels = await self._levels(project_id=project_id, environment=environment, until=until)
+
+        table = cost_rollups_table
+        criteria = [table.c.report_count > 0]
+        if project_id is not None:
+            criteria.append(table.c.project_id == project_id)
+        if environment is not None:
+            criteria.append(table.c.environment == environment)
+        if resource_type is not None:
+            criteria.append(table.c.resource_type == resource_type)
+        if since is not None:
+            criteria.append(table.c.period_start >= since)
+        if until is not None:
+            criteria.append(table.c.period_start < until)
+        rows = await database.fetch_all(select(table).where(and_(*criteria)).order_by(table.c.period_start))
+
+        points: dict[tuple, CostRollupPoint] = {}
+        for row in rows:
+            period = _as_date(row["period_start"])
+            if granularity == "month":
+                period = period.replace(day=1)
+            key = (row["project_id"], row["environment"], row["resource_type"], period)
+            point = points.get(key)
+            if point is None:
+                points[key] = CostRollupPoint(
+                    project_id=row["project_id"],
+                    environment=row["environment"],
+                    resource_type=row["resource_type"],
+                    period_start=period,
+                    monthly_cost=0.0,
+                    delta_monthly_cost=row["delta_monthly_cost"],
+                    report_count=row["report_count"],
+                )
+            else:
+                point.delta_monthly_cost += row["delta_monthly_cost"]
+                point.report_count += row["report_count"]
+
+        running: dict[tuple, float] = defaultdict(float)
+        series = sorted(points.values(), key=lambda point: point.period_start)
+        for point in series:
+            key = (point.project_id, point.environment, point.resource_type)
+            running[key] += point.delta_monthly_cost
+            point.cumulative_delta_monthly_cost = round(running[key], 4)
+            starts, reports = levels.get((point.project_id, point.environment), ([], []))
+            latest = bisect_left(starts, _next_period(point.period_start, granularity)) - 1
+            if latest >= 0:
+                point.monthly_cost = round(reports[latest].get(point.resource_type, [0.0, 0.0])[0], 4)
+            point.delta_monthly_cost = round(point.delta_monthly_cost, 4)
+        return series
+
+    async def _levels(
+        self, *, project_id: Optional[str], environment: Optional[str], until: Optional[date]
+    ) -> dict[tuple[str, str], tuple[list[date], list[dict[str, list[float]]]]]:
+        """Each ticket's latest report per (project, environment), in the order they were estimated."""
+
+        table = cost_rollup_tickets_table
+        criteria = []
+        if project_id is not None:
+            criteria.append(table.c.project_id == project_id)
+        if environment is not None:
+            criteria.append(table.c.environment == environment)
+        if until is not None:
+            criteria.append(table.c.period_start < until)
+        rows = await database.fetch_all(
+            select(table).where(*criteria).order_by(table.c.period_start, table.c.updated_at)
+        )
+        levels: dict[tuple[str, str], tuple[list[date], list[dict[str, list[float]]]]] = {}
+        for row in rows:
+            starts, reports = levels.setdefault((row["project_id"], row["environment"]), ([], []))
+            starts.append(_as_date(row["period_start"]))
+            reports.append(_contributions(row))
+        return levels
+
+    async def _add(self, key: tuple, delta: float, reports: int, now: datetime) -> None:
+        project_id, environment, resource_type, period_start = key
+        await database.execute(
+            insert_ignoring_conflicts(cost_rollups_table).values(
+                project_id=project_id,
+                environment=environment,
+                resource_type=resource_type,
+                period_start=period_start,
+                delta_monthly_cost=0.0,
+                report_count=0,
+                updated_at=now,
+            )
+        )
+        table = cost_rollups_table
+        await database.execute(
+            table.update()
+            .where(
+                and_(
+                    table.c.project_id == project_id,
+                    table.c.environment == environment,
+                    table.c.resource_type == resource_type,
+                    table.c.period_start == period_start,
+                )
+            )
+            .values(
+                delta_monthly_cost=table.c.delta_monthly_cost + delta,
+                report_count=table.c.report_count + reports,
+                updated_at=now,
+            )
+        )
+
+    async def _dimensions(self, ticket_id: str) -> tuple[str, str]:
+        ticket = await ticket_store.get_ticket(ticket_id)
+        if ticket is None:
+            return _UNKNOWN, _UNKNOWN
+        repo_url = str(ticket.git.repo_url)
+        project = await database.fetch_one(
+            select(projects_table.c.project_id).where(projects_table.c.repo_identity == repo_identity(repo_url))
+        )
+        return (project["project_id"] if project else repo_url), ticket.environment
+
+
+cost_rollup = CostRollupService()
@@ -1,13 +1,45 @@
 """Database helpers and table metadata."""
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Union
 
+import aiosqlite
 from databases import Database
-from sqlalchemy import JSON, Column, DateTime, MetaData, String, Table, Text, create_engine, text, inspect
+from databases.backends.sqlite import SQLiteBackend, SQLitePool
+from sqlalchemy import (
+    JSON,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    PrimaryKeyConstraint,
+    String,
+    Table,
+    Text,
+    create_engine,
+    event,
+    text,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.dml import Insert
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 metadata = MetaData()
 
 
@@ -40,6 +72,8 @@ projects_table = Table(
     Column("name", String, nullable=False),
     Column("description", Text, nullable=True),
     Column("repo_url", String, nullable=False),
+    # repo_identity(repo_url); NULL only for legacy rows whose identity duplicated another project's.
+    Column("repo_identity", String, nullable=True),
     Column("workspace_dir", String, nullable=False),
     Column("default_environment", String, nullable=False),
     Column("default_branch", String, nullable=False),
@@ -47,6 +81,16 @@ projects_table = Table(
     Column("metadata", JSON, nullable=True),
     Column("created_at", DateTime(timezone=True), nullable=False),
     Column("updated_at", DateTime(timezone=True), nullable=False),
+    Index("ux_projects_repo_identity", "repo_identity", unique=True),
+)
+
+
+lock_state_table = Table(
+    "workspace_lock_state",
+    metadata,
+    Column("workspace", String, primary_key=True),
+    Column("fencing_token", Integer, nullable=False, server_default="0"),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
 )
 
 
@@ -56,8 +100,14 @@ locks_table = Table(
     Column("lock_id", String, primary_key=True),
     Column("workspace", String, index=True, nullable=False),
     Column("ticket_id", String, nullable=False),
+    Column("purpose", String, nullable=False),
+    Column("mode", String, nullable=False),
     Column("status", String, nullable=False),
-    Column("locked_at", DateTime(timezone=True), nullable=False),
+    Column("fencing_token", Integer, nullable=True),
+    Column("requested_at", DateTime(timezone=True), nullable=False),
+    Column("locked_at", DateTime(timezone=True), nullable=True),
+    Column("heartbeat_at", DateTime(timezone=True), nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
 )
 
 
@@ -71,25 +121,357 @@ audits_table = Table(
     Column("action", String, nullable=False),
     Column("metadata", JSON, nullable=True),
     Column("timestamp", DateTime(timezone=True), nullable=False),
+    Index("ix_audit_events_ticket_id_timestamp", "ticket_id", "timestamp"),
+    Index("ix_audit_events_timestamp", "timestamp"),
+)
+
+
+# Deltas only: monthly_cost is a level, read from each ticket's latest report in cost_rollup_tickets,
+# so the column here is no longer maintained.
+cost_rollups_table = Table(
+    "cost_rollups",
+    metadata,
+    Column("project_id", String, nullable=False),
+    Column("environment", String, nullable=False),
+    Column("resource_type", String, nullable=False),
+    Column("period_start", Date, nullable=False),
+    Column("monthly_cost", Float, nullable=False, server_default="0"),
+    Column("delta_monthly_cost", Float, nullable=False, server_default="0"),
+    Column("report_count", Integer, nullable=False, server_default="0"),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+    PrimaryKeyConstraint("project_id", "environment", "resource_type", "period_start"),
+)
+
+
+# Last rollup contribution per ticket, so a re-estimate replaces rather than adds to it.
+cost_rollup_tickets_table = Table(
+    "cost_rollup_tickets",
+    metadata,
+    Column("ticket_id", String, primary_key=True),
+    Column("project_id", String, nullable=False),
+    Column("environment", String, nullable=False),
+    Column("period_start", Date, nullable=False),
+    Column("contributions", JSON, nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+)
+
+
+# GitHub repositories visible to the discovery token, refreshed page by page with ETags.
+github_repos_table = Table(
+    "github_repos",
+    metadata,
+    Column("repo_id", Integer, primary_key=True, autoincrement=False),
+    Column("full_name", String, nullable=False),
+    Column("repo_identity", String, nullable=False, index=True),
+    Column("clone_url", String, nullable=True),
+    Column("html_url", String, nullable=True),
+    Column("page", Integer, nullable=False, index=True),
+    Column("payload", JSON, nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
 )
 
 
+github_repo_pages_table = Table(
+    "github_repo_pages",
+    metadata,
+    Column("page", Integer, primary_key=True, autoincrement=False),
+    Column("etag", String, nullable=True),
+    Column("repo_count", Integer, nullable=False),
+    Column("fetched_at", DateTime(timezone=True), nullable=False),
+)
+
+
+_ASYNC_DRIVER_PREFIXES = (
+    ("postgres://", "postgresql+asyncpg://"),
+    ("postgresql://", "postgresql+asyncpg://"),
+    ("sqlite://", "sqlite+aiosqlite://"),
+)
+
+
+def _async_database_url(url: str) -> str:
+    """Pin the async driver so `databases` and SQLAlchemy resolve the same backend."""
+
+    for prefix, replacement in _ASYNC_DRIVER_PREFIXES:
+        if url.startswith(prefix):
+            return replacement + url[len(prefix) :]
+    return url
+
+
 def _sync_database_url(url: str) -> str:
     if "+aiosqlite" in url:
         return url.replace("+aiosqlite", "", 1)
     return url
 
 
-database = Database(settings.database_url)
+def is_postgres_url(url: str) -> bool:
+    return url.startswith(("postgres://", "postgresql"))
+
+
+def _database_options(url: str) -> dict[str, Any]:
+    """Connection pool options passed through `databases` to asyncpg."""
+
+    if not is_postgres_url(url):
+        return {}
+    return {
+        "min_size": settings.database_pool_min_size,
+        "max_size": settings.database_pool_max_size,
+        "statement_cache_size": settings.database_statement_cache_size,
+        "timeout": settings.database_connect_timeout,
+        "command_timeout": settings.database_command_timeout,
+    }
+
+
+def _is_sqlite_file_url(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and "mode=memory" not in url
+
+
+def sqlite_pragmas(*, writer: bool) -> list[str]:
+    """Per-connection pragmas for SQLite performance mode."""
+
+    pragmas = [
+        f"busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        f"mmap_size = {settings.sqlite_mmap_size}",
+        "temp_store = MEMORY",
+    ]
+    if writer:
+        pragmas = ["journal_mode = WAL", "synchronous = NORMAL", *pragmas]
+    return pragmas
+
+
+class _SQLiteReadPool(SQLitePool):
+    """Keep a bounded set of warm, pragma-tuned reader connections instead of reconnecting per query."""
+
+    def __init__(self, url: Any, *, size: int, **options: Any) -> None:
+        super().__init__(url, **options)
+        self._size = size
+        self._idle: list[aiosqlite.Connection] = []
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> aiosqlite.Connection:
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is not None:
+            return connection
+        connection = await super().acquire()
+        for pragma in sqlite_pragmas(writer=False):
+            await connection.execute(f"PRAGMA {pragma}")
+        return connection
+
+    async def release(self, connection: aiosqlite.Connection) -> None:
+        with self._lock:
+            if len(self._idle) < self._size:
+                self._idle.append(connection)
+                return
+        await super().release(connection)
+
+    async def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            await super().release(connection)
+
+
+class _TunedSQLiteBackend(SQLiteBackend):
+    def __init__(self, database_url: Any, **options: Any) -> None:
+        super().__init__(database_url, **options)
+        self._pool = _SQLiteReadPool(self._database_url, size=settings.sqlite_read_pool_size, **options)
+
+    async def disconnect(self) -> None:
+        await self._pool.close()
+        await super().disconnect()
+
+
+@dataclass
+class _WriteJob:
+    queries: list[ClauseElement]
+    future: Future = field(default_factory=Future)
+
+
+_STOP = object()
+
+
+class SQLiteWriter:
+    """Single writer thread that serializes and batches writes from every store.
+
+    Jobs drained from the queue in one pass share a transaction; each job runs inside its own
+    savepoint so a failing statement only rejects its caller. Futures resolve after COMMIT.
+    """
+
+    def __init__(self, url: str, *, batch_size: int) -> None:
+        self._url = _sync_database_url(url)
+        self._batch_size = max(1, batch_size)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    async def submit(self, queries: list[ClauseElement]) -> Any:
+        job = _WriteJob(queries=queries)
+        self._queue.put(job)
+        return await asyncio.wrap_future(job.future)
+
+    def _run(self) -> None:
+        engine = create_engine(self._url)
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, _record) -> None:  # noqa: ANN001
+            # Let SQLAlchemy emit BEGIN/SAVEPOINT itself rather than pysqlite's implicit transactions.
+            dbapi_connection.isolation_level = None
+            for pragma in sqlite_pragmas(writer=True):
+                dbapi_connection.execute(f"PRAGMA {pragma}")
+
+        @event.listens_for(engine, "begin")
+        def _on_begin(conn: Connection) -> None:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+        try:
+            with engine.connect() as conn:
+                stopping = False
+                while not stopping:
+                    batch: list[_WriteJob] = []
+                    item = self._queue.get()
+                    while True:
+                        if item is _STOP:
+                            stopping = True
+                        else:
+                            batch.append(item)
+                        if stopping or len(batch) >= self._batch_size:
+                            break
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                    if batch:
+                        self._write_batch(conn, batch)
+        finally:
+            engine.dispose()
+
+    @staticmethod
+    def _write_batch(conn: Connection, batch: list[_WriteJob]) -> None:
+        outcomes: list[tuple[_WriteJob, Any, BaseException | None]] = []
+        try:
+            with conn.begin():
+                for job in batch:
+                    try:
+                        with conn.begin_nested():
+                            result = None
+                            for query in job.queries:
+                                cursor = conn.execute(query)
+                                # lastrowid is left over from the connection's last INSERT on UPDATE/DELETE.
+                                result = cursor.lastrowid if _is_insert(query) else cursor.rowcount
+                        outcomes.append((job, result, None))
+                    except Exception as exc:  # noqa: BLE001 - surfaced to the submitting caller
+                        outcomes.append((job, None, exc))
+        except Exception as exc:  # noqa: BLE001 - commit failed, reject the whole batch
+            logger.exception("SQLite writer batch of %d job(s) failed to commit", len(batch))
+            for job in batch:
+                job.future.set_exception(exc)
+            return
+        for job, result, error in outcomes:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+
+def _is_insert(query: ClauseElement) -> bool:
+    if isinstance(query, TextClause):
+        return query.text.lstrip().upper().startswith(("INSERT", "REPLACE"))
+    return isinstance(query, Insert)
+
+
+def _build_query(query: Union[ClauseElement, str], values: dict | None = None) -> ClauseElement:
+    if isinstance(query, str):
+        query = text(query)
+        return query.bindparams(**values) if values is not None else query
+    if values:
+        return query.values(**values)
+    return query
+
+
+class SQLiteDatabase(Database):
+    """`databases.Database` with SQLite performance mode: WAL, a warm read pool and one writer thread."""
+
+    SUPPORTED_BACKENDS = {**Database.SUPPORTED_BACKENDS, "sqlite": f"{__name__}:_TunedSQLiteBackend"}
+
+    def __init__(self, url: str, **options: Any) -> None:
+        options.setdefault("timeout", settings.sqlite_busy_timeout_ms / 1000)
+        super().__init__(url, **options)
+        self.writer = SQLiteWriter(url, batch_size=settings.sqlite_write_batch_size)
+
+    async def connect(self) -> None:
+        await super().connect()
+        self.writer.start()
+
+    async def disconnect(self) -> None:
+        await self.writer.stop()
+        await super().disconnect()
+
+    async def execute(self, query: Union[ClauseElement, str], values: dict | None = None) -> Any:
+        if not self._use_writer():
+            return await super().execute(query, values)
+        return await self.writer.submit([_build_query(query, values)])
+
+    async def execute_many(self, query: Union[ClauseElement, str], values: list) -> None:
+        if not self._use_writer():
+            return await super().execute_many(query, values)
+        await self.writer.submit([_build_query(query, item) for item in values])
+
+    def _use_writer(self) -> bool:
+        # Explicit transactions stay on their own connection so their statements remain atomic.
+        connection = self._global_connection or self._connection
+        in_transaction = connection is not None and bool(connection._transaction_stack)
+        return self.writer.running and not in_transaction
+
+
+def _create_database(url: str) -> Database:
+    if settings.sqlite_performance_mode and _is_sqlite_file_url(url):
+        return SQLiteDatabase(url)
+    return Database(url, **_database_options(url))
+
+
+database_url = _async_database_url(settings.database_url)
+database = _create_database(database_url)
+
+
+def insert_ignoring_conflicts(table: Table) -> Insert:
+    """INSERT ... ON CONFLICT DO NOTHING for the configured backend."""
+
+    dialect_insert = postgresql.insert if is_postgres_url(database_url) else sqlite.insert
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+def is_unique_violation(exc: BaseException) -> bool:
+    """Whether ``exc`` is a unique/primary-key violation from any configured backend."""
+
+    # The SQLite writer thread surfaces SQLAlchemy's wrapper; the async drivers raise the DBAPI error itself.
+    orig = getattr(exc, "orig", None) or exc
+    if isinstance(orig, sqlite3.IntegrityError):
+        return "UNIQUE constraint failed" in str(orig)
+    return getattr(orig, "sqlstate", None) == "23505" or getattr(orig, "pgcode", None) == "23505"
 
 
 async def init_database() -> None:
-    """Create tables and open DB connection."""
+    """Apply pending schema migrations and open DB connection."""
+
+    from app.services.migrations import run_migrations
 
-    sync_url = _sync_database_url(settings.database_url)
-    engine = create_engine(sync_url)
-    metadata.create_all(engine)
-    _ensure_project_schema(engine)
+    await run_migrations(database_url)
     await database.connect()
 
 
@@ -98,13 +480,3 @@ async def shutdown_database() -> None:
 
     if database.is_connected:
         await database.disconnect()
-
-
-def _ensure_project_schema(engine) -> None:
-    inspector = inspect(engine)
-    if "projects" not in inspector.get_table_names():
-        return
-    columns = {col["name"] for col in inspector.get_columns("projects")}
-    if "project_type" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE projects ADD COLUMN project_type TEXT DEFAULT 'terraform'"))
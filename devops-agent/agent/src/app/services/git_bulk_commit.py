@@ -0,0 +1,150 @@
+"""Commit many file edits in one pass through ``git fast-import``.
+
+Blobs, trees and the commit are written by a single ``fast-import`` process instead of
+writing every file to disk and staging it; the working tree is only touched when asked to,
+and then only for the paths that changed. Every call is blocking; run it in a thread.
+"""
+from __future__ import annotations
+
+import subprocess
+import time
+from pathlib import Path, PurePosixPath
+from typing import Iterable, Optional
+
+from app.models import FileEdit
+
+_EXECUTABLE = "100755"
+_REGULAR = "100644"
+
+
+class BulkCommitError(RuntimeError):
+    pass
+
+
+def bulk_commit(
+    repo_path: str | Path,
+    branch: str,
+    base: str,
+    edits: Iterable[FileEdit],
+    message: str,
+    *,
+    update_working_tree: bool = False,
+) -> str:
+    """Commit ``edits`` on top of ``base`` as the new tip of ``branch`` and return its sha.
+
+    Like ``git checkout -B``, the branch is reset onto ``base`` whatever it pointed at. With
+    ``update_working_tree`` the checkout at ``repo_path`` (which must have ``branch`` checked
+    out and be clean) is moved to the new commit, rewriting only the edited files.
+    """
+
+    repo_path = Path(repo_path)
+    edits = [edit.model_copy(update={"path": normalize_edit_path(edit.path)}) for edit in edits]
+    base_sha = _git(repo_path, "rev-parse", "--verify", f"{base}^{{commit}}").strip()
+    paths = list(dict.fromkeys(edit.path for edit in edits))
+    modes = _modes(repo_path, base_sha, paths)
+    appended = {edit.path for edit in edits if edit.mode == "append"}
+    current = _contents(
+        repo_path, base_sha, [path for path in paths if path in appended and modes.get(path, "").startswith("100")]
+    )
+
+    stream = bytearray()
+    name = _config(repo_path, "user.name") or "Terraform Agent Bot"
+    email = _config(repo_path, "user.email") or "terraform-agent@example.com"
+    encoded = message.encode()
+    stream += f"commit refs/heads/{branch}\ncommitter {name} <{email}> {int(time.time())} +0000\n".encode()
+    stream += b"data %d\n%s\nfrom %s\n" % (len(encoded), encoded, base_sha.encode())
+    for edit in edits:
+        if edit.mode == "delete":
+            stream += b"D %s\n" % _quote(edit.path)
+            current.pop(edit.path, None)
+            continue
+        data = edit.content.encode()
+        if edit.mode == "append":
+            data = current.get(edit.path, b"") + data
+        current[edit.path] = data
+        mode = _EXECUTABLE if modes.get(edit.path) == _EXECUTABLE else _REGULAR
+        stream += b"M %s inline %s\ndata %d\n%s\n" % (mode.encode(), _quote(edit.path), len(data), data)
+    stream += b"done\n"
+
+    # --force: the branch is reset onto base even when that is not a fast-forward.
+    _git(repo_path, "fast-import", "--quiet", "--force", "--done", input=bytes(stream))
+    sha = _git(repo_path, "rev-parse", f"refs/heads/{branch}").strip()
+    if update_working_tree:
+        # HEAD already follows the branch; a two-tree merge rewrites just the edited paths. The
+        # refresh fixes up stale stat data (as GitPython's index writes leave) so it is not
+        # mistaken for local changes.
+        _git(repo_path, "update-index", "-q", "--refresh")
+        _git(repo_path, "read-tree", "-m", "-u", base_sha, sha)
+    return sha
+
+
+def branch_checked_out(repo_path: str | Path, branch: str) -> Optional[Path]:
+    """The worktree that has ``branch`` checked out, if any."""
+
+    worktree: Optional[Path] = None
+    for line in _git(Path(repo_path), "worktree", "list", "--porcelain").splitlines():
+        if line.startswith("worktree "):
+            worktree = Path(line.removeprefix("worktree "))
+        elif line == f"branch refs/heads/{branch}":
+            return worktree
+    return None
+
+
+def normalize_edit_path(path: str) -> str:
+    """Canonical repository-relative form of ``path``; fast-import takes tree paths verbatim."""
+
+    if PurePosixPath(path).is_absolute():
+        raise BulkCommitError(f"Edit path {path!r} must be relative to the repository")
+    parts = [part for part in PurePosixPath(path).parts if part != "."]
+    if not parts or path.endswith("/"):
+        raise BulkCommitError(f"Edit path {path!r} does not name a file")
+    if ".." in parts or ".git" in parts:
+        raise BulkCommitError(f"Edit path {path!r} is outside the repository")
+    return "/".join(parts)
+
+
+def _modes(repo_path: Path, commit: str, paths: list[str]) -> dict[str, str]:
+    if not paths:
+        return {}
+    listing = _git(repo_path, "ls-tree", "-z", "--full-tree", commit, "--", *paths, raw=True)
+    modes: dict[str, str] = {}
+    for entry in filter(None, listing.split(b"\0")):
+        meta, _, path = entry.partition(b"\t")
+        modes[path.decode()] = meta.split()[0].decode()
+    return modes
+
+
+def _contents(repo_path: Path, commit: str, paths: list[str]) -> dict[str, bytes]:
+    """Blob contents at ``commit`` for ``paths`` through one ``cat-file --batch``."""
+
+    if not paths:
+        return {}
+    requests = "".join(f"{commit}:{path}\n" for path in paths).encode()
+    output = _git(repo_path, "cat-file", "--batch", input=requests, raw=True)
+    contents: dict[str, bytes] = {}
+    offset = 0
+    for path in paths:
+        header_end = output.index(b"\n", offset)
+        size = int(output[offset:header_end].split()[2])
+        contents[path] = output[header_end + 1 : header_end + 1 + size]
+        offset = header_end + 1 + size + 1
+    return contents
+
+
+def _quote(path: str) -> bytes:
+    if not any(char in path for char in '"\\\n') and not path.startswith('"'):
+        return path.encode()
+    escaped = path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'.encode()
+
+
+def _config(repo_path: Path, key: str) -> str:
+    proc = subprocess.run(["git", "-C", str(repo_path), "config", key], capture_output=True, text=True)
+    return proc.stdout.strip()
+
+
+def _git(repo_path: Path, *args: str, input: Optional[bytes] = None, raw: bool = False):
+    proc = subprocess.run(["git", "-C", str(repo_path), *args], input=input, capture_output=True)
+    if proc.returncode != 0:
+        raise BulkCommitError(f"git {args[0]} failed: {proc.stderr.decode(errors='replace').strip()}")
+    return proc.stdout if raw else proc.stdout.decode()
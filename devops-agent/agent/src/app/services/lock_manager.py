@@ -1,45 +1,270 @@
-"""Coarse-grained workspace lock manager."""
+"""Lease-based shared/exclusive workspace locks with heartbeats and fencing tokens."""
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Optional
+import asyncio
+import logging
+import random
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
 from uuid import uuid4
 
 from sqlalchemy import and_, select
 
-from app.models import WorkspaceLock
-from app.services.database import database, locks_table
+from app.config import settings
+from app.models import LockMode, WorkspaceLock, WorkspaceLockView
+from app.services.database import database, insert_ignoring_conflicts, lock_state_table, locks_table
+
+logger = logging.getLogger(__name__)
+
+
+class LockTimeoutError(RuntimeError):
+    """Raised when a workspace lock cannot be acquired before the deadline."""
+
+
+@dataclass
+class LockLease:
+    """A held lock plus the signal set when heartbeats fail to renew it."""
+
+    lock: WorkspaceLock
+    lost: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _can_grant(lock_id: str, mode: LockMode, live: list[WorkspaceLock]) -> bool:
+    """Readers share the workspace; a writer needs it empty. Queued writers block new readers."""
+
+    held = [lock for lock in live if lock.status == "held" and lock.lock_id != lock_id]
+    writers_waiting = sorted(
+        (lock for lock in live if lock.status == "waiting" and lock.mode == "exclusive"),
+        key=lambda lock: lock.requested_at,
+    )
+    if mode == "shared":
+        return not any(lock.mode == "exclusive" for lock in held) and not writers_waiting
+    if held:
+        return False
+    return not writers_waiting or writers_waiting[0].lock_id == lock_id
 
 
 class LockManager:
-    async def acquire_lock(self, workspace: str, ticket_id: str, purpose: str) -> Optional[WorkspaceLock]:
-        """Try to acquire a workspace lock. Returns lock info when successful."""
+    """Workspace locks stored one row per holder or queued waiter.
+
+    Every decision runs in a transaction that first updates the workspace's
+    ``workspace_lock_state`` row, which serializes concurrent callers for that workspace
+    (row lock on Postgres, the write lock on SQLite). The same row carries the monotonic
+    fencing token handed to each grant. Rows for holders and waiters are leases: holders
+    renew them by heartbeat, waiters by polling, and expired rows are ignored and purged.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None) -> None:
+        self._ttl_seconds = ttl_seconds
 
-        query = select(locks_table).where(
-            and_(locks_table.c.workspace == workspace, locks_table.c.status != "released")
+    @property
+    def ttl(self) -> timedelta:
+        return timedelta(seconds=self._ttl_seconds or settings.tf_lock_ttl_seconds)
+
+    async def acquire_lock(
+        self,
+        workspace: str,
+        ticket_id: str,
+        purpose: str,
+        *,
+        mode: LockMode = "exclusive",
+        lock_id: Optional[str] = None,
+        enqueue: bool = False,
+    ) -> Optional[WorkspaceLock]:
+        """Try once to acquire a workspace lock. Returns lock info when successful.
+
+        With ``enqueue`` a refused request is recorded (or refreshed) as a waiter under
+        ``lock_id`` so it keeps its queue position for the next attempt.
+        """
+
+        lock_id = lock_id or str(uuid4())
+        now = _utcnow()
+        await database.execute(
+            insert_ignoring_conflicts(lock_state_table).values(workspace=workspace, fencing_token=0, updated_at=now)
         )
-        existing = await database.fetch_one(query)
-        if existing:
-            return None
-        lock = WorkspaceLock(
-            lock_id=str(uuid4()),
-            workspace=workspace,
-            ticket_id=ticket_id,
-            status=f"locked_for_{purpose}",
-            locked_at=datetime.now(timezone.utc),
+        async with database.transaction():
+            state = await database.fetch_one(
+                lock_state_table.update()
+                .where(lock_state_table.c.workspace == workspace)
+                .values(updated_at=now)
+                .returning(lock_state_table.c.fencing_token)
+            )
+            await database.execute(
+                locks_table.delete().where(and_(locks_table.c.workspace == workspace, locks_table.c.expires_at <= now))
+            )
+            live = await self._fetch_locks(locks_table.c.workspace == workspace)
+            existing = next((lock for lock in live if lock.lock_id == lock_id), None)
+            values = {
+                "workspace": workspace,
+                "ticket_id": ticket_id,
+                "purpose": purpose,
+                "mode": mode,
+                "requested_at": existing.requested_at if existing else now,
+                "heartbeat_at": now,
+                "expires_at": now + self.ttl,
+            }
+            if _can_grant(lock_id, mode, live):
+                token = state["fencing_token"] + 1
+                await database.execute(
+                    lock_state_table.update()
+                    .where(lock_state_table.c.workspace == workspace)
+                    .values(fencing_token=token)
+                )
+                values.update(status="held", fencing_token=token, locked_at=now)
+            elif enqueue:
+                values.update(status="waiting", fencing_token=None, locked_at=None)
+            else:
+                return None
+            if existing:
+                await database.execute(locks_table.update().where(locks_table.c.lock_id == lock_id).values(**values))
+            else:
+                await database.execute(locks_table.insert().values(lock_id=lock_id, **values))
+        lock = WorkspaceLock(lock_id=lock_id, **values)
+        return lock if lock.status == "held" else None
+
+    async def acquire_lock_wait(
+        self,
+        workspace: str,
+        ticket_id: str,
+        purpose: str,
+        *,
+        mode: LockMode = "exclusive",
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.5,
+    ) -> WorkspaceLock:
+        """Queue for a workspace lock, polling with jittered backoff until ``timeout`` seconds pass."""
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (settings.tf_lock_wait_seconds if timeout is None else timeout)
+        lock_id = str(uuid4())
+        delay = poll_interval
+        try:
+            while True:
+                lock = await self.acquire_lock(
+                    workspace, ticket_id, purpose, mode=mode, lock_id=lock_id, enqueue=True
+                )
+                if lock is not None:
+                    return lock
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    holders = [held.ticket_id for held in await self.get_active_locks(workspace)]
+                    held_by = f" (held by ticket {', '.join(holders)})" if holders else ""
+                    raise LockTimeoutError(f"Timed out waiting for {mode} lock on {workspace}{held_by}")
+                await asyncio.sleep(min(remaining, delay * random.uniform(0.5, 1.0)))
+                delay = min(delay * 2, 5.0)
+        except BaseException:
+            await database.execute(
+                locks_table.delete().where(and_(locks_table.c.lock_id == lock_id, locks_table.c.status == "waiting"))
+            )
+            raise
+
+    async def renew_lock(self, lock: WorkspaceLock) -> Optional[WorkspaceLock]:
+        """Extend the lease. Returns None when the lock was released or expired."""
+
+        now = _utcnow()
+        query = (
+            locks_table.update()
+            .where(
+                and_(
+                    locks_table.c.lock_id == lock.lock_id,
+                    locks_table.c.fencing_token == lock.fencing_token,
+                    locks_table.c.status == "held",
+                    locks_table.c.expires_at > now,
+                )
+            )
+            .values(heartbeat_at=now, expires_at=now + self.ttl)
+            .returning(locks_table.c.lock_id)
         )
-        await database.execute(locks_table.insert().values(**lock.model_dump()))
-        return lock
+        if await database.fetch_one(query) is None:
+            return None
+        return lock.model_copy(update={"heartbeat_at": now, "expires_at": now + self.ttl})
 
     async def release_lock(self, lock_id: str) -> None:
         await database.execute(locks_table.delete().where(locks_table.c.lock_id == lock_id))
 
+    async def get_active_locks(self, workspace: str) -> list[WorkspaceLock]:
+        locks = await self._fetch_locks(locks_table.c.workspace == workspace)
+        return [lock for lock in locks if lock.status == "held"]
+
     async def get_active_lock(self, workspace: str) -> Optional[WorkspaceLock]:
-        query = select(locks_table).where(locks_table.c.workspace == workspace)
-        record = await database.fetch_one(query)
-        if not record:
-            return None
-        return WorkspaceLock.model_validate(record)
+        """Return the exclusive holder, or the longest-held reader, if any."""
+
+        holders = await self.get_active_locks(workspace)
+        holders.sort(key=lambda lock: (lock.mode != "exclusive", lock.locked_at))
+        return holders[0] if holders else None
+
+    async def list_workspace_locks(self) -> list[WorkspaceLockView]:
+        views: dict[str, WorkspaceLockView] = {}
+        for lock in await self._fetch_locks():
+            view = views.setdefault(lock.workspace, WorkspaceLockView(workspace=lock.workspace))
+            (view.holders if lock.status == "held" else view.waiting).append(lock)
+        for view in views.values():
+            view.waiting.sort(key=lambda lock: lock.requested_at)
+        return sorted(views.values(), key=lambda view: view.workspace)
+
+    async def is_current_holder(self, workspace: str, fencing_token: int) -> bool:
+        """Fencing check: True only if ``fencing_token`` still owns a live lease on the workspace."""
+
+        return any(lock.fencing_token == fencing_token for lock in await self.get_active_locks(workspace))
+
+    @asynccontextmanager
+    async def hold(
+        self,
+        workspace: str,
+        ticket_id: str,
+        purpose: str,
+        *,
+        mode: LockMode = "exclusive",
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[LockLease]:
+        """Acquire, heartbeat every third of the TTL while the body runs, then release."""
+
+        lock = await self.acquire_lock_wait(workspace, ticket_id, purpose, mode=mode, timeout=timeout)
+        lease = LockLease(lock=lock)
+        heartbeat = asyncio.create_task(self._heartbeat(lease))
+        logger.info(
+            "[LOCK] %s acquired %s %s lock for %s (token %d)",
+            ticket_id,
+            mode,
+            workspace,
+            purpose,
+            lock.fencing_token,
+        )
+        try:
+            yield lease
+        finally:
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except asyncio.CancelledError:
+                pass
+            await self.release_lock(lease.lock.lock_id)
+
+    async def _fetch_locks(self, *criteria) -> list[WorkspaceLock]:
+        query = select(locks_table).where(locks_table.c.expires_at > _utcnow(), *criteria)
+        rows = await database.fetch_all(query)
+        return [WorkspaceLock.model_validate(dict(row)) for row in rows]
+
+    async def _heartbeat(self, lease: LockLease) -> None:
+        interval = self.ttl.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await self.renew_lock(lease.lock)
+            except Exception:  # pragma: no cover - transient DB failure, retry on next beat
+                logger.exception("[LOCK] Heartbeat failed for %s", lease.lock.workspace)
+                continue
+            if renewed is None:
+                logger.error("[LOCK] Lease on %s lost (token %d)", lease.lock.workspace, lease.lock.fencing_token)
+                lease.lost.set()
+                return
+            lease.lock = renewed
 
 
 lock_manager = LockManager()
@@ -0,0 +1,204 @@
+"""Response cache for read-only MCP tool calls (Terraform registry docs, Microsoft Learn lookups).
+
+Entries are keyed on the MCP server, the tool name and the canonicalized arguments, and
+live in a bounded in-memory LRU in front of an on-disk store. Freshness is decided per
+tool at read time from ``MCP_CACHE_TTLS``, so a stale entry stays on disk and can still be
+served when the server is unreachable.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, CallToolResult, ErrorData, ListPromptsResult, ListToolsResult
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOOL_LIST = "__list_tools__"
+
+
+@lru_cache(maxsize=8)
+def parse_ttls(spec: str) -> tuple[tuple[str, str, float], ...]:
+    """Parse ``server:tool=seconds`` rules (comma separated, ``fnmatch`` patterns); first match wins."""
+
+    rules = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        pattern, _, seconds = item.rpartition("=")
+        server, _, tool = pattern.partition(":")
+        rules.append((server.strip(), (tool or "*").strip(), float(seconds)))
+    return tuple(rules)
+
+
+class MCPResponseCache:
+    def __init__(
+        self,
+        root: Optional[str | Path] = None,
+        *,
+        memory_entries: Optional[int] = None,
+        ttls: Optional[str] = None,
+    ) -> None:
+        self._root = root
+        self._memory_entries = memory_entries
+        self._ttls = ttls
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.mcp_cache_dir).expanduser()
+
+    def ttl_for(self, server: str, tool: str) -> Optional[float]:
+        """Seconds a response stays fresh, or ``None`` when the tool is not cached."""
+
+        for server_pattern, tool_pattern, seconds in parse_ttls(self._ttls or settings.mcp_cache_ttls):
+            if fnmatchcase(server, server_pattern) and fnmatchcase(tool, tool_pattern):
+                return seconds if seconds > 0 else None
+        return None
+
+    @staticmethod
+    def key(server: str, tool: str, arguments: Optional[dict[str, Any]] = None) -> str:
+        canonical = {key: value for key, value in (arguments or {}).items() if value is not None}
+        material = json.dumps(
+            {"server": server, "tool": tool, "arguments": canonical},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str, max_age: Optional[float]) -> Optional[str]:
+        """Cached payload no older than ``max_age`` seconds (any age when ``None``)."""
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            try:
+                record = json.loads(self._path(key).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            entry = (record["stored_at"], record["payload"])
+            self._remember(key, entry)
+        stored_at, payload = entry
+        if max_age is not None and time.time() - stored_at > max_age:
+            return None
+        return payload
+
+    def put(self, key: str, payload: str) -> None:
+        entry = (time.time(), payload)
+        self._remember(key, entry)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"stored_at": entry[0], "payload": payload}, handle)
+        os.replace(tmp, path)
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key: str, entry: tuple[float, str]) -> None:
+        limit = self._memory_entries or settings.mcp_cache_memory_entries
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > limit:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+
+mcp_response_cache = MCPResponseCache()
+
+
+def _is_transport_error(exc: Exception) -> bool:
+    """Anything but an error reported by a live server counts as the server being unreachable."""
+
+    return not isinstance(exc, McpError) or exc.error.code == CONNECTION_CLOSED
+
+
+class CachingSession:
+    """Wraps an MCP client session so tool listings and cacheable tool calls go through the cache.
+
+    With ``session=None`` the server is offline: listings and calls are answered from cache
+    regardless of age, and anything not cached fails as a closed connection.
+    """
+
+    def __init__(self, session: Any, server: str, cache: Optional[MCPResponseCache] = None) -> None:
+        self._session = session
+        self._server = server
+        self._cache = cache or mcp_response_cache
+
+    @property
+    def offline(self) -> bool:
+        return self._session is None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            raise AttributeError(name)
+        return getattr(self._session, name)
+
+    async def list_tools(self, *args: Any, **kwargs: Any) -> ListToolsResult:
+        key = self._cache.key(self._server, _TOOL_LIST)
+        if self._session is None:
+            return ListToolsResult.model_validate_json(self._require(key))
+        result = await self._session.list_tools(*args, **kwargs)
+        self._cache.put(key, result.model_dump_json())
+        return result
+
+    async def list_prompts(self, *args: Any, **kwargs: Any) -> ListPromptsResult:
+        if self._session is None:
+            return ListPromptsResult(prompts=[])
+        return await self._session.list_prompts(*args, **kwargs)
+
+    async def call_tool(self, name: str, arguments: Optional[dict[str, Any]] = None, **kwargs: Any) -> CallToolResult:
+        ttl = self._cache.ttl_for(self._server, name)
+        key = self._cache.key(self._server, name, arguments)
+        if self._session is None:
+            return CallToolResult.model_validate_json(self._require(key))
+        if ttl is None:
+            return await self._session.call_tool(name, arguments=arguments, **kwargs)
+
+        fresh = self._cache.get(key, max_age=ttl)
+        if fresh is not None:
+            return CallToolResult.model_validate_json(fresh)
+        return await self._fetch(key, lambda: self._session.call_tool(name, arguments=arguments, **kwargs))
+
+    async def _fetch(self, key: str, call: Callable[[], Awaitable[CallToolResult]]) -> CallToolResult:
+        try:
+            result = await call()
+        except Exception as exc:
+            stale = self._cache.get(key, max_age=None) if _is_transport_error(exc) else None
+            if stale is None:
+                raise
+            logger.warning("[MCP] %s unreachable (%s); serving cached response", self._server, exc)
+            return CallToolResult.model_validate_json(stale)
+        if not result.isError:
+            self._cache.put(key, result.model_dump_json())
+        return result
+
+    def _require(self, key: str) -> str:
+        payload = self._cache.get(key, max_age=None)
+        if payload is None:
+            message = f"{self._server} MCP server is offline and has no cached response"
+            raise McpError(ErrorData(code=CONNECTION_CLOSED, message=message))
+        return payload
+
+    def has_tool_list(self) -> bool:
+        return self._cache.get(self._cache.key(self._server, _TOOL_LIST), max_age=None) is not None
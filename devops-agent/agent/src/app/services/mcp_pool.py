@@ -0,0 +1,243 @@
+"""Supervised pools of warm MCP stdio server processes.
+
+Starting an MCP server through ``npx`` costs seconds, so each stdio integration keeps a
+small pool of connected server processes. Tool calls go to the least busy ready process;
+a supervisor task per slot owns its process, pings it periodically and restarts it with
+exponential backoff when it crashes or fails a health check.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from agent_framework._mcp import MCPTool
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from app.config import settings
+from app.models.tooling import MCPPoolStats
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class MCPPoolUnavailableError(RuntimeError):
+    """No server process became ready within the acquire timeout."""
+
+
+@dataclass
+class _Slot:
+    index: int
+    member: Optional[MCPTool] = None
+    in_flight: int = 0
+    calls: int = 0
+    restarts: int = 0
+    last_error: Optional[str] = None
+    unhealthy: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def ready(self) -> bool:
+        return self.member is not None and self.member.is_connected and not self.unhealthy.is_set()
+
+
+class MCPProcessPool:
+    """A fixed number of server processes built by ``factory``, each owned by a supervisor task.
+
+    The MCP stdio transport runs inside the task that opened it, so each process is opened
+    and closed by its own supervisor; callers only borrow its session.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], MCPTool],
+        size: int,
+        *,
+        health_interval: Optional[float] = None,
+        backoff_initial: float = 1.0,
+        backoff_max: Optional[float] = None,
+        acquire_timeout: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self._factory = factory
+        self._size = max(1, size)
+        self._health_interval = health_interval or settings.mcp_health_check_interval_seconds
+        self._backoff_initial = backoff_initial
+        self._backoff_max = backoff_max or settings.mcp_restart_backoff_max_seconds
+        self._acquire_timeout = acquire_timeout or settings.mcp_acquire_timeout_seconds
+        self._slots: list[_Slot] = []
+        self._tasks: list[asyncio.Task] = []
+        self._changed: Optional[asyncio.Condition] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None and self._loop is asyncio.get_running_loop() and not self._stopping.is_set()
+
+    async def start(self) -> None:
+        """Spawn the supervisors (once per event loop) and wait for the first ready process."""
+
+        if not self.started:
+            # Tasks from a previous (closed) loop cannot be reused; start over.
+            self._loop = asyncio.get_running_loop()
+            self._changed = asyncio.Condition()
+            self._stopping = asyncio.Event()
+            self._slots = [_Slot(index) for index in range(self._size)]
+            self._tasks = [
+                asyncio.create_task(self._supervise(slot), name=f"mcp-{self.name}-{slot.index}")
+                for slot in self._slots
+            ]
+        await self._acquire_ready()
+
+    async def call(self, operation: Callable[[MCPTool], Awaitable[T]]) -> T:
+        """Run ``operation`` against the least busy ready process.
+
+        If the process dies mid-call it is restarted and the call is retried once on the next
+        ready process. Errors reported by a live server (``McpError``) are raised unchanged.
+        """
+
+        for attempt in range(2):
+            slot = await self._acquire_ready()
+            slot.in_flight += 1
+            slot.calls += 1
+            try:
+                return await operation(slot.member)
+            except Exception as exc:
+                if isinstance(exc, McpError) and exc.error.code != CONNECTION_CLOSED:
+                    raise
+                # Transport failure: recycle the process.
+                slot.last_error = f"{type(exc).__name__}: {exc}"
+                slot.unhealthy.set()
+                logger.warning("[MCP] %s process %d failed a call: %s", self.name, slot.index, slot.last_error)
+                if attempt == 1:
+                    raise
+            finally:
+                slot.in_flight -= 1
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def stats(self) -> MCPPoolStats:
+        return MCPPoolStats(
+            name=self.name,
+            size=self._size,
+            ready=sum(slot.ready for slot in self._slots),
+            busy=sum(slot.in_flight > 0 for slot in self._slots),
+            in_flight=sum(slot.in_flight for slot in self._slots),
+            calls=sum(slot.calls for slot in self._slots),
+            restarts=sum(slot.restarts for slot in self._slots),
+            last_error=next((slot.last_error for slot in self._slots if slot.last_error), None),
+        )
+
+    async def close(self) -> None:
+        if not self.started:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _acquire_ready(self) -> _Slot:
+        def _ready() -> list[_Slot]:
+            return [slot for slot in self._slots if slot.ready]
+
+        async with self._changed:
+            try:
+                ready = await asyncio.wait_for(self._changed.wait_for(_ready), self._acquire_timeout)
+            except asyncio.TimeoutError:
+                last_error = self.stats().last_error or "no process started"
+                raise MCPPoolUnavailableError(f"No {self.name} MCP server process is ready: {last_error}") from None
+        return min(ready, key=lambda slot: slot.in_flight)
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _supervise(self, slot: _Slot) -> None:
+        delay = self._backoff_initial
+        while not self._stopping.is_set():
+            member = self._factory()
+            try:
+                async with member:
+                    slot.member = member
+                    slot.unhealthy.clear()
+                    delay = self._backoff_initial
+                    await self._notify()
+                    await self._watch(slot, member)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - crashed or failed to start; restart below
+                slot.last_error = f"{type(exc).__name__}: {exc}"
+            finally:
+                slot.member = None
+                await self._notify()
+            if self._stopping.is_set():
+                return
+            slot.restarts += 1
+            logger.warning(
+                "[MCP] Restarting %s process %d in %.1fs (%s)", self.name, slot.index, delay, slot.last_error
+            )
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self._backoff_max)
+
+    async def _watch(self, slot: _Slot, member: MCPTool) -> None:
+        """Return on shutdown; raise when the process is marked unhealthy or misses a ping."""
+
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        try:
+            while True:
+                unhealthy = asyncio.ensure_future(slot.unhealthy.wait())
+                done, _ = await asyncio.wait(
+                    {stopping, unhealthy}, timeout=self._health_interval, return_when=asyncio.FIRST_COMPLETED
+                )
+                unhealthy.cancel()
+                if stopping in done:
+                    return
+                if unhealthy in done:
+                    raise RuntimeError(slot.last_error or "marked unhealthy")
+                await asyncio.wait_for(member.session.send_ping(), self._health_interval)
+        finally:
+            stopping.cancel()
+
+
+class MCPPoolRegistry:
+    """Pools by name so health reporting can find them."""
+
+    def __init__(self) -> None:
+        self._pools: dict[str, MCPProcessPool] = {}
+
+    def register(self, pool: MCPProcessPool) -> MCPProcessPool:
+        self._pools[pool.name] = pool
+        return pool
+
+    def get(self, name: str) -> Optional[MCPProcessPool]:
+        return self._pools.get(name)
+
+    def stats(self) -> dict[str, MCPPoolStats]:
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    async def close(self) -> None:
+        await asyncio.gather(*(pool.close() for pool in self._pools.values()), return_exceptions=True)
+
+
+mcp_pools = MCPPoolRegistry()
+
+
+class PooledSession:
+    """The subset of ``ClientSession`` used by ``MCPTool``, routed through a pool."""
+
+    def __init__(self, pool: MCPProcessPool) -> None:
+        self._pool = pool
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        if name not in {"list_tools", "list_prompts", "call_tool", "get_prompt", "send_ping", "set_logging_level"}:
+            raise AttributeError(name)
+
+        async def _forward(*args: Any, **kwargs: Any) -> Any:
+            return await self._pool.call(lambda member: getattr(member.session, name)(*args, **kwargs))
+
+        return _forward
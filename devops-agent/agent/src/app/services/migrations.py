@@ -0,0 +1,146 @@
+"""Versioned schema migrations applied at startup."""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.services.database import metadata
+from app.services.repo_identity import repo_identity
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant so concurrent replicas serialize migrations on Postgres.
+_ADVISORY_LOCK_KEY = 0x7466_6167
+
+_migration_metadata = MetaData()
+
+schema_migrations_table = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _create_tables(*names: str) -> Callable[[Connection], None]:
+    def _upgrade(conn: Connection) -> None:
+        metadata.create_all(conn, tables=[metadata.tables[name] for name in names], checkfirst=True)
+
+    return _upgrade
+
+
+def _recreate_table(name: str) -> Callable[[Connection], None]:
+    """Drop and recreate a table that only holds ephemeral state."""
+
+    def _upgrade(conn: Connection) -> None:
+        table = metadata.tables[name]
+        table.drop(conn, checkfirst=True)
+        table.create(conn)
+
+    return _upgrade
+
+
+def _create_indexes(table: str) -> Callable[[Connection], None]:
+    def _upgrade(conn: Connection) -> None:
+        for index in metadata.tables[table].indexes:
+            index.create(conn, checkfirst=True)
+
+    return _upgrade
+
+
+def _add_column(table: str, column: str, ddl: str) -> Callable[[Connection], None]:
+    """Add a column unless it already exists (fresh databases get it from the table definition)."""
+
+    def _upgrade(conn: Connection) -> None:
+        existing = {col["name"] for col in inspect(conn).get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+    return _upgrade
+
+
+def _add_project_repo_identity(conn: Connection) -> None:
+    """Backfill projects.repo_identity and enforce one project per repository.
+
+    Legacy duplicates keep a NULL identity (logged) so the unique index can still be built.
+    """
+
+    _add_column("projects", "repo_identity", "TEXT")(conn)
+    projects = metadata.tables["projects"]
+    seen: set[str] = set()
+    rows = conn.execute(select(projects.c.project_id, projects.c.repo_url).order_by(projects.c.created_at))
+    for project_id, repo_url in rows.all():
+        identity = repo_identity(repo_url)
+        if identity in seen:
+            logger.warning("Project %s duplicates repository %s; leaving repo_identity unset", project_id, identity)
+            continue
+        seen.add(identity)
+        conn.execute(projects.update().where(projects.c.project_id == project_id).values(repo_identity=identity))
+    _create_indexes("projects")(conn)
+    # The GitHub inventory is a cache; rebuild it with identities on the next discovery.
+    _recreate_table("github_repos")(conn)
+    _recreate_table("github_repo_pages")(conn)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        1,
+        "baseline schema",
+        _create_tables("tickets", "artifacts", "projects", "workspace_locks", "audit_events"),
+    ),
+    Migration(2, "add projects.project_type", _add_column("projects", "project_type", "TEXT DEFAULT 'terraform'")),
+    Migration(3, "lease-based workspace_locks (one row per workspace)", _recreate_table("workspace_locks")),
+    Migration(4, "workspace_lock_state table", _create_tables("workspace_lock_state")),
+    Migration(5, "shared/exclusive workspace_locks (one row per holder or waiter)", _recreate_table("workspace_locks")),
+    Migration(6, "audit_events (ticket_id, timestamp) and timestamp indexes", _create_indexes("audit_events")),
+    Migration(7, "cost rollup tables", _create_tables("cost_rollups", "cost_rollup_tickets")),
+    Migration(8, "GitHub repo inventory tables", _create_tables("github_repos", "github_repo_pages")),
+    Migration(9, "projects.repo_identity with unique index", _add_project_repo_identity),
+]
+
+
+def _apply_pending(conn: Connection) -> list[int]:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+    schema_migrations_table.create(conn, checkfirst=True)
+    applied_versions = set(conn.execute(select(schema_migrations_table.c.version)).scalars())
+    applied: list[int] = []
+    for migration in sorted(MIGRATIONS, key=lambda item: item.version):
+        if migration.version in applied_versions:
+            continue
+        logger.info("Applying schema migration %03d: %s", migration.version, migration.description)
+        migration.upgrade(conn)
+        conn.execute(
+            schema_migrations_table.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.now(timezone.utc),
+            )
+        )
+        applied.append(migration.version)
+    return applied
+
+
+async def run_migrations(database_url: str) -> list[int]:
+    """Apply pending migrations in a single transaction and return their versions."""
+
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            return await conn.run_sync(_apply_pending)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,60 @@
+"""Helpers for the ``terraform show -json`` plan files written next to each saved plan."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+from app.services.plan_store import is_blob_ref, plan_store
+
+_UNCHANGED_ACTIONS = ({"no-op"}, {"read"})
+
+
+def plan_json_path_for(path: str | Path) -> Path:
+    """Map a ``.tfplan`` path or plan-store reference from ``PlanArtifact`` to its saved JSON rendering."""
+
+    if is_blob_ref(path):
+        return plan_store.rendering_path(path)
+    path = Path(path)
+    return path.with_suffix(".json") if path.suffix == ".tfplan" else path
+
+
+def load_plan(path: str | Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8") or "{}")
+
+
+def dump_plan(plan: dict) -> bytes:
+    """Canonical encoding, so equal plans hash equally."""
+
+    return json.dumps(plan, sort_keys=True, separators=(",", ":")).encode()
+
+
+def is_changed(resource_change: dict) -> bool:
+    actions = resource_change.get("change", {}).get("actions") or ["no-op"]
+    return set(actions) not in _UNCHANGED_ACTIONS
+
+
+def scope_plan(plan: dict, addresses: Iterable[str], *, keep_prior_state: bool = False) -> dict:
+    """Return a copy of ``plan`` restricted to the given resource addresses."""
+
+    wanted = set(addresses)
+
+    def _prune(module: dict) -> dict:
+        resources = [resource for resource in module.get("resources") or [] if resource.get("address") in wanted]
+        pruned = {**module, "resources": resources}
+        if module.get("child_modules"):
+            pruned["child_modules"] = [_prune(child) for child in module["child_modules"]]
+        return pruned
+
+    scoped = {key: value for key, value in plan.items() if key not in {"prior_state", "resource_drift"}}
+    scoped["resource_changes"] = [
+        change for change in plan.get("resource_changes") or [] if change.get("address") in wanted
+    ]
+    planned_root = plan.get("planned_values", {}).get("root_module")
+    if planned_root is not None:
+        scoped["planned_values"] = {**plan["planned_values"], "root_module": _prune(planned_root)}
+    prior_values = plan.get("prior_state", {}).get("values", {})
+    if keep_prior_state and prior_values.get("root_module") is not None:
+        pruned_prior = {**prior_values, "root_module": _prune(prior_values["root_module"])}
+        scoped["prior_state"] = {**plan["prior_state"], "values": pruned_prior}
+    return scoped
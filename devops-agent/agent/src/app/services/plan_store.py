@@ -0,0 +1,305 @@
+"""Content-addressed, compressed store for saved Terraform plans and their JSON renderings.
+
+Plan files are moved out of the working directory into ``PLAN_STORE_DIR`` as
+``objects/<aa>/<sha256>.zst`` (``.gz`` when ``zstandard`` is not installed), so identical
+plans are stored once, a re-plan never overwrites an earlier one, and any worker sharing the
+directory can read them. ``PlanArtifact.raw_plan_path`` and ``plan_json_path`` hold
+``blob://sha256/<hex>`` references; :meth:`PlanBlobStore.open` turns one into a read-only,
+decompressed file (kept under ``expanded/`` and safe to memory-map) for terraform or readers.
+
+Every stored plan is recorded under ``refs/<ticket>/<plan_id>.json``. Retention drops all but
+the newest ``PLAN_STORE_KEEP_PER_TICKET`` plans of a ticket and any older than
+``PLAN_STORE_RETENTION_DAYS``; objects no longer referenced are then deleted.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from app.config import settings
+
+try:  # optional: pip install "terraform-agentic-orchestrator[plan-store]"
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = "blob://sha256/"
+_CHUNK = 1 << 20
+_CODECS = (".zst", ".gz")
+# Objects younger than this are never swept: their refs may still be being written.
+_SWEEP_GRACE_SECONDS = 3600
+# Decompressed copies are cheap to recreate; drop those unread for this long.
+_EXPANDED_TTL_SECONDS = 86400
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class PlanStoreError(RuntimeError):
+    pass
+
+
+def is_blob_ref(value: object) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_PREFIX)
+
+
+def _digest_of(ref: str) -> str:
+    digest = ref.removeprefix(BLOB_PREFIX)
+    if not re.fullmatch(r"[0-9a-f]{64}", digest):
+        raise PlanStoreError(f"Not a plan blob reference: {ref}")
+    return digest
+
+
+class PlanBlobStore:
+    def __init__(self, root: Optional[str | Path] = None, *, gc_interval: float = 600.0) -> None:
+        self._root = root
+        self._gc_interval = gc_interval
+        self._last_gc = 0.0
+        self._guard = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.plan_store_dir).expanduser()
+
+    def put_plan(
+        self, ticket_id: str, plan_id: str, plan_file: Path, json_file: Path, workspace_dir: Path
+    ) -> tuple[str, str]:
+        """Move a saved plan and its JSON rendering into the store; returns their references.
+
+        ``workspace_dir`` is where the plan was made, which is where it has to be applied from.
+        Blocking; run it in a thread.
+        """
+
+        rendering = self._put(json_file, {"kind": "plan-json"})
+        plan = self._put(
+            plan_file, {"kind": "plan", "rendering": rendering, "workspace_dir": str(Path(workspace_dir).resolve())}
+        )
+        ref = self.root / "refs" / _safe(ticket_id) / f"{_safe(plan_id)}.json"
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "plan": plan,
+            "json": rendering,
+            "workspace_dir": str(Path(workspace_dir).resolve()),
+            "created_at": time.time(),
+        }
+        _atomic_write(ref, json.dumps(record).encode())
+        plan_file.unlink(missing_ok=True)
+        json_file.unlink(missing_ok=True)
+        self.collect_garbage_if_due()
+        return BLOB_PREFIX + plan, BLOB_PREFIX + rendering
+
+    def open(self, ref: str) -> Path:
+        """Decompressed, read-only copy of the blob behind ``ref``."""
+
+        digest = _digest_of(ref)
+        expanded = self.root / "expanded" / digest
+        if expanded.exists():
+            os.utime(expanded)
+            return expanded
+        source = self._object(digest)
+        if source is None:
+            raise PlanStoreError(f"Plan blob {digest[:12]} is not in the store")
+        expanded.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=expanded.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as target, _reader(source) as reader:
+                shutil.copyfileobj(reader, target, _CHUNK)
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, expanded)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return expanded
+
+    @contextmanager
+    def mmap(self, ref: str) -> Iterator[mmap.mmap]:
+        """Map the decompressed blob read-only; plans and renderings are never empty."""
+
+        with self.open(ref).open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+    def metadata(self, ref: str) -> dict:
+        try:
+            return json.loads(self._meta_path(_digest_of(ref)).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def rendering_path(self, ref: str) -> Path:
+        """The JSON rendering of the plan ``ref`` (or ``ref`` itself if it is one) as a file.
+
+        Returns a path that does not exist when the blob is gone, like a deleted plan file.
+        """
+
+        meta = self.metadata(ref)
+        if meta.get("kind") == "plan":
+            ref = BLOB_PREFIX + meta["rendering"]
+        try:
+            return self.open(ref)
+        except PlanStoreError:
+            return self.root / "expanded" / _digest_of(ref)
+
+    def rendering_ref(self, ticket_id: str, plan_id: str) -> Optional[str]:
+        """Reference to the JSON rendering of a plan the store still keeps, by ticket and plan id."""
+
+        try:
+            record = json.loads((self.root / "refs" / _safe(ticket_id) / f"{_safe(plan_id)}.json").read_text("utf-8"))
+        except (OSError, ValueError):
+            return None
+        return BLOB_PREFIX + record["json"] if record.get("json") else None
+
+    def workspaces_in_use(self) -> set[str]:
+        """Directories that plans still kept by the store were made in, and are applied from."""
+
+        workspaces = set()
+        for ref in (self.root / "refs").glob("*/*.json"):
+            try:
+                workspace = json.loads(ref.read_text(encoding="utf-8")).get("workspace_dir")
+            except (OSError, ValueError):
+                continue
+            if workspace:
+                workspaces.add(workspace)
+        return workspaces
+
+    def collect_garbage_if_due(self) -> None:
+        with self._guard:
+            due = time.monotonic() - self._last_gc >= self._gc_interval
+            if due:
+                self._last_gc = time.monotonic()
+        if due:
+            try:
+                self.collect_garbage()
+            except OSError as exc:  # pragma: no cover - retention is best effort
+                logger.warning("[PLANS] Plan store cleanup failed: %s", exc)
+
+    def collect_garbage(
+        self, *, keep_per_ticket: Optional[int] = None, max_age_seconds: Optional[float] = None
+    ) -> int:
+        """Apply retention to refs, then delete objects no remaining ref uses; returns blobs deleted."""
+
+        keep = settings.plan_store_keep_per_ticket if keep_per_ticket is None else keep_per_ticket
+        max_age = settings.plan_store_retention_days * 86400 if max_age_seconds is None else max_age_seconds
+        now = time.time()
+        live: set[str] = set()
+        for ticket in (self.root / "refs").glob("*"):
+            records = []
+            for ref in ticket.glob("*.json"):
+                try:
+                    records.append((json.loads(ref.read_text(encoding="utf-8")), ref))
+                except (OSError, ValueError):
+                    continue
+            records.sort(key=lambda item: item[0].get("created_at", 0), reverse=True)
+            for index, (record, ref) in enumerate(records):
+                if index >= keep or now - record.get("created_at", 0) > max_age:
+                    ref.unlink(missing_ok=True)
+                else:
+                    live.update((record.get("plan"), record.get("json")))
+
+        deleted = 0
+        for blob in (self.root / "objects").glob("*/*"):
+            digest = blob.name.split(".", 1)[0]
+            if digest in live or blob.suffix not in _CODECS or now - _mtime(blob) < _SWEEP_GRACE_SECONDS:
+                continue
+            blob.unlink(missing_ok=True)
+            self._meta_path(digest).unlink(missing_ok=True)
+            (self.root / "expanded" / digest).unlink(missing_ok=True)
+            deleted += 1
+        for expanded in (self.root / "expanded").glob("*"):
+            if now - _mtime(expanded) > _EXPANDED_TTL_SECONDS:
+                expanded.unlink(missing_ok=True)
+        if deleted:
+            logger.info("[PLANS] Deleted %d unreferenced plan blob(s)", deleted)
+        return deleted
+
+    def _put(self, path: Path, meta: dict) -> str:
+        digest = _file_digest(path)
+        if self._object(digest) is None:
+            target = self._object_dir(digest) / f"{digest}{'.zst' if zstandard is not None else '.gz'}"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as raw, path.open("rb") as source, _writer(raw, target.suffix) as writer:
+                    shutil.copyfileobj(source, writer, _CHUNK)
+                os.replace(tmp, target)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        else:
+            os.utime(self._object(digest))  # a re-stored blob restarts its sweep grace period
+        _atomic_write(self._meta_path(digest), json.dumps({**meta, "size": path.stat().st_size}).encode())
+        return digest
+
+    def _object_dir(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2]
+
+    def _object(self, digest: str) -> Optional[Path]:
+        for suffix in _CODECS:
+            candidate = self._object_dir(digest) / f"{digest}{suffix}"
+            if candidate.exists():
+                return candidate
+        return None
+
+    def _meta_path(self, digest: str) -> Path:
+        return self._object_dir(digest) / f"{digest}.json"
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return time.time()  # removed meanwhile; treat as fresh so it is left alone
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _writer(raw: IO[bytes], suffix: str) -> Iterator[IO[bytes]]:
+    if suffix == ".zst":
+        with zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False) as writer:
+            yield writer
+    else:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as writer:
+            yield writer
+
+
+@contextmanager
+def _reader(path: Path) -> Iterator[IO[bytes]]:
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise PlanStoreError(f"{path.name} is zstd-compressed; install zstandard to read it")
+        with path.open("rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+            yield reader
+    else:
+        with gzip.open(path, "rb") as reader:
+            yield reader
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp, path)
+
+
+def _safe(name: str) -> str:
+    return _UNSAFE.sub("-", name).strip("-.") or "plan"
+
+
+plan_store = PlanBlobStore()
@@ -0,0 +1,204 @@
+"""Offline Azure pricing snapshot used when infracost's pricing API is unavailable.
+
+A snapshot is a single SQLite file built from an Azure Retail Prices export (the API's
+``Items`` JSON, JSON lines, or CSV with the same column names). Only pay-as-you-go
+consumption meters are kept, indexed on (service, ARM SKU, region, OS) so all resources
+in a plan can be priced with one query.
+
+    python -m app.services.pricing_snapshot prices.json pricing.db --version 2024-06
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+HOURS_PER_MONTH = 730
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS prices (
+    service_name TEXT NOT NULL,
+    arm_sku_name TEXT NOT NULL,
+    region TEXT NOT NULL,
+    os TEXT NOT NULL,
+    meter_name TEXT NOT NULL,
+    unit_of_measure TEXT NOT NULL,
+    retail_price REAL NOT NULL,
+    currency TEXT NOT NULL,
+    PRIMARY KEY (service_name, arm_sku_name, region, os, meter_name)
+) WITHOUT ROWID;
+"""
+_LOOKUP_CHUNK = 200
+
+
+@dataclass(frozen=True)
+class PriceKey:
+    service_name: str
+    arm_sku_name: str
+    region: str
+    os: str = "linux"
+
+
+@dataclass(frozen=True)
+class SnapshotPrice:
+    hourly_price: float
+    currency: str
+
+    @property
+    def monthly_price(self) -> float:
+        return self.hourly_price * HOURS_PER_MONTH
+
+
+def normalize_region(location: str) -> str:
+    return location.replace(" ", "").lower()
+
+
+class PricingSnapshot:
+    """Read-only view of a snapshot file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        meta = dict(self._conn.execute("SELECT key, value FROM snapshot_meta"))
+        self.version = meta.get("version", "unknown")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def lookup_many(self, keys: Iterable[PriceKey]) -> dict[PriceKey, SnapshotPrice]:
+        """Price every key in a handful of joined queries; the cheapest hourly meter wins."""
+
+        unique = list(dict.fromkeys(keys))
+        found: dict[PriceKey, SnapshotPrice] = {}
+        for start in range(0, len(unique), _LOOKUP_CHUNK):
+            chunk = unique[start : start + _LOOKUP_CHUNK]
+            values = ", ".join("(?, ?, ?, ?, ?)" for _ in chunk)
+            params = [
+                item
+                for index, key in enumerate(chunk)
+                for item in (index, key.service_name, key.arm_sku_name.lower(), key.region, key.os)
+            ]
+            rows = self._conn.execute(
+                f"""
+                WITH wanted(idx, service_name, arm_sku_name, region, os) AS (VALUES {values})
+                SELECT wanted.idx, MIN(prices.retail_price), prices.currency
+                FROM wanted JOIN prices USING (service_name, arm_sku_name, region, os)
+                WHERE prices.unit_of_measure = '1 Hour'
+                GROUP BY wanted.idx
+                """,
+                params,
+            )
+            for index, price, currency in rows:
+                found[chunk[index]] = SnapshotPrice(hourly_price=price, currency=currency)
+        return found
+
+
+def resource_price_keys(resource_type: str, values: Optional[dict]) -> list[tuple[PriceKey, float]]:
+    """Map a planned Azure resource to the hourly compute meters it bills, with quantities.
+
+    Covers VMs, scale sets and AKS default node pools; other resource types are unpriced.
+    """
+
+    if not values:
+        return []
+    region = normalize_region(values.get("location") or "")
+    if resource_type in {"azurerm_linux_virtual_machine", "azurerm_windows_virtual_machine"}:
+        os_name = "windows" if resource_type.startswith("azurerm_windows") else "linux"
+        return [(PriceKey("Virtual Machines", values.get("size") or "", region, os_name), 1)]
+    if resource_type == "azurerm_virtual_machine":
+        return [(PriceKey("Virtual Machines", values.get("vm_size") or "", region), 1)]
+    if resource_type in {"azurerm_linux_virtual_machine_scale_set", "azurerm_windows_virtual_machine_scale_set"}:
+        os_name = "windows" if resource_type.startswith("azurerm_windows") else "linux"
+        key = PriceKey("Virtual Machines", values.get("sku") or "", region, os_name)
+        return [(key, float(values.get("instances") or 0))]
+    if resource_type == "azurerm_kubernetes_cluster":
+        pools = values.get("default_node_pool") or [{}]
+        pool = pools[0] if isinstance(pools, list) else pools
+        count = pool.get("node_count") or pool.get("min_count") or 1
+        return [(PriceKey("Virtual Machines", pool.get("vm_size") or "", region), float(count))]
+    return []
+
+
+def import_export(export_path: str | Path, snapshot_path: str | Path, *, version: Optional[str] = None) -> int:
+    """Build (or replace) a snapshot from a retail prices export. Returns the number of meters kept."""
+
+    export_path = Path(export_path)
+    snapshot_path = Path(snapshot_path)
+    tmp_path = snapshot_path.with_suffix(snapshot_path.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(_SCHEMA)
+        conn.executemany(
+            "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (row for row in map(_price_row, _read_export(export_path)) if row is not None),
+        )
+        count = conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO snapshot_meta VALUES (?, ?)",
+            [
+                ("version", version or datetime.now(timezone.utc).strftime("%Y-%m-%d")),
+                ("source", export_path.name),
+                ("imported_at", datetime.now(timezone.utc).isoformat()),
+            ],
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path.replace(snapshot_path)
+    return count
+
+
+def _read_export(path: Path) -> Iterator[dict]:
+    if path.suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as handle:
+            yield from csv.DictReader(handle)
+        return
+    text = path.read_text(encoding="utf-8").strip()
+    try:
+        payload = json.loads(text or "[]")
+    except json.JSONDecodeError:  # JSON lines, one meter per line
+        yield from (json.loads(line) for line in text.splitlines() if line.strip())
+        return
+    yield from payload.get("Items", []) if isinstance(payload, dict) else payload
+
+
+def _price_row(item: dict) -> Optional[tuple]:
+    meter = item.get("meterName", "")
+    if item.get("type", "Consumption") != "Consumption" or "Spot" in meter or "Low Priority" in meter:
+        return None
+    if not item.get("armSkuName") or not item.get("armRegionName"):
+        return None
+    product = item.get("productName", "")
+    return (
+        item.get("serviceName", ""),
+        item["armSkuName"].lower(),
+        normalize_region(item["armRegionName"]),
+        "windows" if "Windows" in product else "linux",
+        meter,
+        item.get("unitOfMeasure", ""),
+        float(item.get("retailPrice") or item.get("unitPrice") or 0),
+        item.get("currencyCode", "USD"),
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import an Azure retail prices export into a pricing snapshot")
+    parser.add_argument("export", help="Retail prices export (.json, .jsonl or .csv)")
+    parser.add_argument("snapshot", help="Snapshot file to write")
+    parser.add_argument("--version", help="Snapshot version label (defaults to today's date)")
+    args = parser.parse_args(argv)
+    count = import_export(args.export, args.snapshot, version=args.version)
+    print(f"Imported {count} meters into {args.snapshot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,12 @@ from typing import Optional
 
 
 from app.models.project import Project, ProjectCreate, ProjectUpdate
-from app.services.database import database, projects_table
+from app.services.database import database, is_unique_violation, projects_table
+from app.services.repo_identity import repo_identity
+
+
+class ProjectConflictError(ValueError):
+    """Another project already manages the same repository."""
 
 
 def generate_project_id(name: str) -> str:
@@ -21,12 +26,12 @@ async def list_projects() -> list[Project]:
     return [Project(**row) for row in rows]
 
 
-async def list_project_repo_urls() -> set[str]:
-    projects = await list_projects()
-    urls: set[str] = set()
-    for project in projects:
-        urls.add(str(project.repo_url))
-    return urls
+async def get_project_by_repo(repo_url: str) -> Optional[Project]:
+    """The project managing ``repo_url``, however the URL is written (SSH/HTTPS, case, ``.git``)."""
+
+    query = projects_table.select().where(projects_table.c.repo_identity == repo_identity(repo_url))
+    row = await database.fetch_one(query)
+    return Project(**row) if row else None
 
 
 async def get_project(project_id: str) -> Optional[Project]:
@@ -37,12 +42,14 @@ async def get_project(project_id: str) -> Optional[Project]:
 
 async def create_project(payload: ProjectCreate) -> Project:
     project_id = payload.project_id or generate_project_id(payload.name)
+    await _ensure_repo_unmanaged(str(payload.repo_url))
     now = datetime.now(timezone.utc)
     values = {
         "project_id": project_id,
         "name": payload.name,
         "description": payload.description,
         "repo_url": str(payload.repo_url),
+        "repo_identity": repo_identity(str(payload.repo_url)),
         "workspace_dir": payload.workspace_dir,
         "default_environment": payload.default_environment,
         "default_branch": payload.default_branch,
@@ -51,7 +58,14 @@ async def create_project(payload: ProjectCreate) -> Project:
         "created_at": now,
         "updated_at": now,
     }
-    await database.execute(projects_table.insert().values(values))
+    try:
+        await database.execute(projects_table.insert().values(values))
+    except Exception as exc:
+        if not is_unique_violation(exc):
+            raise
+        # A concurrent create won the race past _ensure_repo_unmanaged; report it like the pre-check would.
+        await _ensure_repo_unmanaged(values["repo_url"])
+        raise ProjectConflictError(f"Project {project_id} already exists") from exc
     return Project(**values)
 
 
@@ -63,12 +77,30 @@ async def update_project(project_id: str, payload: ProjectUpdate) -> Optional[Pr
     if not data:
         return current
     data["updated_at"] = datetime.now(timezone.utc)
+    values = data
     if "repo_url" in data and data["repo_url"] is not None:
         data["repo_url"] = str(data["repo_url"])
-    await database.execute(projects_table.update().where(projects_table.c.project_id == project_id).values(data))
+        await _ensure_repo_unmanaged(data["repo_url"], project_id)
+        values = {**data, "repo_identity": repo_identity(data["repo_url"])}
+    try:
+        await database.execute(
+            projects_table.update().where(projects_table.c.project_id == project_id).values(values)
+        )
+    except Exception as exc:
+        if not is_unique_violation(exc):
+            raise
+        if data.get("repo_url") is not None:
+            await _ensure_repo_unmanaged(data["repo_url"], project_id)
+        raise ProjectConflictError(f"Project {project_id} conflicts with an existing project") from exc
     updated = current.model_copy(update=data)
     return updated
 
 
 async def delete_project(project_id: str) -> None:
     await database.execute(projects_table.delete().where(projects_table.c.project_id == project_id))
+
+
+async def _ensure_repo_unmanaged(repo_url: str, project_id: Optional[str] = None) -> None:
+    existing = await get_project_by_repo(repo_url)
+    if existing is not None and existing.project_id != project_id:
+        raise ProjectConflictError(f"Repository {repo_url} is already managed by project {existing.project_id}")
@@ -0,0 +1,156 @@
+"""Cheap clones of project repositories for onboarding.
+
+Clones are shallow (``PROJECT_CLONE_DEPTH``), partial (``PROJECT_CLONE_FILTER``, blobless by
+default) and, when a Terraform root is given, sparse: only that directory is checked out.
+Objects are borrowed through git alternates from a bare mirror per repository kept under
+``PROJECT_CLONE_CACHE_DIR``, so re-onboarding a repository, or cloning it again for another
+workspace, only downloads what the mirror does not already have.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from git import RemoteProgress, Repo
+
+from app.config import settings
+from app.services.repo_identity import repo_identity
+
+try:  # pragma: no cover - Windows has no fcntl
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str], None]
+
+
+class RepoCloneError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class CloneOptions:
+    branch: str
+    depth: int = 0
+    filter: Optional[str] = None
+    sparse_paths: tuple[str, ...] = ()
+    cache_dir: Optional[Path] = None
+
+    @classmethod
+    def from_settings(cls, branch: str, sparse_paths: tuple[str, ...] = ()) -> "CloneOptions":
+        cache_dir = settings.project_clone_cache_dir
+        return cls(
+            branch=branch,
+            depth=max(0, settings.project_clone_depth),
+            filter=settings.project_clone_filter or None,
+            sparse_paths=sparse_paths,
+            cache_dir=Path(cache_dir).expanduser() if cache_dir else None,
+        )
+
+
+class _Progress(RemoteProgress):
+    """Reports git's progress per stage, at most every ``interval`` seconds."""
+
+    _STAGES = {
+        RemoteProgress.COUNTING: "Counting objects",
+        RemoteProgress.COMPRESSING: "Compressing objects",
+        RemoteProgress.RECEIVING: "Receiving objects",
+        RemoteProgress.RESOLVING: "Resolving deltas",
+        RemoteProgress.CHECKING_OUT: "Checking out files",
+    }
+
+    def __init__(self, label: str, callback: Optional[ProgressCallback], interval: float = 2.0) -> None:
+        super().__init__()
+        self._label = label
+        self._callback = callback
+        self._interval = interval
+        self._last = 0.0
+
+    def update(self, op_code: int, cur_count, max_count=None, message: str = "") -> None:
+        stage = self._STAGES.get(op_code & RemoteProgress.OP_MASK)
+        now = time.monotonic()
+        finished = bool(op_code & RemoteProgress.END)
+        if stage is None or (not finished and now - self._last < self._interval):
+            return
+        self._last = now
+        percent = f" {int(cur_count) * 100 // int(max_count)}%" if max_count else ""
+        text = f"{self._label}: {stage}{percent} ({int(cur_count)}/{int(max_count or 0)}) {message}".strip()
+        logger.info("[CLONE] %s", text)
+        if self._callback is not None:
+            self._callback(text)
+
+
+def clone_repository(
+    url: str, destination: Path, options: CloneOptions, progress: Optional[ProgressCallback] = None
+) -> Repo:
+    """Clone ``url`` into ``destination``; blocking, so call it through ``asyncio.to_thread``."""
+
+    multi_options = [f"--branch={options.branch}", "--single-branch"]
+    if options.depth:
+        multi_options.append(f"--depth={options.depth}")
+    if options.filter:
+        multi_options.append(f"--filter={options.filter}")
+    if options.sparse_paths:
+        multi_options.append("--sparse")
+    mirror = _refresh_mirror(url, options, progress) if options.cache_dir else None
+    if mirror is not None:
+        multi_options.append(f"--reference-if-able={mirror}")
+
+    try:
+        repo = Repo.clone_from(url, destination, progress=_Progress(url, progress), multi_options=multi_options)
+        if options.sparse_paths:
+            repo.git.sparse_checkout("set", *options.sparse_paths)
+    except Exception as exc:
+        raise RepoCloneError(f"Failed to clone repository: {exc}") from exc
+    return repo
+
+
+def _refresh_mirror(url: str, options: CloneOptions, progress: Optional[ProgressCallback]) -> Optional[Path]:
+    """Create or update the bare object mirror for ``url``; ``None`` if it cannot be used.
+
+    Git refuses shallow repositories as alternates, so the mirror keeps full history but,
+    with the clone filter, no blobs: commits and trees are small next to file contents.
+    """
+
+    digest = hashlib.sha256(repo_identity(url).encode()).hexdigest()[:24]
+    mirror = options.cache_dir / f"{digest}.git"
+    options.cache_dir.mkdir(parents=True, exist_ok=True)
+    branch_ref = f"+refs/heads/{options.branch}:refs/heads/{options.branch}"
+    try:
+        with _locked(options.cache_dir / f"{digest}.lock"):
+            if (mirror / "HEAD").exists():
+                Repo(mirror).git.fetch("--prune", "origin", branch_ref)
+            else:
+                filter_option = [f"--filter={options.filter}"] if options.filter else []
+                Repo.clone_from(
+                    url,
+                    mirror,
+                    bare=True,
+                    progress=_Progress(f"{url} (cache)", progress),
+                    multi_options=[f"--branch={options.branch}", "--single-branch", *filter_option],
+                )
+    except Exception as exc:  # noqa: BLE001 - the cache is an optimisation; clone without it
+        logger.warning("[CLONE] Object cache for %s unavailable: %s", url, exc)
+        return None
+    return mirror
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Serialize mirror updates across threads and processes sharing the cache."""
+
+    with path.open("a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
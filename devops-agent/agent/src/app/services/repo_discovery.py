@@ -1,55 +1,216 @@
-"""Repo discovery helpers for onboarding accessible repositories."""
+"""Repo discovery helpers for onboarding accessible repositories.
+
+The repositories visible to ``GITHUB_TOKEN`` are kept in a persisted inventory
+(``github_repos``), refreshed page by page. Every page is requested with the ETag it was
+last served with, so pages GitHub answers with ``304 Not Modified`` are neither re-downloaded
+nor charged against the rate limit. Once the first page's ``Link`` header gives the page
+count, the remaining pages are fetched concurrently.
+"""
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
 import os
-from typing import Any
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional
 
 import httpx
+from sqlalchemy import select
+
+from app.config import settings
+from app.services.database import database, github_repo_pages_table, github_repos_table, projects_table
+from app.services.repo_identity import repo_identity
+
+logger = logging.getLogger(__name__)
+
+PER_PAGE = 100
+_LAST_PAGE = re.compile(r"[?&]page=(\d+)")
+# Fields kept per repository; the inventory does not need GitHub's full payload.
+_REPO_FIELDS = ("id", "name", "full_name", "clone_url", "html_url", "default_branch", "private", "archived")
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Long-lived client for the GitHub API, recreated if the event loop changed."""
+
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=settings.github_api_url,
+            timeout=20,
+            headers={"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"},
+            limits=httpx.Limits(max_connections=max(1, settings.github_discovery_concurrency)),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+
+
+@dataclass
+class _Page:
+    number: int
+    etag: Optional[str]
+    repos: list[dict[str, Any]] = field(default_factory=list)
+    not_modified: bool = False
+    last_page: Optional[int] = None
+
+
+def _last_page(response: httpx.Response) -> Optional[int]:
+    last = response.links.get("last", {}).get("url")
+    match = _LAST_PAGE.search(last or "")
+    return int(match.group(1)) if match else None
+
+
+async def _fetch_page(token: str, number: int, etag: Optional[str]) -> _Page:
+    headers = {"Authorization": f"Bearer {token}"}
+    if etag:
+        headers["If-None-Match"] = etag
+    response = await get_http_client().get(
+        "/user/repos",
+        headers=headers,
+        # A stable order keeps unchanged pages byte-identical, so their ETags keep matching.
+        params={"per_page": PER_PAGE, "page": number, "sort": "full_name"},
+    )
+    if response.status_code == httpx.codes.NOT_MODIFIED:
+        return _Page(number, etag, not_modified=True)
+    response.raise_for_status()
+    repos = [{key: repo.get(key) for key in _REPO_FIELDS} for repo in response.json()]
+    return _Page(number, response.headers.get("ETag"), repos, last_page=_last_page(response))
+
+
+async def _fetch_github_repos(token: str) -> list[_Page]:
+    """Fetch every page conditionally; pages answered with 304 carry no repos."""
+
+    rows = await database.fetch_all(select(github_repo_pages_table))
+    known = {row["page"]: row for row in rows}
 
-from app.services import project_store
-
-
-async def _fetch_github_repos(token: str, per_page: int = 100, max_pages: int = 5) -> list[dict[str, Any]]:
-    url = "https://api.github.com/user/repos"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json",
-    }
-    repos: list[dict[str, Any]] = []
-    async with httpx.AsyncClient(timeout=20) as client:
-        page = 1
-        while page <= max_pages:
-            response = await client.get(
-                url,
-                headers=headers,
-                params={"per_page": per_page, "page": page, "sort": "updated"},
+    def _etag(number: int) -> Optional[str]:
+        row = known.get(number)
+        return row["etag"] if row else None
+
+    first = await _fetch_page(token, 1, _etag(1))
+    if first.not_modified:
+        # 304s carry no Link header; the page count from the last full refresh still applies.
+        last = max(known)
+    else:
+        last = first.last_page or 1
+
+    semaphore = asyncio.Semaphore(max(1, settings.github_discovery_concurrency))
+
+    async def _bounded(number: int) -> _Page:
+        async with semaphore:
+            return await _fetch_page(token, number, _etag(number))
+
+    pages = [first, *await asyncio.gather(*(_bounded(number) for number in range(2, last + 1)))]
+
+    def _count(page: _Page) -> int:
+        return known[page.number]["repo_count"] if page.not_modified else len(page.repos)
+
+    # Repos added since the page count was last learned spill onto pages past it.
+    while _count(pages[-1]) >= PER_PAGE:
+        pages.append(await _fetch_page(token, pages[-1].number + 1, _etag(pages[-1].number + 1)))
+    return pages
+
+
+async def _store_pages(pages: list[_Page]) -> None:
+    changed = [page for page in pages if not page.not_modified]
+    last = pages[-1].number
+    now = datetime.now(timezone.utc)
+    async with database.transaction():
+        for page in changed:
+            ids = [repo["id"] for repo in page.repos]
+            await database.execute(github_repos_table.delete().where(github_repos_table.c.page == page.number))
+            if ids:
+                # A repo that moved here from another page is replaced, not duplicated.
+                await database.execute(github_repos_table.delete().where(github_repos_table.c.repo_id.in_(ids)))
+                await database.execute_many(
+                    github_repos_table.insert(),
+                    [
+                        {
+                            "repo_id": repo["id"],
+                            "full_name": repo.get("full_name") or "",
+                            "repo_identity": repo_identity(repo.get("html_url") or repo.get("clone_url") or ""),
+                            "clone_url": repo.get("clone_url"),
+                            "html_url": repo.get("html_url"),
+                            "page": page.number,
+                            "payload": repo,
+                            "updated_at": now,
+                        }
+                        for repo in page.repos
+                    ],
+                )
+            await database.execute(
+                github_repo_pages_table.delete().where(github_repo_pages_table.c.page == page.number)
             )
-            response.raise_for_status()
-            batch = response.json()
-            if not batch:
-                break
-            repos.extend(batch)
-            page += 1
-    return repos
+            await database.execute(
+                github_repo_pages_table.insert().values(
+                    page=page.number, etag=page.etag, repo_count=len(page.repos), fetched_at=now
+                )
+            )
+        await database.execute(github_repos_table.delete().where(github_repos_table.c.page > last))
+        await database.execute(github_repo_pages_table.delete().where(github_repo_pages_table.c.page > last))
+    logger.info(
+        "[DISCOVERY] Refreshed %d of %d GitHub repo page(s); %d unchanged",
+        len(changed),
+        len(pages),
+        len(pages) - len(changed),
+    )
 
 
-async def discover_github_repos() -> list[dict[str, Any]]:
+def _payload(row: Any) -> dict[str, Any]:
+    return json.loads(row["payload"]) if isinstance(row["payload"], str) else row["payload"]
+
+
+async def list_inventory() -> list[dict[str, Any]]:
+    rows = await database.fetch_all(
+        select(github_repos_table.c.payload).order_by(github_repos_table.c.page, github_repos_table.c.full_name)
+    )
+    return [_payload(row) for row in rows]
+
+
+async def refresh_inventory() -> None:
     token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GIT_TOKEN")
     if not token:
         raise ValueError("GITHUB_TOKEN is required to discover GitHub repositories")
-    return await _fetch_github_repos(token)
+    pages = await _fetch_github_repos(token)
+    if any(not page.not_modified for page in pages):
+        await _store_pages(pages)
+    else:
+        logger.info("[DISCOVERY] All %d GitHub repo page(s) unchanged", len(pages))
+
+
+async def discover_github_repos() -> list[dict[str, Any]]:
+    await refresh_inventory()
+    return await list_inventory()
 
 
 async def get_unmanaged_github_repos() -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
-    repos = await discover_github_repos()
-    existing_urls = {str(url) for url in await project_store.list_project_repo_urls()}
+    """Split the inventory by whether a project manages the repo, in one join on ``repo_identity``."""
+
+    await refresh_inventory()
+    query = (
+        select(github_repos_table.c.payload, projects_table.c.project_id)
+        .select_from(
+            github_repos_table.outerjoin(
+                projects_table, projects_table.c.repo_identity == github_repos_table.c.repo_identity
+            )
+        )
+        .order_by(github_repos_table.c.page, github_repos_table.c.full_name)
+    )
     unmanaged: list[dict[str, Any]] = []
     managed: list[dict[str, Any]] = []
-    for repo in repos:
-        clone_url = repo.get("clone_url")
-        html_url = repo.get("html_url")
-        if clone_url in existing_urls or html_url in existing_urls:
-            managed.append(repo)
-        else:
-            unmanaged.append(repo)
+    for row in await database.fetch_all(query):
+        (unmanaged if row["project_id"] is None else managed).append(_payload(row))
     return unmanaged, managed
@@ -0,0 +1,28 @@
+"""Normalized repository identity used to match repo URLs written in different forms."""
+from __future__ import annotations
+
+import re
+from urllib.parse import urlsplit
+
+# scp-like SSH syntax: git@github.com:acme/infra.git
+_SCP_LIKE = re.compile(r"^(?:[^@/]+@)?(?P<host>[^:/]+):(?P<path>(?!//).+)$")
+
+
+def repo_identity(url: str) -> str:
+    """``host/owner/repo`` in lower case, without scheme, credentials, port, ``.git`` or slashes.
+
+    ``https://github.com/Acme/Infra.git``, ``git@github.com:acme/infra`` and
+    ``ssh://git@github.com/acme/infra.git/`` all map to ``github.com/acme/infra``.
+    """
+
+    url = str(url).strip()
+    match = None if "://" in url else _SCP_LIKE.match(url)
+    if match:
+        host, path = match.group("host"), match.group("path")
+    else:
+        parts = urlsplit(url)
+        host, path = parts.hostname or "", parts.path
+    path = path.strip("/")
+    if path.lower().endswith(".git"):
+        path = path[:-4].rstrip("/")
+    return "/".join(filter(None, (host, path))).lower()
@@ -0,0 +1,70 @@
+"""Background startup work tracked per component so the HTTP server can come up immediately."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from app.models.tooling import ComponentStatus
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTracker:
+    """Runs named startup steps as background tasks and records their state.
+
+    Components that were never scheduled (for example when the app is driven without its
+    lifespan, as in tests) are not tracked and therefore never gate a request.
+    """
+
+    def __init__(self) -> None:
+        self._components: dict[str, ComponentStatus] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def begin(self, name: str, step: Callable[[], Awaitable[None]]) -> asyncio.Task:
+        status = ComponentStatus(name=name, state="running", started_at=datetime.now(timezone.utc))
+        self._components[name] = status
+
+        async def _run() -> None:
+            try:
+                await step()
+            except asyncio.CancelledError:
+                status.state, status.detail = "failed", "cancelled during shutdown"
+                raise
+            except Exception as exc:  # noqa: BLE001 - surfaced through health endpoints
+                logger.exception("Startup component %s failed", name)
+                status.state, status.detail = "failed", f"{type(exc).__name__}: {exc}"
+            else:
+                status.state = "ready"
+                logger.info("Startup component %s ready", name)
+            finally:
+                status.finished_at = datetime.now(timezone.utc)
+
+        task = asyncio.create_task(_run(), name=f"startup-{name}")
+        self._tasks[name] = task
+        return task
+
+    def disable(self, name: str, reason: str) -> None:
+        self._components[name] = ComponentStatus(name=name, state="disabled", detail=reason)
+
+    def status(self, name: str) -> Optional[ComponentStatus]:
+        return self._components.get(name)
+
+    def statuses(self) -> list[ComponentStatus]:
+        return [status.model_copy() for status in self._components.values()]
+
+    async def wait(self, name: str) -> None:
+        task = self._tasks.get(name)
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def stop(self) -> None:
+        pending = [task for task in self._tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks.clear()
+
+
+startup = StartupTracker()
@@ -6,7 +6,8 @@ import shlex
 import shutil
 from pathlib import Path
 
-from app.models.tooling import ToolStatus
+from app.models.tooling import MCPPoolStats, ToolStatus
+from app.services.mcp_pool import mcp_pools
 
 
 def _command_available(command: str) -> bool:
@@ -22,6 +23,19 @@ def _command_available(command: str) -> bool:
     return shutil.which(cmd) is not None
 
 
+def _pool_stats(name: str) -> MCPPoolStats | None:
+    pool = mcp_pools.get(name)
+    return pool.stats() if pool is not None else None
+
+
+def _pool_reason(pool: MCPPoolStats | None) -> str | None:
+    """Explain a started pool with no live process; ``None`` while healthy or not yet started."""
+
+    if pool is None or pool.ready or not pool.restarts:
+        return None
+    return f"No MCP server process ready ({pool.restarts} restarts): {pool.last_error or 'unknown error'}"
+
+
 def list_tool_statuses() -> list[ToolStatus]:
     statuses: list[ToolStatus] = []
 
@@ -33,7 +47,8 @@ def list_tool_statuses() -> list[ToolStatus]:
     # GitHub MCP stdio integration
     if github_mcp_command:
         cmd_ok = _command_available(github_mcp_command)
-        available = bool(github_token and cmd_ok)
+        pool = _pool_stats("github-mcp")
+        available = bool(github_token and cmd_ok) and _pool_reason(pool) is None
         reason = None
         if not available:
             missing_bits = []
@@ -41,6 +56,8 @@ def list_tool_statuses() -> list[ToolStatus]:
                 missing_bits.append("GITHUB_TOKEN unset")
             if not cmd_ok:
                 missing_bits.append("command not found")
+            if _pool_reason(pool):
+                missing_bits.append(_pool_reason(pool))
             reason = ", ".join(missing_bits) or "Unknown issue"
         statuses.append(
             ToolStatus(
@@ -48,6 +65,7 @@ def list_tool_statuses() -> list[ToolStatus]:
                 description="GitHub MCP server (stdio)",
                 available=available,
                 reason=reason,
+                pool=pool,
             )
         )
     else:
@@ -73,12 +91,15 @@ def list_tool_statuses() -> list[ToolStatus]:
     # Terraform MCP (stdio)
     if terraform_mcp_command:
         cmd_ok = _command_available(terraform_mcp_command)
+        pool = _pool_stats("terraform-mcp")
+        pool_reason = _pool_reason(pool)
         statuses.append(
             ToolStatus(
                 name="terraform_mcp",
                 description="Terraform MCP server (stdio)",
-                available=cmd_ok,
-                reason=None if cmd_ok else "Command not found",
+                available=cmd_ok and pool_reason is None,
+                reason=pool_reason if cmd_ok else "Command not found",
+                pool=pool,
             )
         )
     else:
@@ -1,25 +1,56 @@
-"""Download and manage pinned CLI tool binaries."""
+"""Download and manage pinned CLI tool binaries.
+
+Release archives are fetched concurrently into a content-addressed cache shared by every
+install directory on the host (``TOOLS_CACHE_DIR``): ``blobs/<sha256>`` holds verified
+archives, ``checksums/<sha256(url)>`` the release checksum files they were verified
+against, and ``partial/`` keeps interrupted downloads so the next attempt resumes with a
+range request. ``TOOLS_MIRROR_URL`` (for example ``file:///srv/tool-mirror``) replaces the
+release host with a flat directory of the same asset file names.
+
+Every archive is verified: against ``<TOOL>_SHA256`` when set, otherwise against the digest
+pinned in ``PINNED_TOOLS``. The checksum file a project publishes with its release comes
+from the same host as the archive, so it is only consulted with
+``TOOLS_TRUST_CHECKSUM_FILES=true``. A tool with no known digest is not installed.
+"""
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
+import re
 import shutil
 import stat
 import tarfile
 import tempfile
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
-from urllib.request import urlopen
+from typing import Iterator, Literal, Optional
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
 
 try:  # Import lazily so builds/tests without config env still succeed
     from app.config import settings as _settings
 except Exception:  # pragma: no cover - env may not be configured during docker build/tests
     _settings = None
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-unix
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ToolInstallError(RuntimeError):
+    pass
+
 
 ArchiveType = Literal["binary", "zip", "tar.gz"]
 
@@ -34,12 +65,17 @@ class ToolSpec:
     url_env: str
     version_env: str | None = None
     target_name: str | None = None
+    sha256: str | None = None
+    sha256_env: str | None = None
+    # Checksum file published with the pinned release (``<sha256>  <asset>`` lines); opt-in only.
+    checksums_url: str | None = None
 
     @property
     def install_name(self) -> str:
         return self.target_name or self.binary_name
 
 
+# Bumping a version means pinning the new asset's ``sha256`` here from a verified download.
 PINNED_TOOLS: list[ToolSpec] = [
     ToolSpec(
         name="terraform",
@@ -49,6 +85,8 @@ PINNED_TOOLS: list[ToolSpec] = [
         binary_name="terraform",
         url_env="TERRAFORM_DOWNLOAD_URL",
         version_env="TERRAFORM_VERSION",
+        sha256_env="TERRAFORM_SHA256",
+        checksums_url="https://releases.hashicorp.com/terraform/1.9.5/terraform_1.9.5_SHA256SUMS",
     ),
     ToolSpec(
         name="checkov",
@@ -59,6 +97,10 @@ PINNED_TOOLS: list[ToolSpec] = [
         target_name="checkov",
         url_env="CHECKOV_DOWNLOAD_URL",
         version_env="CHECKOV_VERSION",
+        sha256_env="CHECKOV_SHA256",
+        checksums_url=(
+            "https://github.com/bridgecrewio/checkov/releases/download/3.2.494/checkov_linux_X86_64.zip.sha256"
+        ),
     ),
     ToolSpec(
         name="tfsec",
@@ -69,6 +111,8 @@ PINNED_TOOLS: list[ToolSpec] = [
         target_name="tfsec",
         url_env="TFSEC_DOWNLOAD_URL",
         version_env="TFSEC_VERSION",
+        sha256_env="TFSEC_SHA256",
+        checksums_url="https://github.com/aquasecurity/tfsec/releases/download/v1.28.3/tfsec_1.28.3_checksums.txt",
     ),
     ToolSpec(
         name="infracost",
@@ -79,26 +123,36 @@ PINNED_TOOLS: list[ToolSpec] = [
         target_name="infracost",
         url_env="INFRACOST_DOWNLOAD_URL",
         version_env="INFRACOST_VERSION",
+        sha256_env="INFRACOST_SHA256",
+        checksums_url=(
+            "https://github.com/infracost/infracost/releases/download/v0.10.42/infracost-linux-amd64.tar.gz.sha256"
+        ),
     ),
 ]
 
 
-def ensure_tool_binaries(install_dir: str | Path | None = None) -> None:
-    """Ensure pinned tool binaries are present and on PATH."""
+def ensure_tool_binaries(install_dir: str | Path | None = None, *, cache_dir: str | Path | None = None) -> None:
+    """Ensure pinned tool binaries are present and on PATH, downloading missing ones in parallel."""
 
     resolved_dir = _resolve_install_dir(install_dir)
     install_dir = resolved_dir
     install_dir.mkdir(parents=True, exist_ok=True)
-    logger.info("Ensuring CLI tools in %s", install_dir)
+    cache = _resolve_cache_dir(cache_dir)
+    logger.info("Ensuring CLI tools in %s (cache %s)", install_dir, cache)
 
-    for spec in PINNED_TOOLS:
-        _ensure_tool(install_dir, spec)
+    with ThreadPoolExecutor(max_workers=len(PINNED_TOOLS), thread_name_prefix="tool-install") as pool:
+        futures = {spec.name: pool.submit(_ensure_tool, install_dir, cache, spec) for spec in PINNED_TOOLS}
+    failures = {name: future.exception() for name, future in futures.items() if future.exception() is not None}
 
     # prepend install dir to PATH so subprocesses can find binaries
     path_env = os.environ.get("PATH", "")
     if str(install_dir) not in path_env.split(os.pathsep):
         os.environ["PATH"] = f"{install_dir}{os.pathsep}{path_env}"
 
+    if failures:
+        details = "; ".join(f"{name}: {exc}" for name, exc in failures.items())
+        raise ToolInstallError(f"Failed to install {', '.join(failures)}: {details}")
+
 
 def _resolve_install_dir(explicit: str | Path | None = None) -> Path:
     """Determine the installation directory, even when settings/env aren't configured."""
@@ -119,7 +173,21 @@ def _resolve_install_dir(explicit: str | Path | None = None) -> Path:
     return Path(".tools/bin").expanduser()
 
 
-def _ensure_tool(install_dir: Path, spec: ToolSpec) -> None:
+def _resolve_cache_dir(explicit: str | Path | None = None) -> Path:
+    if explicit:
+        return Path(explicit).expanduser()
+    return Path(_option("tools_cache_dir", "TOOLS_CACHE_DIR", "~/.cache/devops-agent/tools")).expanduser()
+
+
+def _option(attr: str, env: str, default):
+    if env in os.environ:
+        return os.environ[env]
+    if _settings is not None:
+        return getattr(_settings, attr, default)
+    return default
+
+
+def _ensure_tool(install_dir: Path, cache: Path, spec: ToolSpec) -> None:
     binary_path = install_dir / spec.install_name
     url = os.environ.get(spec.url_env, spec.url)
     version = os.environ.get(spec.version_env, spec.version) if spec.version_env else spec.version
@@ -131,34 +199,163 @@ def _ensure_tool(install_dir: Path, spec: ToolSpec) -> None:
             logger.info("%s v%s already installed", spec.name, spec.version)
             return
 
-    logger.info("Installing %s v%s", spec.name, version)
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmp_file = Path(tmpdir) / f"{spec.name}.download"
-        _download_file(url, tmp_file)
+    # The pinned digests describe the pinned artifact; overriding the URL or version needs its own digest.
+    pinned = url == spec.url and version == spec.version
+    expected = os.environ.get(spec.sha256_env) if spec.sha256_env else None
+    if expected is None and pinned:
+        expected = spec.sha256
+    mirror = _option("tools_mirror_url", "TOOLS_MIRROR_URL", None)
+    asset = Path(urlsplit(url).path).name
+    if mirror:
+        url = _mirrored(mirror, url)
+    trust_checksum_files = str(_option("tools_trust_checksum_files", "TOOLS_TRUST_CHECKSUM_FILES", False))
+    if expected is None and pinned and spec.checksums_url and trust_checksum_files.lower() in {"1", "true", "yes"}:
+        checksums_url = _mirrored(mirror, spec.checksums_url) if mirror else spec.checksums_url
+        expected = _published_sha256(cache, checksums_url, asset)
+    if expected is None:
+        raise ToolInstallError(
+            f"No pinned SHA256 for {spec.name} v{version}; set {spec.sha256_env} "
+            "(or TOOLS_TRUST_CHECKSUM_FILES=true to use the release checksum file)"
+        )
 
+    logger.info("Installing %s v%s", spec.name, version)
+    archive = _fetch_cached(cache, url, expected.lower())
+    with tempfile.TemporaryDirectory(dir=install_dir) as tmpdir:
+        staged = Path(tmpdir) / spec.install_name
         if spec.archive == "binary":
-            shutil.move(tmp_file, binary_path)
+            shutil.copyfile(archive, staged)
         elif spec.archive == "zip":
-            with zipfile.ZipFile(tmp_file, "r") as zip_ref:
-                zip_ref.extract(spec.binary_name, tmpdir)
-            shutil.move(Path(tmpdir) / spec.binary_name, binary_path)
+            with zipfile.ZipFile(archive, "r") as zip_ref:
+                zip_ref.extract(spec.binary_name, Path(tmpdir) / "extract")
+            shutil.move(Path(tmpdir) / "extract" / spec.binary_name, staged)
         elif spec.archive == "tar.gz":
-            with tarfile.open(tmp_file, "r:gz") as tar_ref:
-                tar_ref.extractall(tmpdir)
-            extracted = _find_binary(Path(tmpdir), spec.binary_name)
+            with tarfile.open(archive, "r:gz") as tar_ref:
+                tar_ref.extractall(Path(tmpdir) / "extract", filter="data")
+            extracted = _find_binary(Path(tmpdir) / "extract", spec.binary_name)
             if extracted is None:
                 raise RuntimeError(f"Unable to locate {spec.binary_name} in tarball for {spec.name}")
-            shutil.move(extracted, binary_path)
+            shutil.move(extracted, staged)
         else:
             raise ValueError(f"Unsupported archive type {spec.archive}")
+        staged.chmod(staged.stat().st_mode | stat.S_IEXEC | stat.S_IXGRP | stat.S_IXOTH)
+        os.replace(staged, binary_path)
 
-    binary_path.chmod(binary_path.stat().st_mode | stat.S_IEXEC | stat.S_IXGRP | stat.S_IXOTH)
     version_marker.write_text(version)
 
 
+def _mirrored(mirror: str, url: str) -> str:
+    return f"{mirror.rstrip('/')}/{Path(urlsplit(url).path).name}"
+
+
+def _published_sha256(cache: Path, checksums_url: str, asset: str) -> str:
+    """SHA256 of ``asset`` from a release checksum file, which is fetched once per host."""
+
+    checksums = cache / "checksums" / hashlib.sha256(checksums_url.encode()).hexdigest()
+    if not checksums.exists():
+        checksums.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=checksums.parent, suffix=".part")
+        os.close(fd)
+        try:
+            _download_file(checksums_url, Path(tmp))
+            os.replace(tmp, checksums)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+    for line in checksums.read_text(encoding="utf-8", errors="replace").splitlines():
+        fields = line.split()
+        # "<sha256>  <name>" lines (sha256sum output); a per-asset file may hold the bare digest.
+        if not fields or not re.fullmatch(r"[0-9a-fA-F]{64}", fields[0]):
+            continue
+        if len(fields) == 1 or Path(fields[-1].lstrip("*")).name == asset:
+            return fields[0].lower()
+    raise ToolInstallError(f"{checksums_url} lists no SHA256 for {asset}")
+
+
+def _fetch_cached(cache: Path, url: str, expected_sha256: str) -> Path:
+    """Return the verified archive for ``url``, downloading it once per host."""
+
+    url_key = hashlib.sha256(url.encode()).hexdigest()
+    for directory in ("blobs", "partial", "locks"):
+        (cache / directory).mkdir(parents=True, exist_ok=True)
+
+    with _locked(cache / "locks" / f"{url_key}.lock"):
+        blob = cache / "blobs" / expected_sha256
+        if blob.exists():
+            logger.info("Using cached %s", url)
+            return blob
+
+        partial = cache / "partial" / url_key
+        _download_file(url, partial)
+        actual = _sha256_of(partial)
+        if actual != expected_sha256:
+            partial.unlink()
+            raise ToolInstallError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {actual}")
+        os.replace(partial, blob)
+        return blob
+
+
 def _download_file(url: str, destination: Path) -> None:
-    with urlopen(url) as resp, destination.open("wb") as sink:  # nosec - trusted release URLs
-        shutil.copyfileobj(resp, sink)
+    """Stream ``url`` into ``destination``, resuming a partial file and retrying transient failures."""
+
+    retries = int(_option("tools_download_retries", "TOOLS_DOWNLOAD_RETRIES", 3))
+    for attempt in range(retries + 1):
+        try:
+            _download_once(url, destination)
+            return
+        except HTTPError as exc:
+            if exc.code < 500 or attempt == retries:
+                raise
+            error: Exception = exc
+        except (URLError, OSError, ToolInstallError) as exc:
+            if attempt == retries:
+                raise
+            error = exc
+        delay = 2**attempt
+        logger.warning("Download of %s failed (%s); retrying in %ss", url, error, delay)
+        time.sleep(delay)
+
+
+def _download_once(url: str, destination: Path) -> None:
+    offset = destination.stat().st_size if destination.exists() else 0
+    request = Request(url, headers={"Range": f"bytes={offset}-"} if offset else {})
+    try:
+        resp = urlopen(request)  # nosec - trusted release URLs or a configured mirror
+    except HTTPError as exc:
+        if exc.code != 416:  # our partial file is already complete (or stale); start over
+            raise
+        destination.unlink()
+        offset = 0
+        resp = urlopen(Request(url))  # nosec - see above
+    with resp:
+        resumed = offset > 0 and getattr(resp, "status", None) == 206
+        length = resp.headers.get("Content-Length")
+        expected_size = (offset if resumed else 0) + int(length) if length else None
+        with destination.open("ab" if resumed else "wb") as sink:
+            shutil.copyfileobj(resp, sink, _CHUNK_SIZE)
+    if expected_size is not None and destination.stat().st_size != expected_size:
+        raise ToolInstallError(f"Incomplete download of {url}: {destination.stat().st_size}/{expected_size} bytes")
+
+
+def _sha256_of(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Serialize downloads of one URL across threads and processes sharing the cache."""
+
+    with path.open("a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
 
 
 def _find_binary(root: Path, name: str) -> Path | None:
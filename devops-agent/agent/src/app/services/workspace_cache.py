@@ -0,0 +1,403 @@
+"""Prepared Terraform working directories, reused across plans of the same commit.
+
+A snapshot is a repository checked out at one commit, with ``terraform init`` already run in
+its Terraform root; it is built once per (repository, commit, Terraform root, backend
+config) under ``TF_WORKSPACE_CACHE_DIR``. Plans never run in a snapshot: each gets its own
+clone, in which provider binaries are hard-linked and every other file is reflinked where the
+filesystem supports it (copied otherwise). Clones outlive their plan so the saved plan can be
+applied from them. Snapshots and clones share a disk quota, ``TF_WORKSPACE_CACHE_MAX_GB``;
+past it, the least recently used entries that are not in use, and whose clones hold no plan
+still kept by the plan store, are removed.
+
+Only commits are reproducible: state kept on local disk is gitignored and never reaches a
+snapshot, so workspaces without a remote backend are planned in place instead.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Callable, Iterator, Mapping, Optional
+
+from app.config import settings
+from app.services.plan_store import plan_store
+
+try:  # pragma: no cover - Windows has no fcntl
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_FICLONE = 0x40049409  # Linux ioctl: share the source's extents (btrfs, XFS, bcachefs)
+
+InitCallback = Callable[[Path], None]
+_BACKEND = re.compile(r'^\s*(?:backend\s+"(?P<backend>[^"]+)"|cloud)\s*\{', re.M)
+
+
+class WorkspaceCacheError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class WorkspaceSource:
+    repo_path: Path
+    commit: str
+    terraform_root: str = "."
+
+
+def resolve_source(workspace_dir: str | Path, revision: Optional[str] = None) -> Optional[WorkspaceSource]:
+    """Where ``workspace_dir`` comes from, at ``revision`` (default the checkout's ``HEAD``).
+
+    Returns ``None`` when the directory cannot be reproduced from a commit, i.e. it is not in
+    a git checkout, or no revision was asked for and the Terraform root has local changes;
+    such workspaces are planned in place.
+    """
+
+    workspace = Path(workspace_dir).resolve()
+    top = _git(workspace, "rev-parse", "--show-toplevel", check=False)
+    if top is None:
+        if revision:
+            raise WorkspaceCacheError(f"{workspace} is not in a git checkout; cannot plan revision {revision}")
+        return None
+    repo_path = Path(top.strip())
+    root = workspace.relative_to(repo_path).as_posix()
+    if revision is None and _git(repo_path, "status", "--porcelain", "--", root).strip():
+        return None
+    commit = _git(repo_path, "rev-parse", "--verify", "--quiet", f"{revision or 'HEAD'}^{{commit}}", check=False)
+    if commit is None:
+        raise WorkspaceCacheError(f"Unknown revision {revision or 'HEAD'} in {repo_path}")
+    return WorkspaceSource(repo_path, commit.strip(), root)
+
+
+def uses_local_state(workspace_dir: str | Path) -> bool:
+    """Whether Terraform in ``workspace_dir`` keeps its state on local disk.
+
+    True when state files are present, or no backend other than ``local`` is configured in the
+    directory's ``.tf`` files (a ``cloud`` block counts as remote).
+    """
+
+    workspace = Path(workspace_dir)
+    if (workspace / "terraform.tfstate").exists() or (workspace / "terraform.tfstate.d").exists():
+        return True
+    for path in workspace.glob("*.tf"):
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        if any(match.group("backend") != "local" for match in _BACKEND.finditer(text)):
+            return False
+    return True
+
+
+class WorkspaceCache:
+    def __init__(self, root: Optional[str | Path] = None, *, max_bytes: Optional[int] = None) -> None:
+        self._root = root
+        self._max_bytes = max_bytes
+        self._guard = threading.Lock()
+        self._build_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._pins: Counter[Path] = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._root or settings.tf_workspace_cache_dir)
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.tf_workspace_cache_dir).expanduser().resolve()
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return int(settings.tf_workspace_cache_max_gb * 1024**3)
+
+    def acquire(
+        self,
+        source: WorkspaceSource,
+        backend_config: Mapping[str, str],
+        init: InitCallback,
+        *,
+        variant: str = "plan",
+    ) -> Path:
+        """Return a fresh clone of the prepared snapshot for ``source``, pinned until ``release``.
+
+        ``init`` runs once per snapshot, in its Terraform root; snapshots initialized in
+        different ways for different purposes are kept apart by ``variant``. Blocking; run it
+        in a thread.
+        """
+
+        key = _snapshot_key(source, backend_config, variant)
+        snapshot = self.root / "snapshots" / key
+        with self._build_locks_for(key):
+            self._pin(snapshot)
+            try:
+                if not snapshot.is_dir():
+                    self._build(snapshot, source, init)
+                _write_marker(snapshot, {"source": _describe(source)})
+                clone = self.root / "clones" / uuid.uuid4().hex
+                _clone_tree(snapshot, clone)
+            finally:
+                self._unpin(snapshot)
+        self._pin(clone)
+        _write_marker(clone, {"snapshot": key, "source": _describe(source)})
+        try:
+            self.evict()
+        except OSError as exc:  # pragma: no cover - eviction is best effort
+            logger.warning("[WORKSPACE] Cache eviction failed: %s", exc)
+        return clone / source.terraform_root
+
+    def release(self, workspace: str | Path) -> None:
+        clone = self.clone_of(workspace)
+        if clone is not None:
+            self._unpin(clone)
+
+    def discard(self, workspace: str | Path) -> None:
+        """Release the clone holding ``workspace`` and delete it; for clones nothing reads later."""
+
+        clone = self.clone_of(workspace)
+        if clone is None:
+            return
+        self._unpin(clone)
+        _marker(clone).unlink(missing_ok=True)
+        shutil.rmtree(clone, ignore_errors=True)
+
+    @contextmanager
+    def pinned(self, workspace: str | Path) -> Iterator[Optional[Path]]:
+        """Keep the clone holding ``workspace`` (if it is one) from eviction; yields the clone."""
+
+        clone = self.clone_of(workspace)
+        if clone is None:
+            yield None
+            return
+        self._pin(clone)
+        try:
+            _touch(clone)
+            yield clone
+        finally:
+            self._unpin(clone)
+
+    def clone_of(self, path: str | Path) -> Optional[Path]:
+        """The cache clone containing ``path``, or ``None`` for paths outside the cache."""
+
+        if not self.enabled:
+            return None
+        clones = self.root / "clones"
+        try:
+            relative = Path(path).resolve().relative_to(clones)
+        except ValueError:
+            return None
+        return clones / relative.parts[0] if relative.parts else None
+
+    def evict(self) -> list[Path]:
+        """Remove least recently used entries until the cache fits its quota.
+
+        Clones holding a plan the plan store still keeps are left alone, so it can be applied.
+        """
+
+        retained = {self.clone_of(path) for path in plan_store.workspaces_in_use()}
+        entries = []
+        for marker in self.root.glob("*/*.json"):
+            path = marker.parent / marker.name.removesuffix(".json")
+            try:
+                last_used = json.loads(marker.read_text(encoding="utf-8"))["last_used"]
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((last_used, path, _disk_usage(path)))
+        total = sum(size for _, _, size in entries)
+        removed: list[Path] = []
+        for _, path, size in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            with self._guard:
+                if self._pins[path] or path in retained:
+                    continue
+                # Renamed under the guard so no new pin can land on a half-deleted entry.
+                doomed = path.with_name(f".{path.name}.evicted-{uuid.uuid4().hex[:8]}")
+                try:
+                    path.rename(doomed)
+                except FileNotFoundError:
+                    continue
+                _marker(path).unlink(missing_ok=True)
+            shutil.rmtree(doomed, ignore_errors=True)
+            total -= size
+            removed.append(path)
+        if removed:
+            logger.info("[WORKSPACE] Evicted %d cached workspace(s)", len(removed))
+        return removed
+
+    def _build(self, snapshot: Path, source: WorkspaceSource, init: InitCallback) -> None:
+        staging = snapshot.with_name(f".{snapshot.name}.building-{uuid.uuid4().hex[:8]}")
+        started = time.monotonic()
+        try:
+            _checkout(source, staging)
+            workspace = staging / source.terraform_root
+            if not workspace.is_dir():
+                raise WorkspaceCacheError(f"{source.terraform_root} does not exist at {source.commit[:12]}")
+            init(workspace)
+            staging.rename(snapshot)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info(
+            "[WORKSPACE] Prepared %s@%s:%s in %.1fs",
+            source.repo_path.name,
+            source.commit[:12],
+            source.terraform_root,
+            time.monotonic() - started,
+        )
+
+    def _build_locks_for(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._build_locks[key]
+
+    def _pin(self, path: Path) -> None:
+        with self._guard:
+            self._pins[path] += 1
+
+    def _unpin(self, path: Path) -> None:
+        with self._guard:
+            self._pins[path] -= 1
+            if self._pins[path] <= 0:
+                del self._pins[path]
+
+
+def _snapshot_key(source: WorkspaceSource, backend_config: Mapping[str, str], variant: str) -> str:
+    backend = json.dumps(dict(backend_config), sort_keys=True)
+    parts = [variant, str(source.repo_path), source.commit, source.terraform_root, backend]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:24]
+
+
+def _describe(source: WorkspaceSource) -> dict[str, str]:
+    return {"repo_path": str(source.repo_path), "commit": source.commit, "terraform_root": source.terraform_root}
+
+
+def _checkout(source: WorkspaceSource, destination: Path) -> None:
+    """Write the tree of ``source.commit`` to ``destination`` without touching the checkout.
+
+    A sparse (cone mode) clone only gets the directories it has checked out, so a blobless
+    clone does not fetch the rest of the repository.
+    """
+
+    destination.mkdir(parents=True)
+    index = destination.parent / f"{destination.name}.index"
+    env = {**os.environ, "GIT_INDEX_FILE": str(index)}
+    try:
+        _git(source.repo_path, "read-tree", source.commit, env=env)
+        files = _git(source.repo_path, "ls-files", "-z", env=env).split("\0")
+        cone = _sparse_cone(source.repo_path)
+        if cone is not None:
+            files = [path for path in files if _in_cone(path, cone)]
+        _git(
+            source.repo_path,
+            "checkout-index",
+            "-f",
+            "-z",
+            "--stdin",
+            f"--prefix={destination}/",
+            env=env,
+            input="\0".join(filter(None, files)),
+        )
+    finally:
+        index.unlink(missing_ok=True)
+
+
+def _sparse_cone(repo_path: Path) -> Optional[list[PurePosixPath]]:
+    if _git(repo_path, "config", "--bool", "core.sparseCheckoutCone", check=False) != "true\n":
+        return None
+    if _git(repo_path, "config", "--bool", "core.sparseCheckout", check=False) != "true\n":
+        return None
+    return [PurePosixPath(line) for line in _git(repo_path, "sparse-checkout", "list").splitlines() if line]
+
+
+def _in_cone(path: str, cone: list[PurePosixPath]) -> bool:
+    posix = PurePosixPath(path)
+    # Cone mode always includes files at the top level and directly inside each parent.
+    if len(posix.parts) == 1 or any(posix.is_relative_to(directory) for directory in cone):
+        return True
+    return any(directory.is_relative_to(posix.parent) for directory in cone)
+
+
+def _clone_tree(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(source, destination, symlinks=True, copy_function=_clone_file)
+
+
+def _clone_file(src: str, dst: str) -> None:
+    # Providers are large, immutable once installed, and never written by a plan.
+    if f"{os.sep}.terraform{os.sep}providers{os.sep}" in src:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as source, open(dst, "wb") as target:
+                fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _disk_usage(path: Path) -> int:
+    """Bytes used under ``path``; hard-linked files are split evenly between their links."""
+
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                info = os.lstat(os.path.join(directory, name))
+            except OSError:
+                continue
+            total += info.st_size // max(1, info.st_nlink)
+    return total
+
+
+def _marker(path: Path) -> Path:
+    return path.parent / f"{path.name}.json"
+
+
+def _write_marker(path: Path, record: dict) -> None:
+    _marker(path).write_text(json.dumps({**record, "last_used": time.time()}), encoding="utf-8")
+
+
+def _touch(path: Path) -> None:
+    try:
+        record = json.loads(_marker(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    _write_marker(path, record)
+
+
+def _git(
+    repo_path: Path,
+    *args: str,
+    env: Optional[dict[str, str]] = None,
+    input: Optional[str] = None,
+    check: bool = True,
+) -> Optional[str]:
+    proc = subprocess.run(
+        ["git", "-C", str(repo_path), *args], env=env, input=input, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        if not check:
+            return None
+        raise WorkspaceCacheError(f"git {args[0]} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+workspace_cache = WorkspaceCache()
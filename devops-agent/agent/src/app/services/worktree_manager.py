@@ -0,0 +1,161 @@
+"""One ``git worktree`` per ticket off a shared clone.
+
+GitOps work for a ticket happens in its own worktree under ``GITOPS_WORKTREE_DIR``, so
+tickets never switch branches or share an index in the clone at ``GITOPS_REPO_PATH``; all
+worktrees share that clone's object store. Each worktree's last use is recorded next to it,
+and worktrees idle for longer than ``GITOPS_WORKTREE_TTL_HOURS`` are removed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import shutil
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from git import GitCommandError, Repo
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class WorktreeError(RuntimeError):
+    pass
+
+
+class WorktreeManager:
+    def __init__(self, root: Optional[str | Path] = None, *, gc_interval: float = 600.0) -> None:
+        self._root = root
+        self._gc_interval = gc_interval
+        self._last_gc = 0.0
+        self._guard = threading.Lock()
+        self._repo_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._ticket_locks: dict[Path, threading.Lock] = defaultdict(threading.Lock)
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.gitops_worktree_dir).expanduser()
+
+    def path_for(self, repo_path: str | Path, ticket_id: str) -> Path:
+        repo_path = Path(repo_path).resolve()
+        digest = hashlib.sha256(str(repo_path).encode()).hexdigest()[:12]
+        return self.root / f"{repo_path.name}-{digest}" / (_UNSAFE.sub("-", ticket_id).strip("-.") or "ticket")
+
+    @contextmanager
+    def checkout(self, repo_path: str | Path, ticket_id: str, branch: str, base_branch: str) -> Iterator[Repo]:
+        """Yield the ticket's worktree with ``branch`` reset to ``base_branch``.
+
+        Calls for the same ticket are serialized; different tickets proceed in parallel.
+        """
+
+        self.collect_garbage_if_due()
+        path = self.path_for(repo_path, ticket_id)
+        with self._ticket_lock(path):
+            repo = self._ensure(Path(repo_path), path, branch, base_branch)
+            try:
+                yield repo
+            finally:
+                self._touch(path, repo_path, ticket_id)
+
+    def remove(self, repo_path: str | Path, ticket_id: str) -> bool:
+        path = self.path_for(repo_path, ticket_id)
+        with self._ticket_lock(path):
+            return self._remove(Path(repo_path), path)
+
+    def collect_garbage_if_due(self) -> None:
+        with self._guard:
+            due = time.monotonic() - self._last_gc >= self._gc_interval
+            if due:
+                self._last_gc = time.monotonic()
+        if due:
+            self.collect_garbage()
+
+    def collect_garbage(self, max_age_seconds: Optional[float] = None) -> list[Path]:
+        """Remove worktrees idle for longer than ``max_age_seconds`` (default from settings)."""
+
+        max_age = settings.gitops_worktree_ttl_hours * 3600 if max_age_seconds is None else max_age_seconds
+        removed: list[Path] = []
+        now = time.time()
+        for marker in self.root.glob("*/*.json"):
+            path = marker.parent / marker.name.removesuffix(".json")
+            try:
+                record = json.loads(marker.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if now - record.get("last_used", 0) < max_age:
+                continue
+            lock = self._ticket_lock(path)
+            if not lock.acquire(blocking=False):
+                continue  # in use right now, so not stale
+            try:
+                if self._remove(Path(record["repo_path"]), path):
+                    removed.append(path)
+            finally:
+                lock.release()
+        if removed:
+            logger.info("[GITOPS] Removed %d stale worktree(s)", len(removed))
+        return removed
+
+    def _ticket_lock(self, path: Path) -> threading.Lock:
+        with self._guard:
+            return self._ticket_locks[path]
+
+    def _repo_lock(self, repo_path: Path) -> threading.Lock:
+        with self._guard:
+            return self._repo_locks[str(repo_path.resolve())]
+
+    def _ensure(self, repo_path: Path, path: Path, branch: str, base_branch: str) -> Repo:
+        if not (repo_path / ".git").exists():
+            raise WorktreeError(f"Repo path {repo_path} is not a git clone")
+        if (path / ".git").is_file():
+            repo = Repo(path)
+            if repo.is_dirty(untracked_files=True):
+                # Only this ticket uses the worktree; whatever an earlier failed run left is discarded.
+                logger.warning("[GITOPS] Discarding leftover changes in worktree %s", path)
+                repo.git.reset("--hard")
+                repo.git.clean("-fd")
+            repo.git.checkout("-B", branch, base_branch)
+            return repo
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Adding and pruning worktrees edits the shared clone's metadata; one at a time per clone.
+        with self._repo_lock(repo_path):
+            shared = Repo(repo_path)
+            shared.git.worktree("prune")
+            try:
+                shared.git.worktree("add", "-B", branch, str(path), base_branch)
+            except GitCommandError as exc:
+                raise WorktreeError(f"Could not create worktree for {branch}: {exc.stderr or exc}") from exc
+        return Repo(path)
+
+    def _remove(self, repo_path: Path, path: Path) -> bool:
+        with self._repo_lock(repo_path):
+            try:
+                Repo(repo_path).git.worktree("remove", "--force", str(path))
+            except Exception as exc:  # noqa: BLE001 - clone gone or worktree already unregistered
+                logger.debug("[GITOPS] git worktree remove %s failed: %s", path, exc)
+                shutil.rmtree(path, ignore_errors=True)
+                if (repo_path / ".git").exists():
+                    Repo(repo_path).git.worktree("prune")
+        _marker(path).unlink(missing_ok=True)
+        return not path.exists()
+
+    @staticmethod
+    def _touch(path: Path, repo_path: str | Path, ticket_id: str) -> None:
+        record = {"repo_path": str(Path(repo_path).resolve()), "ticket_id": ticket_id, "last_used": time.time()}
+        _marker(path).write_text(json.dumps(record), encoding="utf-8")
+
+
+def _marker(path: Path) -> Path:
+    return path.parent / f"{path.name}.json"
+
+
+worktree_manager = WorktreeManager()
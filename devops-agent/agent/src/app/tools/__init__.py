@@ -19,6 +19,7 @@ from .terraform_cli_tool import (
     run_terraform_apply,
     run_terraform_plan,
 )
+from .terraform_validate_tool import ValidationDiagnostic, ValidationReport, validate_terraform_changes
 
 __all__ = [
     "NamingRequest",
@@ -54,4 +55,7 @@ __all__ = [
     "run_terraform_apply",
     "DriftRequest",
     "run_drift_check",
+    "ValidationDiagnostic",
+    "ValidationReport",
+    "validate_terraform_changes",
 ]
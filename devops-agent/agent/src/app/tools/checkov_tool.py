@@ -1,79 +1,347 @@
 """Security scanning tool wrappers."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
-import subprocess
+import os
+import tempfile
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
 
+from app.config import settings
 from app.models import SecurityIssue, SecurityReport
+from app.services.checkov_worker import CheckovWorkerError, checkov_worker
+from app.services.plan_json import dump_plan, is_changed, load_plan, plan_json_path_for, scope_plan
 
 logger = logging.getLogger(__name__)
 
+_SCANNED_SUFFIXES = (".tf", ".tf.json", ".tfvars")
+_SCANNERS = ("checkov", "tfsec")
+_SEVERITY_RANK = {"info": 0, "low": 1, "medium": 2, "high": 3, "critical": 4}
+
+# tfsec rule ids that check the same control as a checkov policy, so findings from both
+# scanners on one resource collapse into a single issue.
+_CONTROL_ALIASES = {
+    "azure-storage-enforce-https": "CKV_AZURE_3",
+    "azure-storage-default-action-deny": "CKV_AZURE_35",
+    "azure-storage-use-secure-tls-policy": "CKV_AZURE_44",
+    "azure-keyvault-no-purge": "CKV_AZURE_42",
+    "azure-keyvault-specify-network-acl": "CKV_AZURE_109",
+    "azure-container-logging": "CKV_AZURE_4",
+    "azure-container-use-rbac-permissions": "CKV_AZURE_5",
+    "azure-appservice-enforce-https": "CKV_AZURE_14",
+}
+
 
 class SecurityScanRequest(BaseModel):
     ticket_id: str
     plan_id: str
     directory: str
-    tool: str = Field(default="checkov", description="Security scanning tool (checkov|tfsec)")
+    tool: str = Field(
+        default="checkov",
+        description="Security scanning tool (checkov|tfsec), or 'all' to run both concurrently",
+    )
+    plan_json_path: Optional[str] = Field(
+        default=None,
+        description="PlanArtifact.plan_json_path from run_terraform_plan; scans only the resources the plan changes",
+    )
 
 
 class SecurityScanError(RuntimeError):
     pass
 
 
-def run_security_scan(
+class ScanCache:
+    """Content-addressed store of per-module findings.
+
+    A module is a directory holding Terraform files; its key hashes the scanner, the
+    scanner version and the relative path and contents of each of those files, so an
+    edited module misses the cache while untouched modules keep their findings.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.security_scan_cache_dir).expanduser()
+
+    def get(self, key: str) -> Optional[list[SecurityIssue]]:
+        try:
+            payload = json.loads((self.root / f"{key}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return [SecurityIssue.model_validate(item) for item in payload]
+
+    def put(self, key: str, issues: list[SecurityIssue]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump([issue.model_dump(mode="json") for issue in issues], handle)
+        os.replace(tmp, self.root / f"{key}.json")
+
+
+scan_cache = ScanCache()
+_scanner_versions: dict[str, Optional[str]] = {}
+
+
+async def run_security_scan(
     request: Annotated[SecurityScanRequest, Field(description="Trigger infrastructure security scan")]
 ) -> SecurityReport:
-    """Run Checkov/tfsec against the Terraform directory."""
+    """Run Checkov and/or tfsec against the Terraform directory, rescanning only modules that changed."""
 
+    if request.tool not in (*_SCANNERS, "all"):
+        raise SecurityScanError(f"Unsupported security scanner {request.tool}")
+    if request.plan_json_path:
+        return await _run_plan_scan(request)
     directory = Path(request.directory)
     if not directory.exists():
         raise SecurityScanError(f"Directory {directory} does not exist")
 
-    if request.tool == "tfsec":
-        cmd = ["tfsec", directory.as_posix(), "--format", "json"]
-    else:
-        cmd = ["checkov", "-d", directory.as_posix(), "-o", "json"]
+    tools = _SCANNERS if request.tool == "all" else (request.tool,)
+    modules = await asyncio.to_thread(_discover_modules, directory)
+    logger.info("[SEC] Running %s for ticket %s", ", ".join(tools), request.ticket_id)
+    results = await asyncio.gather(*(_timed_scan(tool, directory, modules) for tool in tools))
+    # Resource addresses are module-relative, so only merge findings within the same module.
+    issues = [
+        issue
+        for module in modules
+        for issue in _dedupe_issues([issue for scanned, _ in results for issue in scanned.get(module, [])])
+    ]
+    return SecurityReport(
+        ticket_id=request.ticket_id,
+        plan_id=request.plan_id,
+        tool=request.tool,
+        timestamp_utc=datetime.now(timezone.utc),
+        issues=issues,
+        scanner_durations={tool: round(elapsed, 3) for tool, (_, elapsed) in zip(tools, results)},
+    )
 
-    logger.info("[SEC] Running %s for ticket %s", request.tool, request.ticket_id)
-    try:
-        proc = subprocess.run(cmd, check=True, capture_output=True, text=True)
-    except FileNotFoundError as exc:
-        logger.warning("%s not found, returning empty report", request.tool)
-        return SecurityReport(
-            ticket_id=request.ticket_id,
-            plan_id=request.plan_id,
-            tool=request.tool,
-            timestamp_utc=datetime.now(timezone.utc),
-            issues=[],
-        )
-    except subprocess.CalledProcessError as exc:
-        raise SecurityScanError(exc.stderr or exc.stdout or "Security scan failed") from exc
 
-    try:
-        payload = json.loads(proc.stdout or "{}")
-    except json.JSONDecodeError as exc:
-        logger.warning("[SEC] Unable to parse %s output: %s", request.tool, exc)
-        payload = {}
-    issues = _parse_security_payload(payload, request.tool)
+async def _run_plan_scan(request: SecurityScanRequest) -> SecurityReport:
+    """Scan only the changed resources of an existing ``terraform show -json`` plan with checkov.
+
+    tfsec has no plan input, so ``all`` runs checkov alone in this mode.
+    """
+
+    if request.tool == "tfsec":
+        raise SecurityScanError("tfsec cannot scan plan JSON; omit plan_json_path to scan the directory")
+    plan_path = plan_json_path_for(request.plan_json_path)
+    if not plan_path.exists():
+        raise SecurityScanError(f"Plan JSON {plan_path} does not exist")
+
+    started = time.perf_counter()
+    plan = await asyncio.to_thread(load_plan, plan_path)
+    changed = [change["address"] for change in plan.get("resource_changes") or [] if is_changed(change)]
+    scoped = scope_plan(plan, changed)
+    version = await _scanner_version("checkov")
+    issues: list[SecurityIssue] = []
+    if version is None:
+        logger.warning("checkov not found, returning empty report")
+    elif scoped["resource_changes"]:
+        key = hashlib.sha256(f"checkov\0{version}\0plan\0".encode() + dump_plan(scoped)).hexdigest()
+        cached = scan_cache.get(key)
+        if cached is None:
+            cached = await _scan_plan(scoped)
+            scan_cache.put(key, cached)
+        issues = _dedupe_issues(cached)
+    logger.info(
+        "[SEC] checkov scanned %d changed resource(s) from %s for ticket %s",
+        len(scoped["resource_changes"]),
+        plan_path.name,
+        request.ticket_id,
+    )
     return SecurityReport(
         ticket_id=request.ticket_id,
         plan_id=request.plan_id,
-        tool=request.tool,
+        tool="checkov",
         timestamp_utc=datetime.now(timezone.utc),
         issues=issues,
+        scanner_durations={"checkov": round(time.perf_counter() - started, 3)},
     )
 
 
+async def _scan_plan(scoped: dict) -> list[SecurityIssue]:
+    fd, tmp = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(dump_plan(scoped))
+        output = await _run_scanner(
+            ["checkov", "--framework", "terraform_plan", "-f", tmp, "-o", "json", "--soft-fail"]
+        )
+    finally:
+        os.unlink(tmp)
+    return _parse_security_payload(_load_payload(output, "checkov"), "checkov")
+
+
+async def _timed_scan(
+    tool: str, directory: Path, modules: dict[Path, list[Path]]
+) -> tuple[dict[Path, list[SecurityIssue]], float]:
+    started = time.perf_counter()
+    issues = await _scan_with_cache(tool, directory, modules)
+    return issues, time.perf_counter() - started
+
+
+async def _scan_with_cache(
+    tool: str, directory: Path, modules: dict[Path, list[Path]]
+) -> dict[Path, list[SecurityIssue]]:
+    version = await _scanner_version(tool)
+    if version is None:
+        logger.warning("%s not found, returning empty report", tool)
+        return {}
+    issues: dict[Path, list[SecurityIssue]] = {}
+    keys: dict[Path, str] = {}
+    for module, files in modules.items():
+        keys[module] = await asyncio.to_thread(_module_key, tool, version, directory, module, files)
+        cached = scan_cache.get(keys[module])
+        if cached is not None:
+            issues[module] = cached
+    missing = {module: files for module, files in modules.items() if module not in issues}
+    if missing:
+        scanned = await (_scan_checkov_modules(missing) if tool == "checkov" else _scan_tfsec_modules(missing))
+        for module in missing:
+            issues[module] = scanned[module]
+            scan_cache.put(keys[module], scanned[module])
+    logger.info("[SEC] %s rescanned %d of %d module(s)", tool, len(missing), len(modules))
+    return issues
+
+
+async def _scan_checkov_modules(modules: dict[Path, list[Path]]) -> dict[Path, list[SecurityIssue]]:
+    """Scan every module in one checkov run and split its findings by the module of their file."""
+
+    cmd = ["checkov", "--framework", "terraform", "-o", "json", "--soft-fail"]
+    owner: dict[Path, Path] = {}
+    for module, files in modules.items():
+        for path in files:
+            cmd.extend(["-f", path.as_posix()])
+            owner[path.resolve()] = module
+    payload = _load_payload(await _run_scanner(cmd), "checkov")
+    failed: dict[Path, list[dict]] = {module: [] for module in modules}
+    for finding in payload.get("results", {}).get("failed_checks", []):
+        module = owner.get(Path(finding.get("file_abs_path") or finding.get("file_path") or "").resolve())
+        if module is None:
+            logger.debug("[SEC] Dropping checkov finding outside the scanned files: %s", finding.get("file_path"))
+            continue
+        failed[module].append(finding)
+    return {
+        module: _parse_security_payload({"results": {"failed_checks": findings}}, "checkov")
+        for module, findings in failed.items()
+    }
+
+
+async def _scan_tfsec_modules(modules: dict[Path, list[Path]]) -> dict[Path, list[SecurityIssue]]:
+    """tfsec takes a directory, not files, so modules are scanned concurrently, a few at a time."""
+
+    semaphore = asyncio.Semaphore(max(1, settings.security_scan_concurrency))
+
+    async def _scan(module: Path, files: list[Path]) -> list[SecurityIssue]:
+        async with semaphore:
+            return await _scan_tfsec_module(module, files)
+
+    results = await asyncio.gather(*(_scan(module, files) for module, files in modules.items()))
+    return dict(zip(modules, results))
+
+
+async def _run_scanner(cmd: list[str]) -> str:
+    if cmd[0] == "checkov" and checkov_worker.available():
+        try:
+            exit_code, stdout = await checkov_worker.run(cmd[1:])
+        except CheckovWorkerError as exc:
+            logger.warning("[SEC] checkov worker failed (%s); falling back to one-shot run", exc)
+        else:
+            if exit_code != 0:
+                raise SecurityScanError(stdout or "Security scan failed")
+            return stdout
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise SecurityScanError(stderr.decode() or stdout.decode() or "Security scan failed")
+    return stdout.decode()
+
+
+async def _scanner_version(tool: str) -> Optional[str]:
+    """Return the scanner's version string, or None when the binary is missing."""
+
+    if tool not in _scanner_versions:
+        try:
+            _scanner_versions[tool] = (await _run_scanner([tool, "--version"])).strip()
+        except FileNotFoundError:
+            return None
+    return _scanner_versions[tool]
+
+
+def _discover_modules(directory: Path) -> dict[Path, list[Path]]:
+    """Group Terraform files by the directory that directly contains them, skipping hidden dirs."""
+
+    modules: dict[Path, list[Path]] = {}
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        files = sorted(Path(root) / name for name in filenames if name.endswith(_SCANNED_SUFFIXES))
+        if files:
+            modules[Path(root)] = files
+    return modules
+
+
+def _module_key(tool: str, version: str, directory: Path, module: Path, files: list[Path]) -> str:
+    digest = hashlib.sha256(f"{tool}\0{version}\0{module.relative_to(directory).as_posix()}\0".encode())
+    for path in files:
+        digest.update(path.name.encode() + b"\0")
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+async def _scan_tfsec_module(module: Path, files: list[Path]) -> list[SecurityIssue]:
+    output = await _run_scanner(["tfsec", module.as_posix(), "--format", "json", "--soft-fail"])
+    payload = _load_payload(output, "tfsec")
+    # tfsec always walks nested directories; keep only findings that belong to this module so
+    # nested modules are not double counted (they are scanned and cached on their own).
+    own = {path.resolve() for path in files}
+    payload = {
+        **payload,
+        "results": [
+            finding
+            for finding in payload.get("results") or []
+            if Path(finding.get("location", {}).get("filename", "")).resolve() in own
+        ],
+    }
+    return _parse_security_payload(payload, "tfsec")
+
+
+def _load_payload(output: str, tool: str) -> dict:
+    try:
+        return json.loads(output or "{}")
+    except json.JSONDecodeError as exc:
+        logger.warning("[SEC] Unable to parse %s output: %s", tool, exc)
+        return {}
+
+
+def _dedupe_issues(issues: list[SecurityIssue]) -> list[SecurityIssue]:
+    """Collapse findings for the same resource and control, keeping the highest severity."""
+
+    merged: dict[tuple[str, str], SecurityIssue] = {}
+    for issue in issues:
+        key = (issue.resource or "", _CONTROL_ALIASES.get(issue.rule_id, issue.rule_id))
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = issue
+            continue
+        if _SEVERITY_RANK[issue.severity] > _SEVERITY_RANK[existing.severity]:
+            existing.severity = issue.severity
+        existing.remediation = existing.remediation or issue.remediation
+        existing.detected_by = sorted({*existing.detected_by, *issue.detected_by})
+    return list(merged.values())
+
+
 def _parse_security_payload(payload: dict, tool: str) -> list[SecurityIssue]:
     issues: list[SecurityIssue] = []
     if tool == "tfsec":
-        for finding in payload.get("results", []):
+        for finding in payload.get("results") or []:
             issues.append(
                 SecurityIssue(
                     severity=finding.get("severity", "medium").lower(),
@@ -81,17 +349,19 @@ def _parse_security_payload(payload: dict, tool: str) -> list[SecurityIssue]:
                     description=finding.get("description", ""),
                     resource=finding.get("resource"),
                     remediation=finding.get("resolution"),
+                    detected_by=[tool],
                 )
             )
     else:
         for finding in payload.get("results", {}).get("failed_checks", []):
             issues.append(
                 SecurityIssue(
-                    severity=finding.get("severity", "medium").lower(),
+                    severity=(finding.get("severity") or "medium").lower(),
                     rule_id=finding.get("check_id", ""),
                     description=finding.get("check_name", ""),
                     resource=finding.get("resource", ""),
                     remediation=finding.get("guideline", ""),
+                    detected_by=[tool],
                 )
             )
     return issues
@@ -1,16 +1,24 @@
 """Cost estimation helper tool."""
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import os
 import subprocess
+import tempfile
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
 
+from app.config import settings
 from app.models import CostComponent, CostReport
+from app.services.plan_json import dump_plan, load_plan, plan_json_path_for, scope_plan
+from app.services.plan_store import plan_store
+from app.services.pricing_snapshot import PricingSnapshot, resource_price_keys
 
 logger = logging.getLogger(__name__)
 
@@ -20,20 +28,63 @@ class CostEstimateRequest(BaseModel):
     plan_id: str
     directory: str
     usage_file: str | None = Field(default=None, description="Optional Infracost usage file")
+    plan_json_path: str | None = Field(
+        default=None,
+        description="PlanArtifact.plan_json_path (or raw_plan_path) from run_terraform_plan; prices the plan directly",
+    )
 
 
 class CostEstimationError(RuntimeError):
     pass
 
 
+class ResourcePrice(BaseModel):
+    monthly_cost: float = 0.0
+    delta_monthly_cost: float = 0.0
+    currency: str = "USD"
+    priced: bool = False
+
+
+class PriceCache:
+    """On-disk prices per resource change, keyed on the change itself and the infracost version."""
+
+    def __init__(self, root: Optional[str | Path] = None) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.cost_price_cache_dir).expanduser()
+
+    def get(self, key: str) -> Optional[ResourcePrice]:
+        try:
+            return ResourcePrice.model_validate_json((self.root / f"{key}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, price: ResourcePrice) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(price.model_dump_json())
+        os.replace(tmp, self.root / f"{key}.json")
+
+
+price_cache = PriceCache()
+
+
 def estimate_cost(
     request: Annotated[CostEstimateRequest, Field(description="Estimate Terraform cost impact")]
 ) -> CostReport:
     """Estimate monthly cost deltas using Infracost when available."""
 
+    if request.plan_json_path:
+        return _estimate_from_plan(request)
+
     directory = Path(request.directory)
     if not directory.exists():
         raise CostEstimationError(f"Directory {directory} does not exist")
+    if settings.cost_pricing_source == "snapshot":
+        return _estimate_directory_from_snapshot(request, "COST_PRICING_SOURCE=snapshot")
 
     cmd = ["infracost", "breakdown", f"--path={directory.as_posix()}", "--format", "json"]
     if request.usage_file:
@@ -47,17 +98,16 @@ def estimate_cost(
         delta = payload.get("projects", [{}])[0].get("diff", {}).get("totalMonthlyDiff", 0.0)
         components = _parse_components(payload)
     except FileNotFoundError:
-        logger.warning("Infracost not found, returning zero cost report")
-        total_monthly_cost = 0.0
-        delta = 0.0
-        components = []
+        return _estimate_directory_from_snapshot(request, "infracost not found")
     except json.JSONDecodeError as exc:
         logger.warning("[COST] Invalid infracost JSON output: %s", exc)
-        total_monthly_cost = 0.0
-        delta = 0.0
-        components = []
+        return _estimate_directory_from_snapshot(request, "infracost returned invalid JSON")
     except subprocess.CalledProcessError as exc:
-        raise CostEstimationError(exc.stderr or exc.stdout or "Cost estimation failed") from exc
+        # Typically the pricing API is unreachable; infracost exits non-zero rather than guessing.
+        detail = (exc.stderr or exc.stdout or "Cost estimation failed").strip()
+        if settings.cost_pricing_source != "auto":
+            raise CostEstimationError(detail) from exc
+        return _estimate_directory_from_snapshot(request, f"infracost failed ({detail})")
 
     return CostReport(
         ticket_id=request.ticket_id,
@@ -70,6 +120,221 @@ def estimate_cost(
     )
 
 
+def _estimate_from_plan(request: CostEstimateRequest) -> CostReport:
+    """Price an existing plan JSON with infracost, or from the offline snapshot when configured or as fallback."""
+
+    plan, changes = _load_changes(request.plan_json_path)
+    snapshot = get_pricing_snapshot()
+    if settings.cost_pricing_source == "snapshot":
+        if snapshot is None:
+            raise CostEstimationError("COST_PRICING_SOURCE=snapshot requires an existing PRICING_SNAPSHOT_PATH")
+        return _estimate_from_snapshot(request, changes, snapshot)
+    fallback = snapshot if settings.cost_pricing_source == "auto" else None
+    try:
+        prices = _infracost_prices(request, plan, changes)
+    except CostEstimationError as exc:
+        if fallback is None:
+            raise
+        logger.warning("[COST] infracost failed (%s); pricing from snapshot %s", exc, fallback.version)
+        return _estimate_from_snapshot(request, changes, fallback)
+    if prices is None:
+        if fallback is not None:
+            logger.warning("[COST] infracost not found; pricing from snapshot %s", fallback.version)
+            return _estimate_from_snapshot(request, changes, fallback)
+        raise CostEstimationError("infracost not found and no pricing snapshot is configured")
+
+    components = [
+        CostComponent(
+            name=address,
+            monthly_cost=price.monthly_cost,
+            delta_monthly_cost=price.delta_monthly_cost,
+            currency=price.currency,
+        )
+        for address, price in prices.items()
+        if price.priced
+    ]
+    return _report(request, components)
+
+
+def _estimate_directory_from_snapshot(request: CostEstimateRequest, reason: str) -> CostReport:
+    """Price the ticket's stored plan from the offline snapshot instead of infracost on the directory."""
+
+    snapshot = get_pricing_snapshot() if settings.cost_pricing_source != "infracost" else None
+    if snapshot is None:
+        raise CostEstimationError(f"{reason} and no pricing snapshot is configured")
+    rendering = plan_store.rendering_ref(request.ticket_id, request.plan_id)
+    if rendering is None:
+        raise CostEstimationError(f"{reason} and plan {request.plan_id} is not in the plan store to price offline")
+    logger.warning("[COST] %s; pricing plan %s from snapshot %s", reason, request.plan_id, snapshot.version)
+    _, changes = _load_changes(rendering)
+    return _estimate_from_snapshot(request, changes, snapshot)
+
+
+def _load_changes(plan_json_path: str) -> tuple[dict, list[dict]]:
+    plan_path = plan_json_path_for(plan_json_path)
+    if not plan_path.exists():
+        raise CostEstimationError(f"Plan JSON {plan_path} does not exist")
+    plan = load_plan(plan_path)
+    changes = [change for change in plan.get("resource_changes") or [] if change.get("mode", "managed") == "managed"]
+    return plan, changes
+
+
+def _infracost_prices(
+    request: CostEstimateRequest, plan: dict, changes: list[dict]
+) -> Optional[dict[str, ResourcePrice]]:
+    """Per-address prices, sending infracost only resource changes without a cached price."""
+
+    try:
+        version = _infracost_version()
+    except FileNotFoundError:
+        return None
+    usage_digest = hashlib.sha256(Path(request.usage_file).read_bytes()).hexdigest() if request.usage_file else ""
+    keys = {change["address"]: _price_key(version, usage_digest, change) for change in changes}
+    prices: dict[str, ResourcePrice] = {}
+    missing: list[str] = []
+    for address, key in keys.items():
+        cached = price_cache.get(key)
+        if cached is None:
+            missing.append(address)
+        else:
+            prices[address] = cached
+    logger.info("[COST] %d of %d resource price(s) cached for ticket %s", len(prices), len(keys), request.ticket_id)
+    if missing:
+        priced = _run_infracost_on_plan(scope_plan(plan, missing, keep_prior_state=True), request.usage_file)
+        for address in missing:
+            prices[address] = priced.get(address, ResourcePrice())
+            # Only real answers are cached; a resource infracost left out is asked about again.
+            if address in priced:
+                price_cache.put(keys[address], prices[address])
+    return prices
+
+
+def _estimate_from_snapshot(request: CostEstimateRequest, changes: list[dict], snapshot: PricingSnapshot) -> CostReport:
+    """Price compute meters for every resource in one snapshot lookup; delta is after minus before."""
+
+    units = {
+        change["address"]: (
+            resource_price_keys(change.get("type", ""), change.get("change", {}).get("after")),
+            resource_price_keys(change.get("type", ""), change.get("change", {}).get("before")),
+        )
+        for change in changes
+    }
+    found = snapshot.lookup_many(key for after, before in units.values() for key, _ in (*after, *before))
+
+    def _monthly(items: list) -> float:
+        return sum(found[key].monthly_price * quantity for key, quantity in items if key in found)
+
+    components = [
+        CostComponent(
+            name=address,
+            monthly_cost=round(_monthly(after), 4),
+            delta_monthly_cost=round(_monthly(after) - _monthly(before), 4),
+            currency=next((found[key].currency for key, _ in (*after, *before) if key in found), "USD"),
+        )
+        for address, (after, before) in units.items()
+        if any(key in found for key, _ in (*after, *before))
+    ]
+    report = _report(request, components)
+    report.pricing_snapshot_version = snapshot.version
+    return report
+
+
+def _report(request: CostEstimateRequest, components: list[CostComponent]) -> CostReport:
+    return CostReport(
+        ticket_id=request.ticket_id,
+        plan_id=request.plan_id,
+        timestamp_utc=datetime.now(timezone.utc),
+        total_monthly_cost=round(sum(component.monthly_cost for component in components), 4),
+        delta_monthly_cost=round(sum(component.delta_monthly_cost for component in components), 4),
+        currency="USD",
+        components=components,
+    )
+
+
+def get_pricing_snapshot() -> Optional[PricingSnapshot]:
+    if not settings.pricing_snapshot_path:
+        return None
+    path = Path(settings.pricing_snapshot_path).expanduser()
+    if not path.exists():
+        logger.warning("[COST] Pricing snapshot %s not found", path)
+        return None
+    return _open_snapshot(str(path), path.stat().st_mtime)
+
+
+@lru_cache(maxsize=4)
+def _open_snapshot(path: str, _mtime: float) -> PricingSnapshot:
+    # The mtime is part of the cache key so a re-imported snapshot is picked up.
+    return PricingSnapshot(path)
+
+
+@lru_cache(maxsize=1)
+def _infracost_version() -> str:
+    """Installed infracost version; raises FileNotFoundError, which is not cached, while it is missing.
+
+    Tools are installed in the background after startup, so a missing binary may appear later.
+    """
+
+    try:
+        proc = subprocess.run(["infracost", "--version"], capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as exc:
+        raise CostEstimationError(exc.stderr or exc.stdout or "Unable to determine infracost version") from exc
+    return proc.stdout.strip()
+
+
+def _price_key(version: str, usage_digest: str, change: dict) -> str:
+    """Prices depend on the resource type and its before/after attributes, not its name.
+
+    Usage files are keyed by address, so the address only joins the key when one is supplied.
+    """
+
+    material = {
+        "version": version,
+        "type": change.get("type"),
+        "provider": change.get("provider_name"),
+        "before": change.get("change", {}).get("before"),
+        "after": change.get("change", {}).get("after"),
+    }
+    if usage_digest:
+        material.update(usage=usage_digest, address=change.get("address"))
+    return hashlib.sha256(dump_plan(material)).hexdigest()
+
+
+def _run_infracost_on_plan(plan: dict, usage_file: Optional[str]) -> dict[str, ResourcePrice]:
+    fd, tmp = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(dump_plan(plan))
+        cmd = ["infracost", "breakdown", f"--path={tmp}", "--format", "json"]
+        if usage_file:
+            cmd.append(f"--usage-file={usage_file}")
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as exc:
+        raise CostEstimationError(exc.stderr or exc.stdout or "Cost estimation failed") from exc
+    finally:
+        os.unlink(tmp)
+    try:
+        payload = json.loads(proc.stdout or "{}")
+    except json.JSONDecodeError as exc:
+        logger.warning("[COST] Invalid infracost JSON output: %s", exc)
+        return {}
+    return _parse_resource_prices(payload)
+
+
+def _parse_resource_prices(payload: dict) -> dict[str, ResourcePrice]:
+    prices: dict[str, ResourcePrice] = {}
+    for project in payload.get("projects", []):
+        for resource in project.get("breakdown", {}).get("resources", []):
+            prices[resource.get("name", "")] = ResourcePrice(
+                monthly_cost=float(resource.get("monthlyCost", 0) or 0),
+                currency=payload.get("currency", "USD"),
+                priced=True,
+            )
+        for resource in project.get("diff", {}).get("resources", []):
+            price = prices.setdefault(resource.get("name", ""), ResourcePrice(priced=True))
+            price.delta_monthly_cost = float(resource.get("monthlyCost", 0) or 0)
+    return prices
+
+
 def _parse_components(payload: dict) -> list[CostComponent]:
     components: list[CostComponent] = []
     for project in payload.get("projects", []):
@@ -39,7 +39,7 @@ async def run_drift_monitor(inputs: DriftMonitorInput) -> DriftMonitorResult:
         workspace_dir=inputs.workspace_dir,
         terraform_workspace=inputs.terraform_workspace,
     )
-    report = run_drift_check(request)
+    report = await run_drift_check(request)
     finding_count = len(report.findings)
     summary = "No drift detected" if finding_count == 0 else f"{finding_count} drift findings detected"
     findings_payload = [
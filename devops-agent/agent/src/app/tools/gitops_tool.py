@@ -1,6 +1,7 @@
 """GitOps utility functions."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from pathlib import Path
 from typing import Annotated
@@ -10,6 +11,8 @@ from pydantic import Field
 
 from app.models import GitOpsChangeRequest, GitOpsResult
 from app.config import settings
+from app.services.git_bulk_commit import BulkCommitError, branch_checked_out, bulk_commit
+from app.services.worktree_manager import WorktreeError, worktree_manager
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +21,7 @@ class GitOpsError(RuntimeError):
     pass
 
 
-def apply_git_changes(
+async def apply_git_changes(
     request: Annotated[GitOpsChangeRequest, Field(description="Proposed GitOps change request")]
 ) -> GitOpsResult:
     """Apply file edits inside a repository and open a branch."""
@@ -27,43 +30,15 @@ def apply_git_changes(
     if not repo_path.exists():
         raise GitOpsError(f"Repo path {repo_path} is missing")
 
-    repo = Repo(repo_path)
     normalized_ticket = request.ticket_id.replace(" ", "-").lower()
     if normalized_ticket not in request.preferred_branch_name.lower():
         raise GitOpsError("Branch name must include the ticket identifier for traceability")
-    try:
-        repo.config_reader().get_value("user", "name")
-    except Exception:  # pragma: no cover - config fallback
-        writer = repo.config_writer()
-        writer.set_value("user", "name", "Terraform Agent Bot")
-        writer.set_value("user", "email", "terraform-agent@example.com")
-        writer.release()
-    if repo.is_dirty(untracked_files=True):
-        raise GitOpsError("Repository has dirty state; aborting GitOps changes")
 
-    base_branch = request.base_branch
     target_branch = request.preferred_branch_name
-    repo.git.checkout(base_branch)
-    repo.git.checkout("-B", target_branch)
-
-    edited_paths: list[str] = []
-    for edit in request.file_edits:
-        file_path = repo_path / edit.path
-        if edit.mode == "delete":
-            if file_path.exists():
-                file_path.unlink()
-        else:
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            if edit.mode == "append" and file_path.exists():
-                with file_path.open("a", encoding="utf-8") as handle:
-                    handle.write(edit.content)
-            else:
-                file_path.write_text(edit.content, encoding="utf-8")
-        edited_paths.append(str(file_path.relative_to(repo_path)))
-
-    repo.index.add(edited_paths)
-    repo.index.commit(f"GitOps changes for ticket {request.ticket_id}")
-    logger.info("[GITOPS] Created branch %s with %d edits", target_branch, len(edited_paths))
+    commit_sha = await asyncio.to_thread(_commit_changes, repo_path, request)
+    logger.info(
+        "[GITOPS] Created branch %s at %s with %d edits", target_branch, commit_sha[:12], len(request.file_edits)
+    )
 
     return GitOpsResult(
         ticket_id=request.ticket_id,
@@ -72,9 +47,39 @@ def apply_git_changes(
         pull_request_url=None,
         ci_status="pending",
         error_message=None,
+        commit_sha=commit_sha,
     )
 
 
+def _commit_changes(repo_path: Path, request: GitOpsChangeRequest) -> str:
+    """Commit the request's edits in one pass; blocking, so run it in a thread."""
+
+    repo = Repo(repo_path)
+    try:
+        repo.config_reader().get_value("user", "name")
+    except Exception:  # pragma: no cover - config fallback
+        writer = repo.config_writer()
+        writer.set_value("user", "name", "Terraform Agent Bot")
+        writer.set_value("user", "email", "terraform-agent@example.com")
+        writer.release()
+
+    target_branch = request.preferred_branch_name
+    message = f"GitOps changes for ticket {request.ticket_id}"
+    try:
+        if not request.update_working_tree:
+            checked_out = branch_checked_out(repo_path, target_branch)
+            if checked_out is not None:
+                raise GitOpsError(f"Branch {target_branch} is checked out in {checked_out}")
+            return bulk_commit(repo_path, target_branch, request.base_branch, request.file_edits, message)
+        # Each ticket works in its own worktree, so tickets never check out branches in the shared clone.
+        with worktree_manager.checkout(repo_path, request.ticket_id, target_branch, request.base_branch) as worktree:
+            return bulk_commit(
+                worktree.working_tree_dir, target_branch, "HEAD", request.file_edits, message, update_working_tree=True
+            )
+    except (WorktreeError, BulkCommitError) as exc:
+        raise GitOpsError(str(exc)) from exc
+
+
 def get_repo_status(repo_path: Annotated[str, Field(description="Path to clone directory")]) -> dict:
     repo = Repo(Path(repo_path))
     return {
@@ -3,11 +3,16 @@ from __future__ import annotations
 
 import logging
 import os
+import time
 from functools import lru_cache
 from shlex import split
 
 from agent_framework import MCPStdioTool, MCPStreamableHTTPTool
 
+from app.config import settings
+from app.services.mcp_cache import CachingSession
+from app.services.mcp_pool import MCPProcessPool, PooledSession, mcp_pools
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_TERRAFORM_MCP_COMMAND = "npx"
@@ -16,29 +21,123 @@ DEFAULT_MSLEARN_MCP_URL = "https://learn.microsoft.com/api/agentframework/mslear
 DEFAULT_GITHUB_MCP_COMMAND = ""
 DEFAULT_GITHUB_MCP_ARGS = []
 
+
+class _ResponseCacheMixin:
+    """Routes an MCP tool's session through the response cache (see ``app.services.mcp_cache``).
+
+    When the server cannot be reached but a tool listing was cached earlier, the tool comes up
+    offline and answers from cache. Agents keep a connected tool, so while offline a tool call
+    retries the live connection every ``MCP_OFFLINE_RETRY_SECONDS`` (default 30).
+    """
+
+    _retry_live_at = 0.0
+
+    async def connect(self) -> None:
+        if isinstance(self.session, CachingSession) and self.session.offline:
+            self.session = None
+        try:
+            await self._connect_live()
+            self._wrap_session()
+        except Exception as exc:
+            offline = CachingSession(None, self.name)
+            if not offline.has_tool_list():
+                raise
+            logger.warning("[MCP] %s unavailable (%s); serving cached responses offline", self.name, exc)
+            self.session = offline
+            self.is_connected = True
+            self._retry_live_at = time.monotonic() + settings.mcp_offline_retry_seconds
+            await self.load_tools()
+            self._tools_loaded = True
+
+    async def call_tool(self, tool_name: str, **kwargs):
+        offline = isinstance(self.session, CachingSession) and self.session.offline
+        if offline and time.monotonic() >= self._retry_live_at:
+            # Pushed back first so concurrent calls do not all retry; failing again stays offline.
+            self._retry_live_at = float("inf")
+            await self.connect()
+            if not self.session.offline:
+                logger.info("[MCP] %s reachable again; leaving offline mode", self.name)
+        return await super().call_tool(tool_name, **kwargs)
+
+    async def _connect_live(self) -> None:
+        await super().connect()
+
+    async def load_tools(self) -> None:
+        self._wrap_session()
+        await super().load_tools()
+
+    def _wrap_session(self) -> None:
+        if self.session is not None and not isinstance(self.session, CachingSession):
+            self.session = CachingSession(self.session, self.name)
+
+
+class PooledMCPStdioTool(_ResponseCacheMixin, MCPStdioTool):
+    """``MCPStdioTool`` backed by a supervised pool of warm server processes.
+
+    Agents connect it like any MCP tool; tool listing and calls are served by whichever
+    pooled process is least busy, and the pool outlives individual agent runs.
+    """
+
+    def __init__(self, name: str, command: str, *, pool_size: int, **kwargs) -> None:
+        super().__init__(name=name, command=command, **kwargs)
+        member_kwargs = {key: kwargs[key] for key in ("args", "env", "description", "request_timeout") if key in kwargs}
+        self.pool = mcp_pools.register(
+            MCPProcessPool(
+                name,
+                lambda: MCPStdioTool(name=name, command=command, load_prompts=False, **member_kwargs),
+                pool_size,
+            )
+        )
+
+    async def _connect_live(self) -> None:
+        await self.pool.start()
+        self.session = PooledSession(self.pool)
+        self.is_connected = True
+        if self.load_tools_flag and not self._tools_loaded:
+            await self.load_tools()
+            self._tools_loaded = True
+        if self.load_prompts_flag and not self._prompts_loaded:
+            await self.load_prompts()
+            self._prompts_loaded = True
+
+    async def close(self) -> None:
+        await self.pool.close()
+        self.session = None
+        self.is_connected = False
+
+
+def _pool_size(override: int | None) -> int:
+    return override or settings.mcp_pool_size
+
+
 @lru_cache()
-def get_terraform_mcp_tools() -> list[MCPStdioTool]:
+def get_terraform_mcp_tools() -> list[PooledMCPStdioTool]:
     command = os.environ.get("TERRAFORM_MCP_COMMAND", DEFAULT_TERRAFORM_MCP_COMMAND)
     args_raw = os.environ.get("TERRAFORM_MCP_ARGS")
     args = split(args_raw) if args_raw else DEFAULT_TERRAFORM_MCP_ARGS
-    tool = MCPStdioTool(
+    tool = PooledMCPStdioTool(
         name="terraform-mcp",
         command=command,
         args=args,
         description="Access Terraform MCP server for state queries",
+        pool_size=_pool_size(settings.terraform_mcp_pool_size),
     )
     return [tool]
 
 
+class CachedMCPStreamableHTTPTool(_ResponseCacheMixin, MCPStreamableHTTPTool):
+    """``MCPStreamableHTTPTool`` whose lookups go through the MCP response cache."""
+
+
 @lru_cache()
-def get_ms_learn_mcp_tools() -> list[MCPStreamableHTTPTool]:
+def get_ms_learn_mcp_tools() -> list[CachedMCPStreamableHTTPTool]:
     url = os.environ.get("MSLEARN_MCP_URL", DEFAULT_MSLEARN_MCP_URL)
     api_key = os.environ.get("MSLEARN_MCP_KEY")
     if not url:
         logger.warning("MSLEARN_MCP_URL not set; Microsoft Learn MCP disabled")
         return []
     headers = {"Authorization": f"Bearer {api_key}"} if api_key else None
-    tool = MCPStreamableHTTPTool(
+    tool = CachedMCPStreamableHTTPTool(
         name="ms-learn",
         url=url,
         headers=headers or {},
@@ -48,7 +147,7 @@ def get_ms_learn_mcp_tools() -> list[MCPStreamableHTTPTool]:
 
 
 @lru_cache()
-def get_github_mcp_tools() -> list[MCPStdioTool]:
+def get_github_mcp_tools() -> list[PooledMCPStdioTool]:
     command = os.environ.get("GITHUB_MCP_COMMAND", DEFAULT_GITHUB_MCP_COMMAND).strip()
     if not command:
         logger.info("GITHUB_MCP_COMMAND not set; GitHub MCP integration disabled")
@@ -61,11 +160,12 @@ def get_github_mcp_tools() -> list[MCPStdioTool]:
         env["GITHUB_TOKEN"] = token
     else:
         logger.warning("GITHUB_TOKEN not set; GitHub MCP access may fail")
-    tool = MCPStdioTool(
+    tool = PooledMCPStdioTool(
         name="github-mcp",
         command=command,
         args=args,
         description="Interact with GitHub repositories (list, clone, open PRs)",
         env=env,
+        pool_size=_pool_size(settings.github_mcp_pool_size),
     )
     return [tool]
@@ -1,15 +1,18 @@
 """Tool for creating new project entries via the supervisor agent."""
 from __future__ import annotations
 
-from pathlib import Path
+import asyncio
+import shutil
+from pathlib import Path, PurePosixPath
 
 from agent_framework import AIFunction
-from git import Repo
-from pydantic import AnyUrl, BaseModel, Field
+from pydantic import AnyUrl, BaseModel, Field, field_validator
 
 from app.config import settings
 from app.models.project import Project, ProjectCreate, ProjectType
 from app.services import project_store
+from app.services.audit_log import audit_log, build_event
+from app.services.repo_clone import CloneOptions, ProgressCallback, clone_repository
 
 
 class ProjectOnboardingInput(BaseModel):
@@ -17,15 +20,38 @@ class ProjectOnboardingInput(BaseModel):
     description: str | None = Field(default=None, description="Optional description")
     repo_url: AnyUrl = Field(description="Git repository containing infrastructure code")
     workspace_dir: str | None = Field(default=None, description="Optional pre-existing workspace directory")
+    terraform_root: str | None = Field(
+        default=None,
+        description="Repository subdirectory holding the Terraform root; only it is checked out when cloning",
+    )
     default_environment: str = Field(default="dev", description="Default environment alias")
     default_branch: str = Field(default="main", description="Default Git branch to base plans from")
     project_type: ProjectType = Field(default="terraform", description="Type of project (terraform, python-container)")
     project_id: str | None = Field(default=None, description="Optional slug identifier")
+    ticket_id: str | None = Field(
+        default=None,
+        description="Ticket whose audit log receives clone progress; defaults to project:<project_id>",
+    )
+
+    @field_validator("terraform_root")
+    @classmethod
+    def _relative_root(cls, value: str | None) -> str | None:
+        if value is None:
+            return None
+        path = PurePosixPath(value.strip("/"))
+        if ".." in path.parts:
+            raise ValueError("terraform_root must stay inside the repository")
+        return None if str(path) == "." else str(path)
 
 
 async def _create_project(inputs: ProjectOnboardingInput) -> Project:
     project_id = inputs.project_id or project_store.generate_project_id(inputs.name)
     workspace_dir = inputs.workspace_dir
+    existing = await project_store.get_project_by_repo(str(inputs.repo_url))
+    if existing is not None:
+        raise project_store.ProjectConflictError(
+            f"Repository {inputs.repo_url} is already managed by project {existing.project_id}"
+        )
 
     if workspace_dir is None:
         projects_root = Path(settings.projects_root).expanduser()
@@ -33,11 +59,15 @@ async def _create_project(inputs: ProjectOnboardingInput) -> Project:
         destination = projects_root / project_id
         if destination.exists():
             raise ValueError(f"Workspace path {destination} already exists")
+        sparse_paths = (inputs.terraform_root,) if inputs.terraform_root else ()
+        options = CloneOptions.from_settings(inputs.default_branch, sparse_paths)
         try:
-            Repo.clone_from(str(inputs.repo_url), destination, branch=inputs.default_branch)
-        except Exception as exc:  # pragma: no cover - network/IO error
-            raise ValueError(f"Failed to clone repository: {exc}") from exc
-        workspace_dir = str(destination)
+            progress = _audit_progress(inputs.ticket_id or f"project:{project_id}", asyncio.get_running_loop())
+            await asyncio.to_thread(clone_repository, str(inputs.repo_url), destination, options, progress)
+        except Exception as exc:
+            shutil.rmtree(destination, ignore_errors=True)
+            raise ValueError(str(exc)) from exc
+        workspace_dir = str(destination / inputs.terraform_root) if inputs.terraform_root else str(destination)
 
     payload = ProjectCreate(
         project_id=project_id,
@@ -52,6 +82,16 @@ async def _create_project(inputs: ProjectOnboardingInput) -> Project:
     return await project_store.create_project(payload)
 
 
+def _audit_progress(audit_id: str, loop: asyncio.AbstractEventLoop) -> ProgressCallback:
+    """Clone progress callback, called from the clone thread, that records audit events on ``loop``."""
+
+    def _report(text: str) -> None:
+        event = build_event(audit_id, "project_onboarding_tool", "tool", "project_clone_progress", message=text)
+        asyncio.run_coroutine_threadsafe(audit_log.record_event(event), loop).result()
+
+    return _report
+
+
 project_onboarding_tool = AIFunction(
     name="create_project",
     description="Register a new infrastructure project (repo, workspace, environment defaults).",
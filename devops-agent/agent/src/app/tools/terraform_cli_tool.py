@@ -1,9 +1,12 @@
 """Terraform CLI tool wrappers exposed to agents."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
+import re
 import subprocess
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -14,9 +17,18 @@ from pydantic import BaseModel, Field
 
 from app.config import settings
 from app.models import DriftFinding, DriftReport, PlanArtifact, PlanResourceChange
+from app.services.audit_log import audit_log, build_event
+from app.services.lock_manager import LockTimeoutError, lock_manager
+from app.services.plan_store import PlanStoreError, is_blob_ref, plan_store
+from app.services.workspace_cache import WorkspaceCacheError, resolve_source, uses_local_state, workspace_cache
 
 logger = logging.getLogger(__name__)
 
+# Written after an in-place init; a plan whose inputs still match it skips init altogether.
+_INIT_MARKER = Path(".terraform") / "agent-init.json"
+# `source = "../modules/net"`: local modules are read from disk, so their edits need a re-init too.
+_LOCAL_SOURCE = re.compile(r'\bsource\s*=\s*"(\.{1,2}/[^"]*)"')
+
 
 class TerraformCLIError(RuntimeError):
     """Raised when Terraform commands fail."""
@@ -28,6 +40,8 @@ class PlanRequest(BaseModel):
     terraform_workspace: str
     variables: dict[str, str] = Field(default_factory=dict)
     backend_config: dict[str, str] = Field(default_factory=dict)
+    # Git revision of the workspace's repository to plan; defaults to the checked-out HEAD.
+    revision: Optional[str] = None
 
 
 class ApplyRequest(BaseModel):
@@ -51,12 +65,12 @@ class DriftRequest(BaseModel):
 
 
 @dataclass
-class _CommandResult:
+class CommandResult:
     stdout: str
     stderr: str
 
 
-def _run_terraform(cmd: list[str], cwd: Path, env: Optional[dict[str, str]] = None) -> _CommandResult:
+def run_terraform_command(cmd: list[str], cwd: Path, env: Optional[dict[str, str]] = None) -> CommandResult:
     """Run terraform command and capture JSON output."""
 
     merged_env = os.environ.copy()
@@ -73,10 +87,12 @@ def _run_terraform(cmd: list[str], cwd: Path, env: Optional[dict[str, str]] = No
             text=True,
         )
     except FileNotFoundError as exc:
+        if not cwd.is_dir():
+            raise TerraformCLIError(f"Terraform working directory {cwd} does not exist") from exc
         raise TerraformCLIError("Terraform binary not found. Set TF_CLI_PATH or install terraform.") from exc
     except subprocess.CalledProcessError as exc:
         raise TerraformCLIError(exc.stderr or exc.stdout or "Terraform command failed") from exc
-    return _CommandResult(stdout=proc.stdout, stderr=proc.stderr)
+    return CommandResult(stdout=proc.stdout, stderr=proc.stderr)
 
 
 def _workspace_path(path: str) -> Path:
@@ -86,60 +102,216 @@ def _workspace_path(path: str) -> Path:
     return workspace
 
 
-def run_terraform_plan(
-    request: Annotated[PlanRequest, Field(description="Terraform plan request parameters")]
-) -> PlanArtifact:
-    """Run terraform plan and convert to PlanArtifact."""
+def _lock_key(workspace: Path) -> str:
+    return str(workspace.resolve())
 
-    workspace = _workspace_path(request.workspace_dir)
-    terraform = settings.tf_cli_path
+
+async def _audit(ticket_id: str, action: str, **metadata: str) -> None:
+    await audit_log.record_event(build_event(ticket_id, "terraform_cli_tool", "tool", action, **metadata))
+
+
+def _init_backend(request: PlanRequest, workspace: Path) -> None:
     logger.info("[TF] Initializing workspace %s", workspace)
-    init_cmd = [terraform, "init", "-input=false"]
+    init_cmd = [settings.tf_cli_path, "init", "-input=false"]
     for key, value in request.backend_config.items():
         init_cmd.append(f"-backend-config={key}={value}")
-    _run_terraform(init_cmd, cwd=workspace)
+    run_terraform_command(init_cmd, cwd=workspace)
+
+
+def _init(request: PlanRequest, workspace: Path) -> None:
+    terraform = settings.tf_cli_path
+    if _initialized(request, workspace):
+        return  # another plan initialized it while this one waited for the lock
+    record = _init_record(workspace)
+    if record.get("fingerprint") != _init_fingerprint(request, workspace):
+        _init_backend(request, workspace)
+        record = {"fingerprint": _init_fingerprint(request, workspace), "workspaces": []}
     logger.info("[TF] Selecting workspace %s", request.terraform_workspace)
-    _run_terraform([terraform, "workspace", "select", request.terraform_workspace], cwd=workspace)
+    run_terraform_command([terraform, "workspace", "select", request.terraform_workspace], cwd=workspace)
+    record["workspaces"] = sorted({*record["workspaces"], request.terraform_workspace})
+    (workspace / _INIT_MARKER).parent.mkdir(exist_ok=True)
+    (workspace / _INIT_MARKER).write_text(json.dumps(record), encoding="utf-8")
+
 
+def _initialized(request: PlanRequest, workspace: Path) -> bool:
+    """Whether ``workspace`` was initialized in place for this backend config and configuration."""
+
+    record = _init_record(workspace)
+    return record.get("fingerprint") == _init_fingerprint(request, workspace) and (
+        request.terraform_workspace in record.get("workspaces", [])
+    )
+
+
+def _init_record(workspace: Path) -> dict:
+    try:
+        return json.loads((workspace / _INIT_MARKER).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _init_fingerprint(request: PlanRequest, workspace: Path) -> str:
+    """Backend config plus the files of every local module, which declare modules and providers."""
+
+    digest = hashlib.sha256(json.dumps(request.backend_config, sort_keys=True).encode())
+    paths = [workspace / ".terraform.lock.hcl", *sorted(workspace.glob("*.tfbackend"))]
+    for module in _local_modules(workspace):
+        paths += sorted(path for path in module.iterdir() if path.name.endswith((".tf", ".tf.json")))
+    for path in paths:
+        if path.is_file():
+            name = os.path.relpath(path, workspace).encode()
+            digest.update(name + b"\0" + hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def _local_modules(workspace: Path) -> list[Path]:
+    """The root module, every directory below it and the local module sources it reaches outside it."""
+
+    pending = []
+    for root, dirnames, _ in os.walk(workspace):
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]  # .terraform, .git
+        pending.append(Path(root).resolve())
+    seen: set[Path] = set()
+    while pending:
+        module = pending.pop()
+        if module in seen or not module.is_dir():
+            continue
+        seen.add(module)
+        for path in module.glob("*.tf"):
+            for source in _LOCAL_SOURCE.findall(path.read_text(encoding="utf-8", errors="replace")):
+                pending.append((module / source).resolve())
+    return sorted(seen)
+
+
+def _plan(request: PlanRequest, workspace: Path) -> PlanArtifact:
+    terraform = settings.tf_cli_path
+    # Concurrent readers may target different terraform workspaces in the same directory, so pin
+    # it per process. Plans never write state; applies hold the exclusive workspace lock instead.
+    env = {"TF_WORKSPACE": request.terraform_workspace}
     plan_file = workspace / f"plan-{request.ticket_id}.tfplan"
-    cmd = [terraform, "plan", "-input=false", f"-out={plan_file}"]
+    cmd = [terraform, "plan", "-input=false", "-lock=false", f"-out={plan_file}"]
     for key, value in request.variables.items():
         cmd.append(f"-var={key}={value}")
     logger.info("[TF] Generating plan for ticket %s", request.ticket_id)
-    _run_terraform(cmd, cwd=workspace)
-    show = _run_terraform([terraform, "show", "-json", str(plan_file)], cwd=workspace)
+    run_terraform_command(cmd, cwd=workspace, env=env)
+    show = run_terraform_command([terraform, "show", "-json", str(plan_file)], cwd=workspace, env=env)
     plan_json = json.loads(show.stdout) if show.stdout else {}
-    plan_artifact = _parse_plan_output(request, plan_json, str(plan_file))
+    plan_json_file = workspace / f"plan-{request.ticket_id}.json"
+    plan_json_file.write_text(show.stdout or "{}", encoding="utf-8")
+    artifact = _parse_plan_output(request, plan_json, str(plan_file))
+    # Both files move into the plan store; the artifact keeps stable blob references to them.
+    artifact.raw_plan_path, artifact.plan_json_path = plan_store.put_plan(
+        request.ticket_id, artifact.plan_id, plan_file, plan_json_file, workspace
+    )
+    return artifact
+
+
+async def _locked_plan(request: PlanRequest, purpose: str) -> PlanArtifact:
+    """Plan under a shared workspace lock.
+
+    Workspaces reproducible from a commit, with their state in a remote backend, are planned
+    in a clone of a prepared, already initialized snapshot (see ``services/workspace_cache``).
+    Others are initialized in place under an exclusive lock first, since init rewrites
+    ``.terraform``; that is skipped once the workspace is initialized for the same inputs.
+    """
+
+    workspace = _workspace_path(request.workspace_dir)
+    key = _lock_key(workspace)
+    if request.revision and not workspace_cache.enabled:
+        raise TerraformCLIError("Planning a revision needs TF_WORKSPACE_CACHE_DIR")
+    source = None
+    if workspace_cache.enabled:
+        try:
+            source = await asyncio.to_thread(resolve_source, workspace, request.revision)
+        except WorkspaceCacheError as exc:
+            raise TerraformCLIError(str(exc)) from exc
+    if source is not None and await asyncio.to_thread(uses_local_state, workspace):
+        # Local state is gitignored, so a snapshot would plan against (and apply to) no state.
+        if request.revision:
+            raise TerraformCLIError(f"{workspace} keeps local state; planning a revision needs a remote backend")
+        source = None
+    plan_dir = workspace
+    try:
+        if source is not None:
+            plan_dir = await asyncio.to_thread(
+                workspace_cache.acquire, source, request.backend_config, lambda path: _init_backend(request, path)
+            )
+        elif not await asyncio.to_thread(_initialized, request, workspace):
+            async with lock_manager.hold(key, request.ticket_id, "init"):
+                await asyncio.to_thread(_init, request, workspace)
+        async with lock_manager.hold(key, request.ticket_id, purpose, mode="shared") as lease:
+            plan_artifact = await asyncio.to_thread(_plan, request, plan_dir)
+    except (LockTimeoutError, WorkspaceCacheError) as exc:
+        raise TerraformCLIError(str(exc)) from exc
+    finally:
+        workspace_cache.release(plan_dir)
+    if lease.lost.is_set():
+        raise TerraformCLIError(f"Workspace lock on {workspace} expired while planning; discard this plan")
     return plan_artifact
 
 
-def run_terraform_apply(
+async def run_terraform_plan(
+    request: Annotated[PlanRequest, Field(description="Terraform plan request parameters")]
+) -> PlanArtifact:
+    """Run terraform plan under the workspace lock and convert to PlanArtifact."""
+
+    try:
+        plan = await _locked_plan(request, "plan")
+    except TerraformCLIError as exc:
+        await _audit(request.ticket_id, "terraform_plan", outcome="failed", error=str(exc)[:500])
+        raise
+    await _audit(request.ticket_id, "terraform_plan", outcome="succeeded", plan_id=plan.plan_id)
+    return plan
+
+
+async def run_terraform_apply(
     request: Annotated[ApplyRequest, Field(description="Terraform apply request parameters")]
 ) -> ApplyResult:
-    """Apply terraform changes."""
+    """Apply terraform changes while holding the workspace lock."""
 
     workspace = _workspace_path(request.workspace_dir)
+    plan_file = request.plan_path
+    plan_dir = Path(plan_file).parent if plan_file else None
     terraform = settings.tf_cli_path
     cmd = [terraform, "apply", "-input=false"]
     if request.auto_approve:
         cmd.append("-auto-approve")
-    if request.plan_path:
-        cmd.append(request.plan_path)
     logger.info("[TF] Applying plan for ticket %s", request.ticket_id)
     try:
-        result = _run_terraform(cmd, cwd=workspace)
+        if is_blob_ref(plan_file):
+            plan_dir = Path(plan_store.metadata(plan_file).get("workspace_dir") or workspace)
+            plan_file = str(await asyncio.to_thread(plan_store.open, plan_file))
+        if plan_file:
+            cmd.append(plan_file)
+        # A plan made in a cached workspace clone is applied from that clone, which is initialized.
+        apply_dir = plan_dir if plan_dir is not None and workspace_cache.clone_of(plan_dir) else workspace
+        async with lock_manager.hold(_lock_key(workspace), request.ticket_id, "apply", mode="exclusive") as lease:
+            with workspace_cache.pinned(apply_dir) as clone:
+                if clone is not None and not apply_dir.is_dir():
+                    raise TerraformCLIError(
+                        f"Plan workspace {apply_dir} was evicted from the workspace cache; re-plan ticket "
+                        f"{request.ticket_id}"
+                    )
+                result = await asyncio.to_thread(run_terraform_command, cmd, apply_dir)
+        if lease.lost.is_set():
+            logger.error("[TF] Workspace lock on %s expired during apply", workspace)
         success = True
         stderr = result.stderr or None
         stdout = result.stdout
-    except TerraformCLIError as exc:
+    except (TerraformCLIError, LockTimeoutError, PlanStoreError) as exc:
         logger.error("[TF] Apply failed: %s", exc)
         success = False
         stdout = ""
         stderr = str(exc)
+    await _audit(
+        request.ticket_id,
+        "terraform_apply",
+        outcome="succeeded" if success else "failed",
+        plan_path=request.plan_path or "",
+    )
     return ApplyResult(ticket_id=request.ticket_id, success=success, stdout=stdout, stderr=stderr)
 
 
-def run_drift_check(
+async def run_drift_check(
     request: Annotated[DriftRequest, Field(description="Terraform drift detection request")]
 ) -> DriftReport:
     """Perform drift detection by running plan without desired changes."""
@@ -150,9 +322,10 @@ def run_drift_check(
         terraform_workspace=request.terraform_workspace,
     )
     try:
-        plan = run_terraform_plan(plan_request)
+        plan = await _locked_plan(plan_request, "drift")
     except TerraformCLIError as exc:
         logger.error("Drift detection failed: %s", exc)
+        await _audit(request.ticket_id, "terraform_drift_check", outcome="failed", error=str(exc)[:500])
         raise
 
     findings = [
@@ -165,6 +338,7 @@ def run_drift_check(
         for change in plan.changes
         if change.action != "no_op"
     ]
+    await _audit(request.ticket_id, "terraform_drift_check", outcome="succeeded", findings=str(len(findings)))
 
     return DriftReport(
         ticket_id=request.ticket_id,
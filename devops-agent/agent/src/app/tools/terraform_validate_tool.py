@@ -0,0 +1,248 @@
+"""Fast pre-plan checks of proposed Terraform edits: ``terraform fmt -check`` and ``validate``.
+
+Neither needs backend access or a provider refresh. The edits are applied to a clone of the
+base commit from the workspace cache, whose snapshot was initialized once with
+``-backend=false`` in every module directory, and every module is checked concurrently.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Annotated, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.models import FileEdit, GitOpsChangeRequest
+from app.services.git_bulk_commit import BulkCommitError, normalize_edit_path
+from app.services.workspace_cache import WorkspaceCacheError, resolve_source, workspace_cache
+from app.tools.terraform_cli_tool import TerraformCLIError, run_terraform_command
+
+logger = logging.getLogger(__name__)
+
+_INIT_FLAGS = ("-backend=false", "-input=false", "-no-color")
+# validate asks for init when a module or provider the edits introduced is not installed yet.
+_NEEDS_INIT = re.compile(r"terraform init|not installed|missing required provider|source has changed", re.I)
+
+
+class ValidationUnavailableError(TerraformCLIError):
+    """Validation cannot run here at all, e.g. without terraform or the workspace cache."""
+
+
+class ValidationDiagnostic(BaseModel):
+    check: Literal["path", "fmt", "validate", "init"]
+    severity: Literal["error", "warning"]
+    module: str = Field(description="Module directory, relative to the repository root")
+    summary: str
+    detail: Optional[str] = None
+    file: Optional[str] = Field(default=None, description="File relative to the repository root")
+    line: Optional[int] = None
+
+
+class ValidationReport(BaseModel):
+    ticket_id: str
+    passed: bool
+    modules: list[str] = Field(default_factory=list)
+    diagnostics: list[ValidationDiagnostic] = Field(default_factory=list)
+    duration_seconds: float
+
+
+async def validate_terraform_changes(
+    request: Annotated[GitOpsChangeRequest, Field(description="Proposed GitOps change request to check")]
+) -> ValidationReport:
+    """Run terraform fmt -check and validate on the proposed edits, per module, without a backend."""
+
+    started = time.perf_counter()
+    if not workspace_cache.enabled:
+        raise ValidationUnavailableError("Validating proposed changes needs TF_WORKSPACE_CACHE_DIR")
+    repo_path = Path(request.repo or settings.gitops_repo_path)
+    try:
+        source = await asyncio.to_thread(resolve_source, repo_path, request.base_branch)
+        checkout = await asyncio.to_thread(
+            workspace_cache.acquire, source, {}, lambda path: _init_modules(path, request.root_path), variant="validate"
+        )
+    except WorkspaceCacheError as exc:
+        raise ValidationUnavailableError(str(exc)) from exc
+    try:
+        # Edits that could not be committed are reported as such; nothing else is checked then.
+        diagnostics = await asyncio.to_thread(_apply_edits, checkout, request.file_edits)
+        modules = [] if diagnostics else await asyncio.to_thread(_module_dirs, checkout / request.root_path)
+        semaphore = asyncio.Semaphore(max(1, settings.tf_validate_concurrency))
+        results = await asyncio.gather(*(_check_module(checkout, module, semaphore) for module in modules))
+    finally:
+        workspace_cache.discard(checkout)
+
+    diagnostics += [diagnostic for result in results for diagnostic in result]
+    report = ValidationReport(
+        ticket_id=request.ticket_id,
+        passed=not any(diagnostic.severity == "error" for diagnostic in diagnostics),
+        modules=[module.relative_to(checkout).as_posix() for module in modules],
+        diagnostics=diagnostics,
+        duration_seconds=round(time.perf_counter() - started, 3),
+    )
+    logger.info(
+        "[TF] Validated %d module(s) for ticket %s in %.1fs: %d diagnostic(s)",
+        len(modules),
+        request.ticket_id,
+        report.duration_seconds,
+        len(diagnostics),
+    )
+    return report
+
+
+def _init_modules(checkout: Path, root_path: str) -> None:
+    """Initialize every module once, without a backend; a module that fails is left as is."""
+
+    def _init(module: Path) -> None:
+        try:
+            run_terraform_command([settings.tf_cli_path, "init", *_INIT_FLAGS], cwd=module)
+        except TerraformCLIError as exc:
+            # validate reports it, with the offending module, once the edits are in place.
+            logger.debug("[TF] init -backend=false failed in %s: %s", module, exc)
+
+    modules = _module_dirs(checkout / root_path)
+    with ThreadPoolExecutor(max_workers=max(1, settings.tf_validate_concurrency)) as pool:
+        list(pool.map(_init, modules))
+
+
+def _apply_edits(checkout: Path, edits: list[FileEdit]) -> list[ValidationDiagnostic]:
+    """Write ``edits`` into the checkout; returns diagnostics for paths GitOps would not commit."""
+
+    root = checkout.resolve()
+    rejected = []
+    for edit in edits:
+        try:
+            relative = normalize_edit_path(edit.path)
+        except BulkCommitError as exc:
+            rejected.append(_path_diagnostic(edit, str(exc)))
+            continue
+        path = (root / relative).resolve()
+        if not path.is_relative_to(root):
+            rejected.append(_path_diagnostic(edit, f"Edit path {edit.path!r} is outside the repository"))
+            continue
+        try:
+            if edit.mode == "delete":
+                path.unlink(missing_ok=True)
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a" if edit.mode == "append" else "w", encoding="utf-8") as handle:
+                handle.write(edit.content)
+        except OSError as exc:
+            # e.g. the path names a directory, or runs through an existing file.
+            rejected.append(_path_diagnostic(edit, f"Edit path {edit.path!r} cannot be written: {exc.strerror or exc}"))
+    return rejected
+
+
+def _path_diagnostic(edit: FileEdit, summary: str) -> ValidationDiagnostic:
+    return ValidationDiagnostic(check="path", severity="error", module=".", summary=summary, file=edit.path)
+
+
+def _module_dirs(directory: Path) -> list[Path]:
+    """Directories directly holding Terraform files, skipping hidden ones such as ``.terraform``."""
+
+    modules: list[Path] = []
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        if any(name.endswith((".tf", ".tf.json")) for name in filenames):
+            modules.append(Path(root))
+    return modules
+
+
+async def _check_module(checkout: Path, module: Path, semaphore: asyncio.Semaphore) -> list[ValidationDiagnostic]:
+    relative = module.relative_to(checkout).as_posix()
+    async with semaphore:
+        fmt, validate = await asyncio.gather(_fmt(module, relative), _validate(module, relative))
+    return fmt + validate
+
+
+async def _fmt(module: Path, relative: str) -> list[ValidationDiagnostic]:
+    code, stdout, _ = await _terraform(module, "fmt", "-check", "-list=true", "-no-color")
+    if code == 0:
+        return []
+    # Syntax errors also fail fmt; validate reports those with their location.
+    return [
+        ValidationDiagnostic(
+            check="fmt",
+            severity="error",
+            module=relative,
+            summary="File is not in canonical format; run terraform fmt",
+            file=f"{relative}/{name}",
+        )
+        for name in stdout.split()
+    ]
+
+
+async def _validate(module: Path, relative: str) -> list[ValidationDiagnostic]:
+    payload = await _validate_json(module)
+    if payload is not None and _needs_init(payload):
+        code, stdout, stderr = await _terraform(module, "init", *_INIT_FLAGS)
+        if code != 0:
+            return [
+                ValidationDiagnostic(
+                    check="init",
+                    severity="error",
+                    module=relative,
+                    summary="terraform init -backend=false failed",
+                    detail=(stderr or stdout).strip()[-2000:],
+                )
+            ]
+        payload = await _validate_json(module)
+    if payload is None:
+        return [
+            ValidationDiagnostic(
+                check="validate", severity="error", module=relative, summary="terraform validate produced no JSON"
+            )
+        ]
+    diagnostics = []
+    for item in payload.get("diagnostics") or []:
+        location = item.get("range") or {}
+        filename = location.get("filename")
+        diagnostics.append(
+            ValidationDiagnostic(
+                check="validate",
+                severity="warning" if item.get("severity") == "warning" else "error",
+                module=relative,
+                summary=item.get("summary", ""),
+                detail=item.get("detail") or None,
+                file=f"{relative}/{filename}" if filename else None,
+                line=(location.get("start") or {}).get("line"),
+            )
+        )
+    return diagnostics
+
+
+async def _validate_json(module: Path) -> Optional[dict]:
+    _, stdout, _ = await _terraform(module, "validate", "-json", "-no-color")
+    try:
+        return json.loads(stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+def _needs_init(payload: dict) -> bool:
+    return any(
+        _NEEDS_INIT.search(f"{item.get('summary', '')} {item.get('detail', '')}")
+        for item in payload.get("diagnostics") or []
+        if item.get("severity") == "error"
+    )
+
+
+async def _terraform(cwd: Path, *args: str) -> tuple[int, str, str]:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            settings.tf_cli_path,
+            *args,
+            cwd=str(cwd),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError as exc:
+        raise ValidationUnavailableError("Terraform binary not found. Set TF_CLI_PATH or install terraform.") from exc
+    stdout, stderr = await proc.communicate()
+    return proc.returncode, stdout.decode(), stderr.decode()
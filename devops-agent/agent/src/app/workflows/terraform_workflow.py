@@ -1,10 +1,14 @@
 """Terraform deployment workflow graph definition."""
 
+import logging
+from functools import lru_cache
+
 from agent_framework import (
     AgentExecutorRequest,
     AgentExecutorResponse,
     ChatMessage,
     Role,
+    Workflow,
     WorkflowBuilder,
     WorkflowContext,
     executor,
@@ -12,23 +16,20 @@ from agent_framework import (
     handler,
 )
 
-from app.agents import (
-    apply_agent,
-    architect_agent,
-    coding_agent,
-    cost_agent,
-    documentation_agent,
-    drift_agent,
-    gitops_agent,
-    naming_agent,
-    orchestrator_agent,
-    plan_agent,
-    plan_reviewer_agent,
-    qa_agent,
-    security_agent,
+from app.agents import agent_registry
+from app.agents.schemas import (
+    CodingResponse,
+    CostResponse,
+    DriftResponse,
+    OrchestratorDirective,
+    PlanResponse,
+    SecurityResponse,
 )
-from app.agents.schemas import CostResponse, DriftResponse, OrchestratorDirective, PlanResponse, SecurityResponse
+from app.config import settings
 from app.services.artifact_store import artifact_store
+from app.tools.terraform_validate_tool import ValidationReport, ValidationUnavailableError, validate_terraform_changes
+
+logger = logging.getLogger(__name__)
 
 
 class RecordPlanArtifactExecutor(Executor):
@@ -71,6 +72,67 @@ class RecordDriftReportExecutor(Executor):
         await artifact_store.save_drift_report(parsed.report)
 
 
+class ValidateCodingExecutor(Executor):
+    """Checks the coding agent's proposed edits with terraform fmt/validate before GitOps commits them.
+
+    Passing changes go on to the GitOps agent. Failing ones go back to the coding agent with
+    the diagnostics, up to ``TF_VALIDATE_MAX_FIX_ROUNDS`` times, and then to the orchestrator.
+    When validation cannot run at all (see ``ValidationUnavailableError``), the plan phase
+    remains the check; edits it refuses, such as paths outside the repository, are failures.
+    """
+
+    _ROUNDS_KEY = "coding_validation_rounds"
+
+    def __init__(self, coding_id: str, gitops_id: str, orchestrator_id: str) -> None:
+        super().__init__("validate_coding_changes")
+        self._coding_id = coding_id
+        self._gitops_id = gitops_id
+        self._orchestrator_id = orchestrator_id
+
+    @handler
+    async def handle(
+        self,
+        response: AgentExecutorResponse,
+        ctx: WorkflowContext[AgentExecutorRequest | AgentExecutorResponse],
+    ) -> None:
+        try:
+            coding = CodingResponse.model_validate_json(response.agent_run_response.text)
+            report = await validate_terraform_changes(coding.gitops_request)
+        except (ValueError, ValidationUnavailableError) as exc:
+            logger.warning("[TF] Skipping pre-plan validation: %s", exc)
+            await ctx.send_message(response, target_id=self._gitops_id)
+            return
+        if report.passed:
+            await ctx.set_shared_state(self._ROUNDS_KEY, 0)
+            await ctx.send_message(response, target_id=self._gitops_id)
+            return
+
+        try:
+            rounds = await ctx.get_shared_state(self._ROUNDS_KEY)
+        except KeyError:
+            rounds = 0
+        if rounds < settings.tf_validate_max_fix_rounds:
+            await ctx.set_shared_state(self._ROUNDS_KEY, rounds + 1)
+            text = (
+                "terraform fmt -check / validate rejected the proposed changes. Fix these diagnostics and "
+                f"return an updated CodingResponse:\n{_diagnostics_json(report)}"
+            )
+            target = self._coding_id
+        else:
+            await ctx.set_shared_state(self._ROUNDS_KEY, 0)
+            text = (
+                f"Coding phase for ticket {report.ticket_id} still fails terraform validation after "
+                f"{rounds} fix round(s); nothing was committed. Diagnostics:\n{_diagnostics_json(report)}"
+            )
+            target = self._orchestrator_id
+        message = ChatMessage(role=Role.USER, text=text)
+        await ctx.send_message(AgentExecutorRequest(messages=[message], should_respond=True), target_id=target)
+
+
+def _diagnostics_json(report: ValidationReport) -> str:
+    return report.model_dump_json(include={"diagnostics"}, exclude_none=True)
+
+
 record_plan_artifact = RecordPlanArtifactExecutor()
 record_security_report = RecordSecurityReportExecutor()
 record_cost_report = RecordCostReportExecutor()
@@ -162,54 +224,76 @@ async def documentation_phase_entry(
     await ctx.send_message(_phase_prompt("Documentation", directive))
 
 
-workflow = (
-    WorkflowBuilder(name="TerraformDeploymentWorkflow", description="Multi-agent Terraform orchestration")
-    .set_start_executor(orchestrator_agent)
-    .add_multi_selection_edge_group(
-        orchestrator_agent,
-        [
-            design_phase_entry,
-            coding_phase_entry,
-            plan_phase_entry,
-            review_phase_entry,
-            approval_phase_entry,
-            apply_phase_entry,
-            post_apply_phase_entry,
-            documentation_phase_entry,
-        ],
-        selection_func=_select_phase,
+@lru_cache(maxsize=1)
+def get_workflow() -> Workflow:
+    """Build the workflow graph (and every agent in it) on first use."""
+
+    apply_agent = agent_registry.get("apply_agent")
+    architect_agent = agent_registry.get("architect_agent")
+    coding_agent = agent_registry.get("coding_agent")
+    cost_agent = agent_registry.get("cost_agent")
+    documentation_agent = agent_registry.get("documentation_agent")
+    drift_agent = agent_registry.get("drift_agent")
+    gitops_agent = agent_registry.get("gitops_agent")
+    naming_agent = agent_registry.get("naming_agent")
+    orchestrator_agent = agent_registry.get("orchestrator_agent")
+    plan_agent = agent_registry.get("plan_agent")
+    plan_reviewer_agent = agent_registry.get("plan_reviewer_agent")
+    qa_agent = agent_registry.get("qa_agent")
+    security_agent = agent_registry.get("security_agent")
+    validate_coding_changes = ValidateCodingExecutor(coding_agent.name, gitops_agent.name, orchestrator_agent.name)
+
+    return (
+        WorkflowBuilder(name="TerraformDeploymentWorkflow", description="Multi-agent Terraform orchestration")
+        .set_start_executor(orchestrator_agent)
+        .add_multi_selection_edge_group(
+            orchestrator_agent,
+            [
+                design_phase_entry,
+                coding_phase_entry,
+                plan_phase_entry,
+                review_phase_entry,
+                approval_phase_entry,
+                apply_phase_entry,
+                post_apply_phase_entry,
+                documentation_phase_entry,
+            ],
+            selection_func=_select_phase,
+        )
+        # Design chain
+        .add_edge(design_phase_entry, architect_agent)
+        .add_edge(architect_agent, naming_agent)
+        .add_edge(naming_agent, qa_agent)
+        .add_edge(qa_agent, orchestrator_agent)
+        # Coding chain
+        .add_edge(coding_phase_entry, coding_agent)
+        .add_edge(coding_agent, validate_coding_changes)
+        .add_edge(validate_coding_changes, gitops_agent)
+        .add_edge(validate_coding_changes, coding_agent)
+        .add_edge(validate_coding_changes, orchestrator_agent)
+        .add_edge(gitops_agent, orchestrator_agent)
+        # Plan chain
+        .add_edge(plan_phase_entry, plan_agent)
+        .add_edge(plan_agent, orchestrator_agent)
+        .add_edge(plan_agent, record_plan_artifact)
+        # Review chain
+        .add_edge(review_phase_entry, security_agent)
+        .add_edge(security_agent, cost_agent)
+        .add_edge(security_agent, record_security_report)
+        .add_edge(cost_agent, plan_reviewer_agent)
+        .add_edge(cost_agent, record_cost_report)
+        .add_edge(plan_reviewer_agent, qa_agent)
+        # Approval chain (apply agent handles approvals)
+        .add_edge(approval_phase_entry, apply_agent)
+        # Apply chain (executes terraform apply explicitly)
+        .add_edge(apply_phase_entry, apply_agent)
+        .add_edge(apply_agent, orchestrator_agent)
+        # Post apply -> drift -> docs -> orchestrator
+        .add_edge(post_apply_phase_entry, drift_agent)
+        .add_edge(drift_agent, documentation_agent)
+        .add_edge(drift_agent, record_drift_report)
+        .add_edge(documentation_agent, orchestrator_agent)
+        # Documentation ad-hoc entry
+        .add_edge(documentation_phase_entry, documentation_agent)
+        .build()
     )
-    # Design chain
-    .add_edge(design_phase_entry, architect_agent)
-    .add_edge(architect_agent, naming_agent)
-    .add_edge(naming_agent, qa_agent)
-    .add_edge(qa_agent, orchestrator_agent)
-    # Coding chain
-    .add_edge(coding_phase_entry, coding_agent)
-    .add_edge(coding_agent, gitops_agent)
-    .add_edge(gitops_agent, orchestrator_agent)
-    # Plan chain
-    .add_edge(plan_phase_entry, plan_agent)
-    .add_edge(plan_agent, orchestrator_agent)
-    .add_edge(plan_agent, record_plan_artifact)
-    # Review chain
-    .add_edge(review_phase_entry, security_agent)
-    .add_edge(security_agent, cost_agent)
-    .add_edge(security_agent, record_security_report)
-    .add_edge(cost_agent, plan_reviewer_agent)
-    .add_edge(cost_agent, record_cost_report)
-    .add_edge(plan_reviewer_agent, qa_agent)
-    # Approval chain (apply agent handles approvals)
-    .add_edge(approval_phase_entry, apply_agent)
-    # Apply chain (executes terraform apply explicitly)
-    .add_edge(apply_phase_entry, apply_agent)
-    .add_edge(apply_agent, orchestrator_agent)
-    # Post apply -> drift -> docs -> orchestrator
-    .add_edge(post_apply_phase_entry, drift_agent)
-    .add_edge(drift_agent, documentation_agent)
-    .add_edge(drift_agent, record_drift_report)
-    .add_edge(documentation_agent, orchestrator_agent)
-    # Documentation ad-hoc entry
-    .add_edge(documentation_phase_entry, documentation_agent)
-    .build()
-)
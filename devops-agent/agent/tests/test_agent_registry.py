@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from agent_framework._agents import ChatAgent
+
+from app.agents.registry import AGENT_MODULES, AgentRegistry
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_importing_main_builds_no_agents():
+    probe = "import app.main\nfrom app.agents import agent_registry\nprint(agent_registry.built())"
+    env = {**os.environ, "PYTHONPATH": str(SRC), "TOOLS_AUTO_INSTALL": "false"}
+    proc = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, env=env)
+    assert proc.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_registry_builds_each_agent_once():
+    registry = AgentRegistry(AGENT_MODULES)
+    assert registry.built() == []
+    assert "cost_agent" in registry.names()
+
+    agent = registry.get("cost_agent")
+    assert isinstance(agent, ChatAgent)
+    assert registry.get("cost_agent") is agent
+    assert registry.built() == ["cost_agent"]
+
+
+def test_package_attribute_is_the_agent_not_the_submodule():
+    from app.agents import agent_registry, qa_agent
+
+    assert qa_agent is agent_registry.get("qa_agent")
+    assert qa_agent.name == "QAAgent"
+    # Building it imported app.agents.qa_agent, but that binding does not shadow the agent.
+    assert "qa_agent" not in vars(sys.modules["app.agents"])
+    assert sys.modules["app.agents"].qa_agent is qa_agent
@@ -0,0 +1,118 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.config import settings
+from app.services.audit_log import AuditLogService, build_event
+
+
+def _ticket() -> str:
+    return f"ticket-{uuid4().hex}"
+
+
+def test_batched_events_are_flushed_on_stop():
+    service = AuditLogService()
+    ticket_id = _ticket()
+
+    async def _run():
+        service.start()
+        for index in range(250):
+            await service.record_event(build_event(ticket_id, "tester", "human", "step", index=str(index)))
+        await service.stop()
+        return await service.list_events(ticket_id, limit=1000)
+
+    page = asyncio.run(_run())
+    assert len(page.items) == 250
+    assert page.next_cursor is None
+    assert service.dropped_events == 0
+
+
+def test_list_events_paginates_in_time_order():
+    service = AuditLogService()
+    ticket_id = _ticket()
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    async def _seed():
+        for minute in (3, 1, 4, 0, 2):
+            event = build_event(ticket_id, "tester", "human", f"action-{minute}")
+            await service.record_event(event.model_copy(update={"timestamp": base + timedelta(minutes=minute)}))
+
+    asyncio.run(_seed())
+    first = asyncio.run(service.list_events(ticket_id, limit=2))
+    second = asyncio.run(service.list_events(ticket_id, limit=2, cursor=first.next_cursor))
+    third = asyncio.run(service.list_events(ticket_id, limit=2, cursor=second.next_cursor))
+
+    actions = [event.action for page in (first, second, third) for event in page.items]
+    assert actions == [f"action-{minute}" for minute in range(5)]
+    assert third.next_cursor is None
+
+    windowed = asyncio.run(
+        service.list_events(ticket_id, since=base + timedelta(minutes=1), until=base + timedelta(minutes=3))
+    )
+    assert [event.action for event in windowed.items] == ["action-1", "action-2"]
+
+
+def test_drop_newest_policy_counts_overflow(monkeypatch):
+    monkeypatch.setattr(settings, "audit_queue_size", 2)
+    monkeypatch.setattr(settings, "audit_overflow_policy", "drop_newest")
+    service = AuditLogService()
+    ticket_id = _ticket()
+
+    async def _run():
+        service.start()
+        # Non-blocking enqueues never yield, so the flusher cannot drain the queue mid-burst.
+        for _ in range(5):
+            await service.record_event(build_event(ticket_id, "tester", "human", "burst"))
+        await service.stop()
+
+    asyncio.run(_run())
+    assert service.dropped_events > 0
+    stored = asyncio.run(service.list_events(ticket_id))
+    assert len(stored.items) == 5 - service.dropped_events
+
+
+def test_archive_moves_old_events_to_compressed_file(tmp_path):
+    service = AuditLogService()
+    ticket_id = _ticket()
+    old = build_event(ticket_id, "tester", "human", "old")
+    old = old.model_copy(update={"timestamp": datetime(2000, 1, 1, tzinfo=timezone.utc)})
+    recent = build_event(ticket_id, "tester", "human", "recent")
+
+    async def _run():
+        await service.record_event(old)
+        await service.record_event(recent)
+        return await service.archive_events(older_than=datetime(2001, 1, 1, tzinfo=timezone.utc), archive_dir=tmp_path)
+
+    path = asyncio.run(_run())
+    assert path is not None and path.parent == tmp_path
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        archived = [json.loads(line) for line in handle]
+    assert ticket_id in {event["ticket_id"] for event in archived}
+
+    remaining = asyncio.run(service.list_events(ticket_id))
+    assert [event.action for event in remaining.items] == ["recent"]
+
+
+def test_stop_lets_a_running_archive_pass_finish(monkeypatch):
+    service = AuditLogService()
+    passes = []
+
+    async def _slow_archive(**_kwargs):
+        passes.append("started")
+        await asyncio.sleep(0.05)
+        passes.append("finished")
+
+    monkeypatch.setattr(service, "archive_events", _slow_archive)
+
+    async def _run():
+        service.start()
+        archiver = service._archiver
+        await asyncio.sleep(0)
+        await service.stop()
+        return archiver
+
+    archiver = asyncio.run(_run())
+    assert passes == ["started", "finished"]
+    assert archiver.done() and not archiver.cancelled()
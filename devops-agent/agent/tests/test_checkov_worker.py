@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from app.services.checkov_worker import CheckovWorker, CheckovWorkerError
+
+_FAKE_WORKER = textwrap.dedent(
+    """
+    import json, os, sys, time
+    rss = int(sys.argv[1])
+    for line in sys.stdin:
+        args = json.loads(line)["args"]
+        if args == ["crash"]:
+            sys.exit(1)
+        if args == ["hang"]:
+            time.sleep(30)
+        reply = {"exit_code": 0, "stdout": json.dumps({"args": args, "pid": os.getpid()}), "rss_mb": rss}
+        print(json.dumps(reply), flush=True)
+    """
+)
+
+
+def _worker(tmp_path, *, rss_mb=10, **kwargs) -> CheckovWorker:
+    script = tmp_path / "fake_worker.py"
+    script.write_text(_FAKE_WORKER)
+    return CheckovWorker([sys.executable, str(script), str(rss_mb)], **kwargs)
+
+
+def _pid(worker: CheckovWorker, args: list[str]) -> int:
+    exit_code, stdout = asyncio.run(worker.run(args))
+    assert exit_code == 0
+    payload = json.loads(stdout)
+    assert payload["args"] == args
+    return payload["pid"]
+
+
+def test_worker_is_reused_then_recycled_after_max_jobs(tmp_path):
+    worker = _worker(tmp_path, max_jobs=2, max_rss_mb=100)
+    try:
+        first, second, third = (_pid(worker, ["-d", f"dir-{i}"]) for i in range(3))
+        assert first == second
+        assert third != first
+    finally:
+        worker.close()
+
+
+def test_worker_is_recycled_past_memory_threshold(tmp_path):
+    worker = _worker(tmp_path, rss_mb=2048, max_jobs=100, max_rss_mb=1024)
+    try:
+        assert _pid(worker, ["-d", "a"]) != _pid(worker, ["-d", "b"])
+    finally:
+        worker.close()
+
+
+def test_dead_or_hung_worker_raises_and_restarts(tmp_path):
+    worker = _worker(tmp_path, max_jobs=100, max_rss_mb=100, timeout=0.5)
+    try:
+        with pytest.raises(CheckovWorkerError):
+            asyncio.run(worker.run(["crash"]))
+        with pytest.raises(CheckovWorkerError):
+            asyncio.run(worker.run(["hang"]))
+        assert _pid(worker, ["-d", "ok"]) > 0
+    finally:
+        worker.close()
+
+
+def test_real_worker_scans_through_checkov(tmp_path, monkeypatch):
+    pytest.importorskip("checkov")
+    src = Path(__file__).resolve().parents[1] / "src"
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [str(src), os.environ.get("PYTHONPATH")])))
+    module = tmp_path / "main.tf"
+    module.write_text(
+        textwrap.dedent(
+            """
+            resource "azurerm_storage_account" "sa" {
+              name                      = "insecure"
+              resource_group_name       = "rg"
+              location                  = "westeurope"
+              account_tier              = "Standard"
+              account_replication_type  = "LRS"
+              enable_https_traffic_only = false
+            }
+            """
+        )
+    )
+    worker = CheckovWorker(max_jobs=100, max_rss_mb=1_000_000, timeout=300)
+    try:
+        exit_code, stdout = asyncio.run(
+            worker.run(["--framework", "terraform", "-f", str(module), "-o", "json", "--soft-fail"])
+        )
+    finally:
+        worker.close()
+    assert exit_code == 0
+    # Only the JSON report reaches the protocol channel; checkov's other output is kept out of it.
+    failed = json.loads(stdout)["results"]["failed_checks"]
+    assert any(check["resource"] == "azurerm_storage_account.sa" for check in failed)
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Constraints, CostComponent, CostReport, DeploymentTicket, GitReference
+from app.services.artifact_store import artifact_store
+from app.services.cost_rollup import resource_type_of
+from app.services.ticket_store import ticket_store
+
+
+def _ticket(repo_url: str, environment: str = "prod") -> DeploymentTicket:
+    now = datetime.now(timezone.utc)
+    ticket = DeploymentTicket(
+        ticket_id=str(uuid4()),
+        thread_id=str(uuid4()),
+        status="plan_pending",
+        requested_by="tester",
+        environment=environment,
+        target_cloud="azure",
+        terraform_workspace=environment,
+        git=GitReference(repo_url=repo_url, branch="main"),
+        intent_summary="rollup",
+        constraints=Constraints(),
+        current_stage="cost",
+        created_at=now,
+        updated_at=now,
+    )
+    asyncio.run(ticket_store.upsert_ticket(ticket))
+    return ticket
+
+
+def _report(ticket_id: str, day: int, **costs: float) -> CostReport:
+    return CostReport(
+        ticket_id=ticket_id,
+        plan_id=f"plan-{uuid4().hex}",
+        timestamp_utc=datetime(2024, 4, day, 12, tzinfo=timezone.utc),
+        total_monthly_cost=sum(costs.values()),
+        delta_monthly_cost=sum(costs.values()),
+        components=[
+            CostComponent(name=address, monthly_cost=cost, delta_monthly_cost=cost)
+            for address, cost in costs.items()
+        ],
+    )
+
+
+def test_resource_type_of_handles_modules_and_indexes():
+    assert resource_type_of('module.net["a"].azurerm_subnet.this[0]') == "azurerm_subnet"
+    assert resource_type_of("azurerm_linux_virtual_machine.vm") == "azurerm_linux_virtual_machine"
+
+
+def test_rollup_updates_incrementally_and_replaces_reestimates():
+    repo_url = f"https://github.com/example/{uuid4().hex}"
+    first, second = _ticket(repo_url), _ticket(repo_url)
+    vm, sa = "azurerm_linux_virtual_machine.vm", "azurerm_storage_account.sa"
+
+    asyncio.run(artifact_store.save_cost_report(_report(first.ticket_id, 1, **{vm: 70.0, sa: 20.0})))
+    # Re-estimating the same ticket replaces its earlier contribution.
+    asyncio.run(artifact_store.save_cost_report(_report(first.ticket_id, 2, **{vm: 140.0})))
+    asyncio.run(artifact_store.save_cost_report(_report(second.ticket_id, 20, **{vm: 30.0})))
+
+    client = TestClient(app)
+    daily = client.get("/api/costs/rollup", params={"project_id": repo_url}).json()
+    points = [
+        (point["period_start"], point["resource_type"], point["monthly_cost"], point["delta_monthly_cost"])
+        for point in daily
+    ]
+    assert points == [
+        ("2024-04-02", "azurerm_linux_virtual_machine", 140.0, 140.0),
+        ("2024-04-20", "azurerm_linux_virtual_machine", 30.0, 30.0),
+    ]
+    assert daily[-1]["cumulative_delta_monthly_cost"] == 170.0
+
+    monthly = client.get(
+        "/api/costs/rollup",
+        params={"project_id": repo_url, "environment": "prod", "granularity": "month", "since": "2024-04-01"},
+    ).json()
+    assert len(monthly) == 1
+    assert monthly[0]["period_start"] == "2024-04-01"
+    assert monthly[0]["report_count"] == 2
+    # The latest report in the month prices the project; deltas add up.
+    assert monthly[0]["monthly_cost"] == 30.0
+    assert monthly[0]["delta_monthly_cost"] == 170.0
+
+
+def test_rollup_monthly_cost_is_a_level_not_a_sum_of_tickets():
+    repo_url = f"https://github.com/example/{uuid4().hex}"
+    first, second = _ticket(repo_url), _ticket(repo_url)
+    vm, sa = "azurerm_linux_virtual_machine.vm", "azurerm_storage_account.sa"
+
+    # Both tickets price the whole project; only the second one adds the storage account.
+    asyncio.run(artifact_store.save_cost_report(_report(first.ticket_id, 3, **{vm: 70.0})))
+    asyncio.run(artifact_store.save_cost_report(_report(second.ticket_id, 3, **{vm: 70.0, sa: 20.0})))
+
+    client = TestClient(app)
+    for granularity in ("day", "month"):
+        series = client.get("/api/costs/rollup", params={"project_id": repo_url, "granularity": granularity}).json()
+        assert {point["resource_type"]: point["monthly_cost"] for point in series} == {
+            "azurerm_linux_virtual_machine": 70.0,
+            "azurerm_storage_account": 20.0,
+        }
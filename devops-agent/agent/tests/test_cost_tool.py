@@ -0,0 +1,226 @@
+import json
+import subprocess
+
+import pytest
+
+from app.services.plan_store import PlanBlobStore
+from app.services.pricing_snapshot import PriceKey, PricingSnapshot, import_export
+from app.tools import cost_tool
+from app.tools.cost_tool import CostEstimateRequest, CostEstimationError, PriceCache, estimate_cost
+
+_PRICES = {"azurerm_storage_account": 20.0, "azurerm_linux_virtual_machine": 70.0}
+
+
+def _plan(tmp_path, vm_size="Standard_B2s"):
+    plan = {
+        "resource_changes": [
+            {
+                "address": "azurerm_storage_account.sa",
+                "mode": "managed",
+                "type": "azurerm_storage_account",
+                "change": {"actions": ["create"], "before": None, "after": {"account_tier": "Standard"}},
+            },
+            {
+                "address": "azurerm_linux_virtual_machine.vm",
+                "mode": "managed",
+                "type": "azurerm_linux_virtual_machine",
+                "change": {"actions": ["create"], "before": None, "after": {"size": vm_size}},
+            },
+            {"address": "data.azurerm_client_config.current", "mode": "data", "type": "azurerm_client_config"},
+        ],
+        "planned_values": {"root_module": {"resources": []}},
+    }
+    (tmp_path / "plan-t-1.json").write_text(json.dumps(plan))
+    return tmp_path / "plan-t-1.tfplan"
+
+
+def _fake_infracost(calls):
+    def _run(cmd, **_):
+        if cmd[1:] == ["--version"]:
+            return subprocess.CompletedProcess(cmd, 0, stdout="Infracost v0.10.42\n", stderr="")
+        plan = json.loads(open(cmd[2].split("=", 1)[1]).read())
+        addresses = [change["address"] for change in plan["resource_changes"]]
+        calls.append(addresses)
+        resources = [{"name": address, "monthlyCost": str(_PRICES[address.split(".")[0]])} for address in addresses]
+        payload = {"currency": "USD", "projects": [{"breakdown": {"resources": resources}, "diff": {"resources": resources}}]}
+        return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(payload), stderr="")
+
+    return _run
+
+
+def test_plan_prices_are_cached_per_resource_change(tmp_path, monkeypatch):
+    calls: list[list[str]] = []
+    monkeypatch.setattr(cost_tool.subprocess, "run", _fake_infracost(calls))
+    monkeypatch.setattr(cost_tool, "price_cache", PriceCache(tmp_path / "prices"))
+    cost_tool._infracost_version.cache_clear()
+    request = CostEstimateRequest(ticket_id="t-1", plan_id="p-1", directory=str(tmp_path), plan_json_path=str(_plan(tmp_path)))
+
+    first = estimate_cost(request)
+    assert calls == [["azurerm_storage_account.sa", "azurerm_linux_virtual_machine.vm"]]
+    assert first.total_monthly_cost == 90.0
+    assert first.delta_monthly_cost == 90.0
+
+    second = estimate_cost(request)
+    assert len(calls) == 1
+    assert second.components == first.components
+
+    _plan(tmp_path, vm_size="Standard_D4s_v5")
+    estimate_cost(request)
+    assert calls[-1] == ["azurerm_linux_virtual_machine.vm"]
+    cost_tool._infracost_version.cache_clear()
+
+
+def test_snapshot_prices_plan_when_infracost_is_missing(tmp_path, monkeypatch):
+    export = {
+        "Items": [
+            {
+                "serviceName": "Virtual Machines",
+                "armSkuName": "Standard_B2s",
+                "armRegionName": "westeurope",
+                "productName": "Virtual Machines BS Series",
+                "meterName": "B2s",
+                "unitOfMeasure": "1 Hour",
+                "retailPrice": 0.05,
+                "currencyCode": "USD",
+                "type": "Consumption",
+            },
+            {
+                "serviceName": "Virtual Machines",
+                "armSkuName": "Standard_B2s",
+                "armRegionName": "westeurope",
+                "productName": "Virtual Machines BS Series",
+                "meterName": "B2s Spot",
+                "unitOfMeasure": "1 Hour",
+                "retailPrice": 0.01,
+                "currencyCode": "USD",
+                "type": "Consumption",
+            },
+        ]
+    }
+    (tmp_path / "export.json").write_text(json.dumps(export))
+    snapshot_path = tmp_path / "pricing.db"
+    assert import_export(tmp_path / "export.json", snapshot_path, version="2024-06") == 1
+    snapshot = PricingSnapshot(snapshot_path)
+    found = snapshot.lookup_many(
+        [PriceKey("Virtual Machines", "Standard_B2s", "westeurope"), PriceKey("Virtual Machines", "Standard_D2s", "westeurope")]
+    )
+    assert [price.hourly_price for price in found.values()] == [0.05]
+    snapshot.close()
+
+    plan_path = _plan(tmp_path)
+    plan = json.loads((tmp_path / "plan-t-1.json").read_text())
+    plan["resource_changes"][1]["change"]["after"]["location"] = "West Europe"
+    (tmp_path / "plan-t-1.json").write_text(json.dumps(plan))
+
+    def _missing(cmd, **_):
+        raise FileNotFoundError(cmd[0])
+
+    monkeypatch.setattr(cost_tool.subprocess, "run", _missing)
+    monkeypatch.setattr(cost_tool.settings, "pricing_snapshot_path", str(snapshot_path))
+    cost_tool._infracost_version.cache_clear()
+    request = CostEstimateRequest(ticket_id="t-1", plan_id="p-1", directory=str(tmp_path), plan_json_path=str(plan_path))
+
+    report = estimate_cost(request)
+
+    assert report.pricing_snapshot_version == "2024-06"
+    assert [component.name for component in report.components] == ["azurerm_linux_virtual_machine.vm"]
+    assert report.total_monthly_cost == report.delta_monthly_cost == round(0.05 * 730, 4)
+    cost_tool._infracost_version.cache_clear()
+
+
+def test_unpriced_resources_and_a_missing_binary_are_not_cached(tmp_path, monkeypatch):
+    calls: list[list[str]] = []
+    priced = _fake_infracost(calls)
+    installed = False
+
+    def _run(cmd, **kwargs):
+        if not installed:
+            raise FileNotFoundError(cmd[0])
+        result = priced(cmd, **kwargs)
+        if cmd[1:] != ["--version"] and len(calls) == 1:
+            # A bad first run: infracost answers without pricing anything.
+            result.stdout = json.dumps({"currency": "USD", "projects": []})
+        return result
+
+    monkeypatch.setattr(cost_tool.subprocess, "run", _run)
+    monkeypatch.setattr(cost_tool, "price_cache", PriceCache(tmp_path / "prices"))
+    monkeypatch.setattr(cost_tool.settings, "pricing_snapshot_path", None)
+    cost_tool._infracost_version.cache_clear()
+    request = CostEstimateRequest(ticket_id="t-1", plan_id="p-1", directory=str(tmp_path), plan_json_path=str(_plan(tmp_path)))
+
+    with pytest.raises(CostEstimationError, match="no pricing snapshot"):
+        estimate_cost(request)
+    installed = True  # the background tool install finished
+    assert estimate_cost(request).components == []
+    assert estimate_cost(request).total_monthly_cost == 90.0
+    assert len(calls) == 2 and not any(len(addresses) != 2 for addresses in calls)
+    cost_tool._infracost_version.cache_clear()
+
+
+def _stored_plan(tmp_path, monkeypatch):
+    item = {
+        "serviceName": "Virtual Machines",
+        "armSkuName": "Standard_B2s",
+        "armRegionName": "westeurope",
+        "productName": "Virtual Machines BS Series",
+        "meterName": "B2s",
+        "unitOfMeasure": "1 Hour",
+        "retailPrice": 0.05,
+        "currencyCode": "USD",
+        "type": "Consumption",
+    }
+    (tmp_path / "export.json").write_text(json.dumps({"Items": [item]}))
+    import_export(tmp_path / "export.json", tmp_path / "pricing.db", version="2024-06")
+    plan_file = _plan(tmp_path)
+    plan = json.loads((tmp_path / "plan-t-1.json").read_text())
+    plan["resource_changes"][1]["change"]["after"]["location"] = "westeurope"
+    (tmp_path / "plan-t-1.json").write_text(json.dumps(plan))
+    plan_file.write_bytes(b"PK")
+    store = PlanBlobStore(tmp_path / "plans")
+    store.put_plan("t-1", "p-1", plan_file, tmp_path / "plan-t-1.json", tmp_path)
+    monkeypatch.setattr(cost_tool, "plan_store", store)
+    monkeypatch.setattr("app.services.plan_json.plan_store", store)
+    return CostEstimateRequest(ticket_id="t-1", plan_id="p-1", directory=str(tmp_path))
+
+
+def test_directory_estimate_prices_the_stored_plan_offline_or_fails(tmp_path, monkeypatch):
+    request = _stored_plan(tmp_path, monkeypatch)
+
+    def _missing(cmd, **_):
+        raise FileNotFoundError(cmd[0])
+
+    monkeypatch.setattr(cost_tool.subprocess, "run", _missing)
+    monkeypatch.setattr(cost_tool.settings, "pricing_snapshot_path", None)
+
+    # No silent $0 report when nothing can price the change.
+    with pytest.raises(CostEstimationError, match="no pricing snapshot"):
+        estimate_cost(request)
+
+    monkeypatch.setattr(cost_tool.settings, "pricing_snapshot_path", str(tmp_path / "pricing.db"))
+    report = estimate_cost(request)
+    assert report.pricing_snapshot_version == "2024-06"
+    assert report.total_monthly_cost == round(0.05 * 730, 4)
+    with pytest.raises(CostEstimationError, match="not in the plan store"):
+        estimate_cost(request.model_copy(update={"plan_id": "p-2"}))
+
+
+def test_directory_estimate_falls_back_when_infracost_fails_and_skips_it_for_snapshot_source(tmp_path, monkeypatch):
+    request = _stored_plan(tmp_path, monkeypatch)
+    calls: list[list[str]] = []
+
+    def _unreachable(cmd, **_):
+        calls.append(cmd)
+        raise subprocess.CalledProcessError(1, cmd, stderr="failed to reach the Cloud Pricing API")
+
+    monkeypatch.setattr(cost_tool.subprocess, "run", _unreachable)
+    monkeypatch.setattr(cost_tool.settings, "pricing_snapshot_path", str(tmp_path / "pricing.db"))
+    assert estimate_cost(request).pricing_snapshot_version == "2024-06"
+    assert len(calls) == 1
+
+    monkeypatch.setattr(cost_tool.settings, "cost_pricing_source", "infracost")
+    with pytest.raises(CostEstimationError, match="Cloud Pricing API"):
+        estimate_cost(request)
+
+    monkeypatch.setattr(cost_tool.settings, "cost_pricing_source", "snapshot")
+    assert estimate_cost(request).total_monthly_cost == round(0.05 * 730, 4)
+    assert len(calls) == 2
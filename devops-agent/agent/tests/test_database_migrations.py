@@ -0,0 +1,74 @@
+import asyncio
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.services import database as database_module
+from app.services.migrations import MIGRATIONS, run_migrations
+
+
+def _sqlite_urls(tmp_path):
+    path = tmp_path / "migrations.db"
+    return f"sqlite+aiosqlite:///{path}", f"sqlite:///{path}"
+
+
+def test_run_migrations_creates_schema_and_records_versions(tmp_path):
+    async_url, sync_url = _sqlite_urls(tmp_path)
+    applied = asyncio.run(run_migrations(async_url))
+    assert applied == [migration.version for migration in MIGRATIONS]
+
+    inspector = inspect(create_engine(sync_url))
+    tables = set(inspector.get_table_names())
+    assert {"tickets", "artifacts", "projects", "workspace_locks", "audit_events", "schema_migrations"} <= tables
+
+    assert asyncio.run(run_migrations(async_url)) == []
+
+
+def test_run_migrations_upgrades_legacy_projects_table(tmp_path):
+    async_url, sync_url = _sqlite_urls(tmp_path)
+    engine = create_engine(sync_url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE projects (project_id TEXT PRIMARY KEY, name TEXT NOT NULL, description TEXT,"
+                " repo_url TEXT NOT NULL, workspace_dir TEXT NOT NULL, default_environment TEXT NOT NULL,"
+                " default_branch TEXT NOT NULL, metadata JSON, created_at DATETIME NOT NULL,"
+                " updated_at DATETIME NOT NULL)"
+            )
+        )
+        for project_id, repo_url, created_at in [
+            ("infra", "https://github.com/Acme/Infra.git", "2024-01-01"),
+            ("infra-copy", "git@github.com:acme/infra", "2024-02-01"),
+        ]:
+            conn.execute(
+                text(
+                    "INSERT INTO projects VALUES (:id, :id, NULL, :url, '/w', 'dev', 'main', NULL, :at, :at)"
+                ),
+                {"id": project_id, "url": repo_url, "at": created_at},
+            )
+
+    asyncio.run(run_migrations(async_url))
+
+    columns = {col["name"] for col in inspect(engine).get_columns("projects")}
+    assert {"project_type", "repo_identity"} <= columns
+    with engine.connect() as conn:
+        identities = dict(conn.execute(text("SELECT project_id, repo_identity FROM projects")).all())
+    assert identities == {"infra": "github.com/acme/infra", "infra-copy": None}
+    unique = [index for index in inspect(engine).get_indexes("projects") if index["unique"]]
+    assert [index["column_names"] for index in unique] == [["repo_identity"]]
+
+
+def test_async_database_url_normalises_drivers():
+    assert database_module._async_database_url("sqlite:///./agent.db") == "sqlite+aiosqlite:///./agent.db"
+    assert database_module._async_database_url("postgres://u:p@db/agent") == "postgresql+asyncpg://u:p@db/agent"
+    assert (
+        database_module._async_database_url("postgresql+asyncpg://u:p@db/agent")
+        == "postgresql+asyncpg://u:p@db/agent"
+    )
+
+
+def test_database_options_only_apply_to_postgres(monkeypatch):
+    monkeypatch.setattr(database_module.settings, "database_pool_max_size", 25)
+    assert database_module._database_options("sqlite+aiosqlite:///./agent.db") == {}
+    options = database_module._database_options("postgresql+asyncpg://u:p@db/agent")
+    assert options["max_size"] == 25
+    assert {"min_size", "statement_cache_size", "timeout", "command_timeout"} <= set(options)
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import stat
+from pathlib import Path
+
+import pytest
+from git import Repo
+
+from app.models import FileEdit, GitOpsChangeRequest
+from app.services.git_bulk_commit import BulkCommitError, bulk_commit
+from app.services.worktree_manager import WorktreeManager
+from app.tools import gitops_tool
+from app.tools.gitops_tool import GitOpsError
+
+
+def _clone(tmp_path):
+    root = tmp_path / "gitops"
+    repo = Repo.init(root, initial_branch="main")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Test")
+        writer.set_value("user", "email", "test@example.com")
+    (root / "main.tf").write_text("# base\n")
+    (root / "old.tf").write_text("# old\n")
+    (root / "plan.sh").write_text("#!/bin/sh\n")
+    os.chmod(root / "plan.sh", 0o755)
+    repo.index.add(["main.tf", "old.tf", "plan.sh"])
+    repo.index.commit("base")
+    return repo
+
+
+def test_bulk_commit_writes_objects_without_touching_the_working_tree(tmp_path):
+    repo = _clone(tmp_path)
+    edits = [
+        FileEdit(path="main.tf", content="# more\n", mode="append"),
+        FileEdit(path="old.tf", content="", mode="delete"),
+        FileEdit(path="plan.sh", content="#!/bin/sh\nterraform plan\n"),
+        FileEdit(path="modules/new dir/vars.tf", content='variable "x" {}\n'),
+    ]
+
+    sha = bulk_commit(repo.working_tree_dir, "tkt-1/change", "main", edits, "bulk")
+
+    commit = repo.commit("tkt-1/change")
+    assert commit.hexsha == sha and commit.parents[0] == repo.commit("main")
+    assert commit.author.name == "Test" and commit.message.strip() == "bulk"
+    assert (commit.tree / "main.tf").data_stream.read() == b"# base\n# more\n"
+    assert (commit.tree / "plan.sh").mode == 0o100755
+    assert (commit.tree / "modules/new dir/vars.tf").data_stream.read() == b'variable "x" {}\n'
+    assert "old.tf" not in [blob.path for blob in commit.tree.traverse()]
+    # The shared clone stays on main with its files as they were.
+    assert repo.active_branch.name == "main" and not repo.is_dirty(untracked_files=True)
+    assert Path(repo.working_tree_dir, "old.tf").exists()
+
+    with pytest.raises(BulkCommitError):
+        bulk_commit(repo.working_tree_dir, "tkt-1/change", "no-such-branch", edits, "bulk")
+
+
+def test_bulk_commit_normalizes_edit_paths_and_rejects_escaping_ones(tmp_path):
+    repo = _clone(tmp_path)
+    edits = [
+        FileEdit(path="./main.tf", content="# dotted\n"),
+        FileEdit(path="modules//net/./main.tf", content="# net\n"),
+    ]
+
+    bulk_commit(repo.working_tree_dir, "tkt-1/paths", "main", edits, "paths")
+
+    tree = repo.commit("tkt-1/paths").tree
+    assert sorted(blob.path for blob in tree.traverse() if blob.type == "blob") == [
+        "main.tf",
+        "modules/net/main.tf",
+        "old.tf",
+        "plan.sh",
+    ]
+    assert (tree / "main.tf").data_stream.read() == b"# dotted\n"
+    repo.git.fsck("--strict")
+
+    for path in ("/etc/passwd", "../outside.tf", "modules/../../x.tf", "", ".", "dir/", ".git/config"):
+        with pytest.raises(BulkCommitError):
+            bulk_commit(repo.working_tree_dir, "tkt-1/bad", "main", [FileEdit(path=path, content="x")], "bad")
+    assert not list(Path(repo.git_dir).glob("fast_import_crash_*"))
+    assert "tkt-1/bad" not in [head.name for head in repo.heads]
+
+
+def test_apply_git_changes_updates_the_worktree_or_commits_directly(tmp_path, monkeypatch):
+    repo = _clone(tmp_path)
+    monkeypatch.setattr(gitops_tool, "worktree_manager", WorktreeManager(tmp_path / "worktrees"))
+
+    def _request(ticket: str, update_working_tree: bool) -> GitOpsChangeRequest:
+        return GitOpsChangeRequest(
+            ticket_id=ticket,
+            repo=str(repo.working_tree_dir),
+            root_path=".",
+            base_branch="main",
+            preferred_branch_name=f"{ticket}/change",
+            file_edits=[
+                FileEdit(path="main.tf", content="# edited\n"),
+                FileEdit(path="old.tf", content="", mode="delete"),
+            ],
+            update_working_tree=update_working_tree,
+        )
+
+    materialized = asyncio.run(gitops_tool.apply_git_changes(_request("tkt-1", True)))
+    worktree = Repo(gitops_tool.worktree_manager.path_for(repo.working_tree_dir, "tkt-1"))
+    assert materialized.commit_sha == worktree.head.commit.hexsha == repo.commit("tkt-1/change").hexsha
+    assert not worktree.is_dirty(untracked_files=True)
+    assert Path(worktree.working_tree_dir, "main.tf").read_text() == "# edited\n"
+    assert not Path(worktree.working_tree_dir, "old.tf").exists()
+    assert stat.S_IMODE(os.stat(Path(worktree.working_tree_dir, "plan.sh")).st_mode) & 0o100
+
+    direct = asyncio.run(gitops_tool.apply_git_changes(_request("tkt-2", False)))
+    assert direct.commit_sha == repo.commit("tkt-2/change").hexsha
+    assert not gitops_tool.worktree_manager.path_for(repo.working_tree_dir, "tkt-2").exists()
+    assert repo.active_branch.name == "main" and not repo.is_dirty(untracked_files=True)
+
+    # tkt-1's branch is checked out in its worktree; committing under it would desync that checkout.
+    with pytest.raises(GitOpsError):
+        asyncio.run(gitops_tool.apply_git_changes(_request("tkt-1", False)))
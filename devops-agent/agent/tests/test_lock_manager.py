@@ -0,0 +1,132 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.database import database, locks_table
+from app.services.lock_manager import LockManager, LockTimeoutError
+from app.tools import terraform_cli_tool
+from app.tools.terraform_cli_tool import ApplyRequest, CommandResult, run_terraform_apply
+
+
+def _workspace() -> str:
+    return f"/workspaces/{uuid4().hex}"
+
+
+def test_concurrent_acquire_has_single_winner():
+    manager = LockManager()
+    workspace = _workspace()
+
+    async def _race():
+        return await asyncio.gather(*(manager.acquire_lock(workspace, f"ticket-{i}", "plan") for i in range(8)))
+
+    locks = asyncio.run(_race())
+    winners = [lock for lock in locks if lock is not None]
+    assert len(winners) == 1
+    active = asyncio.run(manager.get_active_lock(workspace))
+    assert active is not None and active.lock_id == winners[0].lock_id
+
+
+def test_release_and_reacquire_increments_fencing_token():
+    manager = LockManager()
+    workspace = _workspace()
+    first = asyncio.run(manager.acquire_lock(workspace, "ticket-a", "plan"))
+    asyncio.run(manager.release_lock(first.lock_id))
+    assert asyncio.run(manager.get_active_lock(workspace)) is None
+
+    second = asyncio.run(manager.acquire_lock(workspace, "ticket-b", "apply"))
+    assert second.fencing_token == first.fencing_token + 1
+    assert asyncio.run(manager.is_current_holder(workspace, second.fencing_token)) is True
+    assert asyncio.run(manager.is_current_holder(workspace, first.fencing_token)) is False
+    assert asyncio.run(manager.renew_lock(first)) is None
+
+
+def test_expired_lease_can_be_taken_over():
+    manager = LockManager()
+    workspace = _workspace()
+    stale = asyncio.run(manager.acquire_lock(workspace, "crashed-worker", "plan"))
+    asyncio.run(
+        database.execute(
+            locks_table.update().where(locks_table.c.lock_id == stale.lock_id).values(expires_at=stale.locked_at)
+        )
+    )
+    assert asyncio.run(manager.get_active_lock(workspace)) is None
+    fresh = asyncio.run(manager.acquire_lock(workspace, "ticket-b", "plan"))
+    assert fresh is not None and fresh.fencing_token > stale.fencing_token
+
+
+def test_acquire_wait_times_out_while_held():
+    manager = LockManager()
+    workspace = _workspace()
+    asyncio.run(manager.acquire_lock(workspace, "ticket-a", "apply"))
+    with pytest.raises(LockTimeoutError, match="ticket-a"):
+        asyncio.run(manager.acquire_lock_wait(workspace, "ticket-b", "plan", timeout=0.2, poll_interval=0.05))
+
+
+def test_hold_renews_lease_and_releases():
+    manager = LockManager(ttl_seconds=1)
+    workspace = _workspace()
+
+    async def _hold():
+        async with manager.hold(workspace, "ticket-a", "plan") as lease:
+            first_expiry = lease.lock.expires_at
+            await asyncio.sleep(0.5)
+            assert lease.lock.expires_at > first_expiry
+            assert not lease.lost.is_set()
+        return await manager.get_active_lock(workspace)
+
+    assert asyncio.run(_hold()) is None
+
+
+def test_shared_readers_coexist_and_block_writers():
+    manager = LockManager()
+    workspace = _workspace()
+    first = asyncio.run(manager.acquire_lock(workspace, "drift-1", "drift", mode="shared"))
+    second = asyncio.run(manager.acquire_lock(workspace, "drift-2", "drift", mode="shared"))
+    assert first is not None and second is not None
+    assert second.fencing_token > first.fencing_token
+    assert asyncio.run(manager.acquire_lock(workspace, "apply-1", "apply")) is None
+
+    asyncio.run(manager.release_lock(first.lock_id))
+    asyncio.run(manager.release_lock(second.lock_id))
+    assert asyncio.run(manager.acquire_lock(workspace, "apply-1", "apply")) is not None
+    assert asyncio.run(manager.acquire_lock(workspace, "drift-3", "drift", mode="shared")) is None
+
+
+def test_queued_writer_takes_precedence_over_new_readers():
+    manager = LockManager()
+    workspace = _workspace()
+    reader = asyncio.run(manager.acquire_lock(workspace, "drift-1", "drift", mode="shared"))
+    writer_id = "writer-" + uuid4().hex
+    assert asyncio.run(manager.acquire_lock(workspace, "apply-1", "apply", lock_id=writer_id, enqueue=True)) is None
+
+    assert asyncio.run(manager.acquire_lock(workspace, "drift-2", "drift", mode="shared")) is None
+
+    response = TestClient(app).get("/api/locks/")
+    assert response.status_code == 200
+    view = next(item for item in response.json() if item["workspace"] == workspace)
+    assert [lock["ticket_id"] for lock in view["holders"]] == ["drift-1"]
+    assert [lock["ticket_id"] for lock in view["waiting"]] == ["apply-1"]
+
+    asyncio.run(manager.release_lock(reader.lock_id))
+    granted = asyncio.run(manager.acquire_lock(workspace, "apply-1", "apply", lock_id=writer_id, enqueue=True))
+    assert granted is not None and granted.lock_id == writer_id and granted.status == "held"
+
+
+def test_apply_fails_when_workspace_locked(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        terraform_cli_tool, "run_terraform_command", lambda cmd, cwd: calls.append(cmd) or CommandResult("", "")
+    )
+    monkeypatch.setattr(terraform_cli_tool.settings, "tf_lock_wait_seconds", 0.1)
+    holder = asyncio.run(LockManager().acquire_lock(str(tmp_path.resolve()), "other-ticket", "apply"))
+
+    result = asyncio.run(run_terraform_apply(ApplyRequest(ticket_id="t-1", workspace_dir=str(tmp_path))))
+    assert result.success is False and "other-ticket" in (result.stderr or "")
+    assert calls == []
+
+    asyncio.run(LockManager().release_lock(holder.lock_id))
+    result = asyncio.run(run_terraform_apply(ApplyRequest(ticket_id="t-1", workspace_dir=str(tmp_path))))
+    assert result.success is True and len(calls) == 1
@@ -0,0 +1,158 @@
+import asyncio
+import json
+
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, INVALID_PARAMS, CallToolResult, ErrorData, ListToolsResult, TextContent, Tool
+
+from app.config import settings
+from app.services.mcp_cache import CachingSession, MCPResponseCache
+from app.tools.mcp_clients import PooledMCPStdioTool
+
+_TTLS = "terraform-mcp:search*=60,terraform-mcp:*=3600,ms-learn:*=0"
+
+
+def _result(text: str, *, error: bool = False) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text)], isError=error)
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.failure: Exception | None = None
+
+    async def list_tools(self):
+        return ListToolsResult(tools=[Tool(name="get_provider_docs", inputSchema={"type": "object"})])
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        if self.failure is not None:
+            raise self.failure
+        self.calls += 1
+        return _result(f"{name}:{self.calls}", error=arguments.get("fail", False))
+
+
+def test_key_ignores_argument_order_and_null_values():
+    key = MCPResponseCache.key
+    assert key("terraform-mcp", "docs", {"a": 1, "b": None, "c": [1]}) == key(
+        "terraform-mcp", "docs", {"c": [1], "a": 1}
+    )
+    assert key("terraform-mcp", "docs", {"a": 1}) != key("terraform-mcp", "docs", {"a": 2})
+    assert key("terraform-mcp", "docs", {"a": 1}) != key("ms-learn", "docs", {"a": 1})
+
+
+def test_ttl_rules_first_match_wins(tmp_path):
+    cache = MCPResponseCache(tmp_path, ttls=_TTLS)
+    assert cache.ttl_for("terraform-mcp", "searchModules") == 60
+    assert cache.ttl_for("terraform-mcp", "get_provider_docs") == 3600
+    assert cache.ttl_for("ms-learn", "search") is None
+    assert cache.ttl_for("github-mcp", "create_pull_request") is None
+
+
+def test_default_ttls_cache_only_read_only_registry_tools(tmp_path):
+    cache = MCPResponseCache(tmp_path)
+    assert cache.ttl_for("terraform-mcp", "search_modules") == 86400
+    assert cache.ttl_for("terraform-mcp", "moduleDetails") == 86400
+    # A mutating tool added to the server later is not cached by default.
+    assert cache.ttl_for("terraform-mcp", "create_run") is None
+    assert cache.ttl_for("ms-learn", "microsoft_docs_search") == 21600
+
+
+def test_memory_tier_is_bounded_and_falls_back_to_disk(tmp_path):
+    cache = MCPResponseCache(tmp_path, memory_entries=2, ttls=_TTLS)
+    for name in "abc":
+        cache.put(name * 64, name)
+    assert "a" * 64 not in cache._memory
+    assert cache.get("a" * 64, max_age=60) == "a"
+
+    cache.clear_memory()
+    assert MCPResponseCache(tmp_path).get("b" * 64, max_age=None) == "b"
+    assert cache.get("b" * 64, max_age=-1) is None  # expired, but still on disk
+    assert cache.get("b" * 64, max_age=None) == "b"
+
+
+def test_session_serves_fresh_hits_and_stale_entries_when_unreachable(tmp_path):
+    cache = MCPResponseCache(tmp_path, ttls=_TTLS)
+    inner = _FakeSession()
+    session = CachingSession(inner, "terraform-mcp", cache)
+
+    async def _scenario():
+        first = await session.call_tool("get_provider_docs", arguments={"provider": "azurerm", "page": None})
+        again = await session.call_tool("get_provider_docs", arguments={"provider": "azurerm"})
+        assert again.content[0].text == first.content[0].text
+        assert inner.calls == 1
+
+        await session.call_tool("get_provider_docs", arguments={"fail": True})
+        await session.call_tool("get_provider_docs", arguments={"fail": True})
+        assert inner.calls == 3  # error results are not cached
+
+        stored = cache._path(cache.key("terraform-mcp", "get_provider_docs", {"provider": "azurerm"}))
+        stored.write_text(json.dumps({"stored_at": 0, "payload": first.model_dump_json()}))  # long expired
+        cache.clear_memory()
+
+        inner.failure = McpError(ErrorData(code=CONNECTION_CLOSED, message="closed"))
+        stale = await session.call_tool("get_provider_docs", arguments={"provider": "azurerm"})
+        assert stale.content[0].text == first.content[0].text
+
+        inner.failure = McpError(ErrorData(code=INVALID_PARAMS, message="bad provider"))
+        with pytest.raises(McpError):
+            await session.call_tool("get_provider_docs", arguments={"provider": "azurerm"})
+
+    asyncio.run(_scenario())
+
+
+def test_tool_connects_offline_from_cached_listing(tmp_path, monkeypatch):
+    cache = MCPResponseCache(tmp_path, ttls="offline-docs-mcp:*=60")
+    monkeypatch.setattr("app.services.mcp_cache.mcp_response_cache", cache)
+    monkeypatch.setattr(settings, "mcp_acquire_timeout_seconds", 0.5)
+    session = CachingSession(_FakeSession(), "offline-docs-mcp", cache)
+
+    async def _scenario():
+        await session.list_tools()
+        await session.call_tool("get_provider_docs", arguments={"provider": "azurerm"})
+
+        tool = PooledMCPStdioTool(
+            name="offline-docs-mcp", command=str(tmp_path / "missing-server"), load_prompts=False, pool_size=1
+        )
+        try:
+            await tool.connect()
+            assert tool.is_connected and tool.session.offline
+            assert [function.name for function in tool.functions] == ["get_provider_docs"]
+            cached = await tool.call_tool("get_provider_docs", provider="azurerm")
+            with pytest.raises(Exception):
+                await tool.call_tool("get_provider_docs", provider="aws")
+            return cached
+        finally:
+            await tool.close()
+
+    assert asyncio.run(_scenario())[0].text == "get_provider_docs:1"
+
+
+def test_offline_tool_goes_live_again_once_the_server_recovers(tmp_path, monkeypatch):
+    cache = MCPResponseCache(tmp_path, ttls="recovering-mcp:*=0")
+    monkeypatch.setattr("app.services.mcp_cache.mcp_response_cache", cache)
+    monkeypatch.setattr(settings, "mcp_offline_retry_seconds", 0.0)
+    live = _FakeSession()
+
+    async def _scenario():
+        await CachingSession(live, "recovering-mcp", cache).list_tools()
+        tool = PooledMCPStdioTool(name="recovering-mcp", command="unused", load_prompts=False, pool_size=1)
+        attempts = []
+
+        async def _connect_live():
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                raise ConnectionError("server down")
+            tool.session = live
+            tool.is_connected = True
+
+        tool._connect_live = _connect_live
+        try:
+            await tool.connect()
+            assert tool.is_connected and tool.session.offline
+            result = await tool.call_tool("get_provider_docs", provider="azurerm")
+            assert not tool.session.offline and len(attempts) == 2
+            return result
+        finally:
+            await tool.close()
+
+    assert asyncio.run(_scenario())[0].text == "get_provider_docs:1"
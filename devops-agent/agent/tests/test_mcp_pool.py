@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import textwrap
+
+import pytest
+from agent_framework import MCPStdioTool
+
+from app.config import settings
+from app.services.mcp_pool import MCPProcessPool
+from app.tools.mcp_clients import PooledMCPStdioTool
+
+_SERVER = textwrap.dedent(
+    """
+    import os
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("fake")
+
+    @server.tool()
+    def pid() -> str:
+        return str(os.getpid())
+
+    @server.tool()
+    def crash() -> str:
+        os._exit(1)
+
+    server.run()
+    """
+)
+
+
+def _server(tmp_path):
+    script = tmp_path / "fake_mcp_server.py"
+    script.write_text(_SERVER)
+    return script
+
+
+async def _pid(member) -> str:
+    result = await member.session.call_tool("pid", arguments={})
+    return result.content[0].text
+
+
+def test_pool_spreads_calls_and_restarts_crashed_processes(tmp_path):
+    script = _server(tmp_path)
+
+    async def _scenario():
+        pool = MCPProcessPool(
+            "fake-mcp",
+            lambda: MCPStdioTool(name="fake", command=sys.executable, args=[str(script)], load_prompts=False),
+            2,
+            health_interval=0.2,
+            backoff_initial=0.05,
+            acquire_timeout=20,
+        )
+        await pool.start()
+        try:
+            while pool.stats().ready < 2:  # start() returns once the first process is ready
+                await asyncio.sleep(0.05)
+            first = set(await asyncio.gather(*(pool.call(_pid) for _ in range(4))))
+            assert len(first) == 2
+
+            with pytest.raises(Exception):
+                await pool.call(lambda member: member.session.call_tool("crash", arguments={}))
+            assert pool.stats().last_error
+
+            after = await pool.call(_pid)
+            assert after not in first
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = asyncio.run(_scenario())
+    assert stats.restarts >= 1
+    assert stats.size == 2
+    assert stats.calls >= 6
+
+
+def test_pooled_tool_exposes_server_functions(tmp_path, monkeypatch):
+    script = _server(tmp_path)
+    monkeypatch.setattr(settings, "mcp_cache_dir", str(tmp_path / "mcp-cache"))
+
+    async def _scenario():
+        tool = PooledMCPStdioTool(
+            name="fake-mcp-tool", command=sys.executable, args=[str(script)], load_prompts=False, pool_size=1
+        )
+        async with tool:
+            names = sorted(function.name for function in tool.functions)
+            contents = await tool.call_tool("pid")
+        return names, contents[0].text, tool.pool.stats()
+
+    names, pid, stats = asyncio.run(_scenario())
+    assert names == ["crash", "pid"]
+    assert pid.isdigit()
+    assert stats.ready == 0  # closed when the context exits
+    assert stats.calls >= 2
@@ -0,0 +1,69 @@
+import os
+import stat
+import time
+
+import pytest
+
+from app.services.plan_json import load_plan, plan_json_path_for
+from app.services.plan_store import PlanBlobStore, PlanStoreError, is_blob_ref
+
+
+def _saved_plan(workspace, ticket_id: str, body: str):
+    workspace.mkdir(parents=True, exist_ok=True)
+    plan_file = workspace / f"plan-{ticket_id}.tfplan"
+    json_file = workspace / f"plan-{ticket_id}.json"
+    plan_file.write_bytes(b"PK\x03\x04" + body.encode() * 1000)
+    json_file.write_text('{"resource_changes": [{"address": "%s"}]}' % body, encoding="utf-8")
+    return plan_file, json_file
+
+
+def test_plans_are_moved_deduplicated_and_readable(tmp_path, monkeypatch):
+    store = PlanBlobStore(tmp_path / "plans")
+    monkeypatch.setattr("app.services.plan_json.plan_store", store)
+    workspace = tmp_path / "ws"
+
+    first = store.put_plan("TKT-1", "plan-1", *_saved_plan(workspace, "TKT-1", "a"), workspace)
+    # A re-plan of the same ticket no longer overwrites the first plan.
+    second = store.put_plan("TKT-1", "plan-2", *_saved_plan(workspace, "TKT-1", "b"), workspace)
+    # Another ticket producing the same plan shares its blobs.
+    shared = store.put_plan("TKT-2", "plan-3", *_saved_plan(workspace, "TKT-2", "a"), workspace)
+
+    assert all(is_blob_ref(ref) for ref in (*first, *second))
+    assert shared == first and second != first
+    assert not any(workspace.iterdir())
+    objects = [path for path in (tmp_path / "plans" / "objects").glob("*/*") if path.suffix != ".json"]
+    assert len(objects) == 4 and sum(path.stat().st_size for path in objects) < 4 * 4000
+
+    expanded = store.open(first[0])
+    assert expanded.read_bytes() == b"PK\x03\x04" + b"a" * 1000
+    assert stat.S_IMODE(expanded.stat().st_mode) == 0o444
+    with store.mmap(second[0]) as mapped:
+        assert mapped[:5] == b"PK\x03\x04b"
+    assert store.metadata(first[0])["workspace_dir"] == str(workspace.resolve())
+    assert load_plan(plan_json_path_for(first[0])) == {"resource_changes": [{"address": "a"}]}
+    assert load_plan(plan_json_path_for(second[1]))["resource_changes"][0]["address"] == "b"
+
+
+def test_retention_keeps_newest_plans_and_sweeps_unreferenced_blobs(tmp_path):
+    store = PlanBlobStore(tmp_path / "plans")
+    workspace = tmp_path / "ws"
+    old = store.put_plan("TKT-1", "plan-1", *_saved_plan(workspace, "TKT-1", "a"), workspace)
+    time.sleep(0.01)
+    new = store.put_plan("TKT-1", "plan-2", *_saved_plan(workspace, "TKT-1", "b"), workspace)
+    store.open(old[0])
+
+    # Freshly written blobs are left alone while their refs may still be being recorded.
+    assert store.collect_garbage(keep_per_ticket=1) == 0
+    past = time.time() - 2 * 3600
+    for path in (tmp_path / "plans" / "objects").glob("*/*"):
+        os.utime(path, (past, past))
+
+    assert store.collect_garbage(keep_per_ticket=1) == 2
+    assert [ref.name for ref in (tmp_path / "plans" / "refs" / "TKT-1").iterdir()] == ["plan-2.json"]
+    with pytest.raises(PlanStoreError):
+        store.open(old[0])
+    assert store.open(new[0]).read_bytes().startswith(b"PK\x03\x04b")
+    assert not plan_json_path_for(old[1]).exists()
+
+    assert store.collect_garbage(keep_per_ticket=5, max_age_seconds=0) == 2
+    assert not any((tmp_path / "plans" / "objects").glob("*/*"))
@@ -6,11 +6,13 @@ import pytest
 from git import Repo
 
 from app.config import settings
+from app.services.audit_log import audit_log
 from app.services.database import database, projects_table
 from app.tools.project_onboarding_tool import ProjectOnboardingInput, _create_project
 
 
-def test_project_onboarding_clones_repo(tmp_path):
+def test_project_onboarding_clones_repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "project_clone_cache_dir", str(tmp_path / "git-cache"))
     # Set up source repo
     source = tmp_path / "source"
     source.mkdir()
@@ -31,11 +33,58 @@ def test_project_onboarding_clones_repo(tmp_path):
             default_environment="dev",
             default_branch=branch_name,
             project_type="terraform",
+            ticket_id="tkt-onboard",
         )
         project = asyncio.run(_create_project(payload))
         cloned_path = Path(project.workspace_dir)
         assert cloned_path.exists()
         assert (cloned_path / "README.md").exists()
+        # Clone progress reaches the caller's ticket, not just the server log.
+        events = asyncio.run(audit_log.list_events("tkt-onboard")).items
+        assert events and {event.action for event in events} == {"project_clone_progress"}
+        assert all(source.as_uri() in event.metadata["message"] for event in events)
     finally:
         settings.projects_root = original_root
         asyncio.run(database.execute(projects_table.delete()))
+
+
+def test_project_onboarding_sparse_shallow_clone_borrows_cached_objects(tmp_path, monkeypatch):
+    source = tmp_path / "monorepo"
+    (source / "infra" / "prod").mkdir(parents=True)
+    (source / "app").mkdir()
+    repo = Repo.init(source)
+    repo.git.config("uploadpack.allowFilter", "true")
+    for index in range(3):
+        (source / "infra" / "prod" / "main.tf").write_text(f'locals {{ revision = {index} }}\n')
+        (source / "app" / "service.py").write_text(f"REVISION = {index}\n")
+        repo.index.add(["infra/prod/main.tf", "app/service.py"])
+        repo.index.commit(f"revision {index}")
+
+    cache = tmp_path / "git-cache"
+    monkeypatch.setattr(settings, "projects_root", str(tmp_path / "projects"))
+    monkeypatch.setattr(settings, "project_clone_cache_dir", str(cache))
+    monkeypatch.setattr(settings, "project_clone_depth", 1)
+    payload = ProjectOnboardingInput(
+        name="Monorepo",
+        repo_url=source.as_uri(),
+        default_branch=repo.active_branch.name,
+        terraform_root="/infra/prod/",
+    )
+    try:
+        project = asyncio.run(_create_project(payload))
+    finally:
+        asyncio.run(database.execute(projects_table.delete()))
+
+    workspace = Path(project.workspace_dir)
+    clone = workspace.parents[1]
+    assert workspace == clone / "infra" / "prod"
+    assert (workspace / "main.tf").read_text() == "locals { revision = 2 }\n"
+    assert not (clone / "app").exists()
+    assert Repo(clone).git.rev_list("--count", "HEAD") == "1"
+    alternates = (clone / ".git" / "objects" / "info" / "alternates").read_text()
+    assert str(cache) in alternates
+
+
+def test_project_onboarding_rejects_root_outside_repo():
+    with pytest.raises(ValueError):
+        ProjectOnboardingInput(name="Escape", repo_url="https://github.com/acme/infra", terraform_root="../etc")
@@ -3,6 +3,7 @@ import asyncio
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.services import project_store
 from app.services.database import database, projects_table
 
 
@@ -82,3 +83,46 @@ def test_list_projects():
     data = resp.json()
     assert len(data["items"]) == 1
     assert data["items"][0]["name"] == "Project A"
+
+
+def test_create_project_rejects_same_repo_in_another_form():
+    _clear_projects()
+    project = {
+        "name": "Infra",
+        "repo_url": "https://github.com/Example/Infra.git",
+        "workspace_dir": "/workspaces/infra",
+        "default_environment": "dev",
+        "default_branch": "main",
+        "project_type": "terraform",
+    }
+    assert client.post("/api/projects/", json=project).status_code == 201
+    duplicate = {**project, "name": "Infra again", "repo_url": "ssh://git@github.com/example/infra"}
+    response = client.post("/api/projects/", json=duplicate)
+    assert response.status_code == 409
+    assert "infra" in response.json()["detail"]
+
+
+def test_create_project_race_past_precheck_returns_409(monkeypatch):
+    _clear_projects()
+    project = {
+        "name": "Racy",
+        "repo_url": "https://github.com/example/racy.git",
+        "workspace_dir": "/workspaces/racy",
+        "default_environment": "dev",
+        "default_branch": "main",
+        "project_type": "terraform",
+    }
+    assert client.post("/api/projects/", json=project).status_code == 201
+    calls = []
+    original = project_store._ensure_repo_unmanaged
+
+    async def _stale_check(repo_url, project_id=None):
+        # The first check runs before the competing insert commits and sees nothing.
+        calls.append(repo_url)
+        if len(calls) > 1:
+            await original(repo_url, project_id)
+
+    monkeypatch.setattr(project_store, "_ensure_repo_unmanaged", _stale_check)
+    response = client.post("/api/projects/", json={**project, "name": "Racy twin"})
+    assert response.status_code == 409
+    assert "racy" in response.json()["detail"]
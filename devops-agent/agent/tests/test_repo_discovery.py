@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import json
+
+import httpx
+import pytest
+
+from app.models.project import ProjectCreate
+from app.services import project_store, repo_discovery
+from app.services.database import database, github_repo_pages_table, github_repos_table, projects_table
+from app.services.repo_identity import repo_identity
+
+
+class _FakeGitHub:
+    def __init__(self, count: int) -> None:
+        self.repos = [self._repo(index) for index in range(count)]
+        self.requests: list[tuple[int, bool]] = []
+
+    @staticmethod
+    def _repo(index: int) -> dict:
+        name = f"repo-{index:04d}"
+        return {
+            "id": index + 1,
+            "name": name,
+            "full_name": f"acme/{name}",
+            "clone_url": f"https://github.com/acme/{name}.git",
+            "html_url": f"https://github.com/acme/{name}",
+            "owner": {"login": "acme"},
+        }
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        per_page = int(request.url.params["per_page"])
+        body = json.dumps(self.repos[(page - 1) * per_page : page * per_page]).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        self.requests.append((page, "If-None-Match" in request.headers))
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        last = max(1, -(-len(self.repos) // per_page))
+        link = f'<https://api.github.com/user/repos?per_page={per_page}&page={last}>; rel="last"'
+        return httpx.Response(200, content=body, headers={"ETag": etag, "Link": link})
+
+
+def test_discovery_fetches_all_pages_and_skips_unchanged_ones(monkeypatch):
+    github = _FakeGitHub(250)
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+
+    async def _scenario():
+        client = httpx.AsyncClient(base_url="https://api.github.com", transport=httpx.MockTransport(github.handler))
+        monkeypatch.setattr(repo_discovery, "get_http_client", lambda: client)
+        await database.execute(github_repos_table.delete())
+        await database.execute(github_repo_pages_table.delete())
+
+        first = await repo_discovery.discover_github_repos()
+        assert len(first) == 250
+        assert sorted(page for page, _ in github.requests) == [1, 2, 3]
+
+        github.requests.clear()
+        again = await repo_discovery.discover_github_repos()
+        assert again == first
+        assert sorted(github.requests) == [(1, True), (2, True), (3, True)]
+
+        github.repos.append(github._repo(250))
+        github.requests.clear()
+        grown = await repo_discovery.discover_github_repos()
+        assert len(grown) == 251 and grown[-1]["full_name"] == "acme/repo-0250"
+        assert "owner" not in grown[0]
+
+        github.repos = github.repos[:100]
+        shrunk = await repo_discovery.discover_github_repos()  # page 1 unchanged, later pages now empty
+        await client.aclose()
+        return shrunk
+
+    assert len(asyncio.run(_scenario())) == 100
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://github.com/Acme/Infra.git",
+        "https://token@github.com/acme/infra/",
+        "git@github.com:acme/infra.git",
+        "ssh://git@github.com:22/ACME/infra",
+    ],
+)
+def test_repo_identity_normalises_url_forms(url):
+    assert repo_identity(url) == "github.com/acme/infra"
+
+
+def test_unmanaged_repos_are_matched_by_identity(monkeypatch):
+    github = _FakeGitHub(3)
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+
+    async def _scenario():
+        client = httpx.AsyncClient(base_url="https://api.github.com", transport=httpx.MockTransport(github.handler))
+        monkeypatch.setattr(repo_discovery, "get_http_client", lambda: client)
+        await database.execute(github_repos_table.delete())
+        await database.execute(github_repo_pages_table.delete())
+        await database.execute(projects_table.delete())
+        await project_store.create_project(
+            ProjectCreate(name="Managed", repo_url="ssh://git@GitHub.com/acme/Repo-0001.git", workspace_dir="/w")
+        )
+        try:
+            return await repo_discovery.get_unmanaged_github_repos()
+        finally:
+            await database.execute(projects_table.delete())
+            await client.aclose()
+
+    unmanaged, managed = asyncio.run(_scenario())
+    assert [repo["name"] for repo in managed] == ["repo-0001"]
+    assert [repo["name"] for repo in unmanaged] == ["repo-0000", "repo-0002"]
@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+from app.tools import checkov_tool
+from app.tools.checkov_tool import ScanCache, SecurityScanRequest, run_security_scan
+
+
+def _fake_scanners(calls):
+    async def _run(cmd):
+        if cmd[1:] == ["--version"]:
+            return "1.0.0\n"
+        if cmd[0] == "tfsec":
+            calls.append(("tfsec", cmd[1]))
+            results = [
+                {
+                    "rule_id": "azure-storage-enforce-https",
+                    "severity": "CRITICAL",
+                    "description": "Storage accounts should enforce HTTPS",
+                    "resource": "azurerm_storage_account.sa",
+                    "location": {"filename": f"{cmd[1]}/main.tf"},
+                }
+            ]
+            return json.dumps({"results": results if "insecure" in open(f"{cmd[1]}/main.tf").read() else []})
+        files = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-f"]
+        calls.append(("checkov", files))
+        failed = [
+            {
+                "check_id": "CKV_AZURE_3",
+                "check_name": "secure transfer",
+                "resource": "azurerm_storage_account.sa",
+                "file_abs_path": path,
+            }
+            for path in files
+            if "insecure" in open(path).read()
+        ]
+        return json.dumps({"results": {"failed_checks": failed}})
+
+    return _run
+
+
+def _workspace(tmp_path, monkeypatch, calls):
+    workspace = tmp_path / "infra"
+    (workspace / "modules" / "network").mkdir(parents=True)
+    (workspace / ".terraform").mkdir()
+    (workspace / "main.tf").write_text('resource "a" "root" {}\n')
+    (workspace / "modules" / "network" / "main.tf").write_text('resource "b" "net" { insecure = true }\n')
+    (workspace / ".terraform" / "ignored.tf").write_text("")
+    monkeypatch.setattr(checkov_tool, "_run_scanner", _fake_scanners(calls))
+    monkeypatch.setattr(checkov_tool, "_scanner_versions", {})
+    monkeypatch.setattr(checkov_tool, "scan_cache", ScanCache(tmp_path / "cache"))
+    return workspace
+
+
+def test_only_changed_modules_are_rescanned(tmp_path, monkeypatch):
+    calls: list = []
+    workspace = _workspace(tmp_path, monkeypatch, calls)
+    request = SecurityScanRequest(ticket_id="t-1", plan_id="p-1", directory=str(workspace))
+
+    first = asyncio.run(run_security_scan(request))
+    # A cold cache is one checkov run over every module, with findings split per module.
+    assert calls == [("checkov", [str(workspace / "main.tf"), str(workspace / "modules" / "network" / "main.tf")])]
+    assert [issue.resource for issue in first.issues] == ["azurerm_storage_account.sa"]
+
+    calls.clear()
+    second = asyncio.run(run_security_scan(request))
+    assert calls == []
+    assert second.issues == first.issues
+
+    (workspace / "main.tf").write_text('resource "a" "root" { insecure = true }\n')
+    third = asyncio.run(run_security_scan(request))
+    assert calls == [("checkov", [str(workspace / "main.tf")])]
+    assert len(third.issues) == 2
+
+    # The root module's finding stays with the root module once its cache entry is reused.
+    (workspace / "modules" / "network" / "main.tf").write_text('resource "b" "net" {}\n')
+    calls.clear()
+    fourth = asyncio.run(run_security_scan(request))
+    assert calls == [("checkov", [str(workspace / "modules" / "network" / "main.tf")])]
+    assert len(fourth.issues) == 1
+
+
+def test_all_scanners_merge_duplicate_findings(tmp_path, monkeypatch):
+    calls: list = []
+    workspace = _workspace(tmp_path, monkeypatch, calls)
+    request = SecurityScanRequest(ticket_id="t-1", plan_id="p-1", directory=str(workspace), tool="all")
+
+    report = asyncio.run(run_security_scan(request))
+
+    assert {tool for tool, _ in calls} == {"checkov", "tfsec"}
+    assert set(report.scanner_durations) == {"checkov", "tfsec"}
+    assert len(report.issues) == 1
+    issue = report.issues[0]
+    assert issue.detected_by == ["checkov", "tfsec"]
+    assert issue.severity == "critical"
+
+
+def test_plan_scan_only_evaluates_changed_resources(tmp_path, monkeypatch):
+    calls: list = []
+    workspace = _workspace(tmp_path, monkeypatch, calls)
+    plan = {
+        "format_version": "1.2",
+        "resource_changes": [
+            {"address": "azurerm_storage_account.sa", "change": {"actions": ["create"]}},
+            {"address": "azurerm_resource_group.rg", "change": {"actions": ["no-op"]}},
+        ],
+        "planned_values": {
+            "root_module": {
+                "resources": [{"address": "azurerm_storage_account.sa"}, {"address": "azurerm_resource_group.rg"}]
+            }
+        },
+        "prior_state": {"values": {}},
+    }
+    plan_path = workspace / "plan-t-1.json"
+    plan_path.write_text(json.dumps(plan))
+    scanned: list[dict] = []
+
+    async def _fake_run(cmd):
+        if cmd[1:] == ["--version"]:
+            return "1.0.0\n"
+        assert cmd[:3] == ["checkov", "--framework", "terraform_plan"]
+        scanned.append(json.loads(open(cmd[cmd.index("-f") + 1]).read()))
+        failed = [{"check_id": "CKV_AZURE_3", "check_name": "secure transfer", "resource": "azurerm_storage_account.sa"}]
+        return json.dumps({"results": {"failed_checks": failed}})
+
+    monkeypatch.setattr(checkov_tool, "_run_scanner", _fake_run)
+    request = SecurityScanRequest(
+        ticket_id="t-1", plan_id="p-1", directory=str(workspace), tool="all", plan_json_path=str(plan_path)
+    )
+
+    report = asyncio.run(run_security_scan(request))
+    asyncio.run(run_security_scan(request))
+
+    assert len(scanned) == 1
+    assert [change["address"] for change in scanned[0]["resource_changes"]] == ["azurerm_storage_account.sa"]
+    assert scanned[0]["planned_values"]["root_module"]["resources"] == [{"address": "azurerm_storage_account.sa"}]
+    assert "prior_state" not in scanned[0]
+    assert report.tool == "checkov"
+    assert [issue.rule_id for issue in report.issues] == ["CKV_AZURE_3"]
@@ -0,0 +1,86 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.services.database import SQLiteDatabase, audits_table
+from app.services.migrations import run_migrations
+
+
+def _event(event_id: str) -> dict:
+    return {
+        "event_id": event_id,
+        "ticket_id": "ticket-1",
+        "actor": "tester",
+        "actor_type": "human",
+        "action": "noop",
+        "metadata": {"k": "v"},
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+def test_writer_batches_concurrent_writes_and_isolates_failures(tmp_path):
+    path = tmp_path / "perf.db"
+    url = f"sqlite+aiosqlite:///{path}"
+
+    async def _exercise():
+        await run_migrations(url)
+        db = SQLiteDatabase(url)
+        await db.connect()
+        try:
+            inserts = [db.execute(audits_table.insert().values(**_event(f"evt-{idx}"))) for idx in range(20)]
+            await asyncio.gather(*inserts)
+            duplicate = db.execute(audits_table.insert().values(**_event("evt-0")))
+            follow_up = db.execute(audits_table.insert().values(**_event("evt-20")))
+            results = await asyncio.gather(duplicate, follow_up, return_exceptions=True)
+            rows = await db.fetch_all(select(audits_table.c.event_id))
+            return results, {row["event_id"] for row in rows}
+        finally:
+            await db.disconnect()
+
+    results, event_ids = asyncio.run(_exercise())
+    assert isinstance(results[0], Exception)
+    assert not isinstance(results[1], Exception)
+    assert event_ids == {f"evt-{idx}" for idx in range(21)}
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_transactions_bypass_writer(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'tx.db'}"
+
+    async def _exercise():
+        await run_migrations(url)
+        db = SQLiteDatabase(url)
+        await db.connect()
+        try:
+            with pytest.raises(RuntimeError):
+                async with db.transaction():
+                    await db.execute(audits_table.insert().values(**_event("evt-rolled-back")))
+                    raise RuntimeError("abort")
+            return await db.fetch_all(select(audits_table.c.event_id))
+        finally:
+            await db.disconnect()
+
+    assert asyncio.run(_exercise()) == []
+
+
+def test_writer_returns_rowcount_for_updates_and_deletes(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'rows.db'}"
+
+    async def _exercise():
+        await run_migrations(url)
+        db = SQLiteDatabase(url)
+        await db.connect()
+        try:
+            for idx in range(3):
+                await db.execute(audits_table.insert().values(**_event(f"evt-{idx}")))
+            missing = audits_table.c.event_id == "missing"
+            updated = await db.execute(audits_table.update().where(missing).values(actor="x"))
+            deleted = await db.execute(audits_table.delete())
+            return updated, deleted
+        finally:
+            await db.disconnect()
+
+    assert asyncio.run(_exercise()) == (0, 3)
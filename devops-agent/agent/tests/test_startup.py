@@ -0,0 +1,91 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app import main
+from app.api import dependencies
+from app.models.tooling import ComponentStatus
+from app.services.startup import StartupTracker
+
+
+def test_tracker_records_background_steps():
+    async def _scenario():
+        tracker = StartupTracker()
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+
+        async def broken():
+            raise RuntimeError("mirror unreachable")
+
+        tracker.begin("database", slow)
+        tracker.begin("tools", broken)
+        tracker.disable("worker", "not configured")
+        await asyncio.sleep(0)
+        assert tracker.status("database").state == "running"
+
+        release.set()
+        await tracker.wait("database")
+        await asyncio.gather(tracker.wait("tools"), return_exceptions=True)
+        return {status.name: status for status in tracker.statuses()}
+
+    statuses = asyncio.run(_scenario())
+    assert statuses["database"].state == "ready"
+    assert statuses["database"].finished_at is not None
+    assert statuses["tools"].state == "failed"
+    assert "mirror unreachable" in statuses["tools"].detail
+    assert statuses["worker"].ready
+
+
+def test_routes_return_503_until_dependencies_are_ready(monkeypatch):
+    tracker = StartupTracker()
+    monkeypatch.setattr(dependencies, "startup", tracker)
+    monkeypatch.setattr(main, "startup", tracker)
+    client = TestClient(main.app)
+
+    tracker._components["database"] = ComponentStatus(name="database", state="running")
+    response = client.get("/api/projects/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert response.json()["detail"]["component"] == "database"
+    assert client.get("/api/capabilities").status_code == 200
+    assert client.get("/api/healthz").json()["status"] == "starting"
+    assert client.get("/api/readyz").status_code == 503
+
+    tracker._components["database"] = ComponentStatus(name="database", state="failed", detail="boom")
+    response = client.get("/api/locks/")
+    assert response.status_code == 503
+    assert "Retry-After" not in response.headers
+    assert client.get("/api/healthz").json()["status"] == "degraded"
+
+    tracker._components["database"] = ComponentStatus(name="database", state="ready")
+    assert client.get("/api/projects/").status_code == 200
+    assert client.get("/api/readyz").status_code == 200
+
+
+def test_workflow_entry_points_outside_the_api_are_gated(monkeypatch):
+    tracker = StartupTracker()
+    monkeypatch.setattr(dependencies, "startup", tracker)
+    tracker._components["tools"] = ComponentStatus(name="tools", state="running")
+    client = TestClient(main.app)
+
+    response = client.post("/agui/agentic_chat", json={"messages": []})
+    assert response.status_code == 503 and response.json()["detail"]["component"] == "tools"
+
+    served = []
+
+    async def _devui(scope, receive, send):
+        served.append(scope["path"])
+        await JSONResponse({"ok": True})(scope, receive, send)
+
+    gated = FastAPI()
+    gated.mount("/", main._ReadyGate(_devui, "database", "tools"))
+    devui = TestClient(gated)
+    response = devui.get("/entities")
+    assert response.status_code == 503 and response.headers["Retry-After"] == "5" and not served
+
+    tracker._components["tools"] = ComponentStatus(name="tools", state="ready")
+    assert devui.get("/entities").json() == {"ok": True} and served == ["/entities"]
@@ -0,0 +1,206 @@
+import asyncio
+import stat
+from pathlib import Path
+
+import pytest
+from agent_framework import AgentExecutorRequest, AgentExecutorResponse, AgentRunResponse, ChatMessage, Role
+from git import Repo
+
+from app.agents.schemas import CodingResponse
+from app.models import FileEdit, GitOpsChangeRequest
+from app.services.workspace_cache import WorkspaceCache
+from app.tools import terraform_validate_tool
+from app.tools.terraform_validate_tool import (
+    ValidationDiagnostic,
+    ValidationReport,
+    ValidationUnavailableError,
+    validate_terraform_changes,
+)
+from app.workflows import terraform_workflow
+
+# fmt flags files containing "UNFORMATTED"; validate fails on "BROKEN" and, like terraform,
+# asks for init in a module directory that has never been initialized.
+_FAKE_TERRAFORM = """#!/bin/sh
+case "$1" in
+  init)
+    mkdir -p .terraform
+    pwd >> "$FAKE_TF_LOG" ;;
+  fmt)
+    files=$(grep -l UNFORMATTED *.tf 2>/dev/null)
+    [ -z "$files" ] && exit 0
+    echo "$files"; exit 3 ;;
+  validate)
+    if [ ! -d .terraform ]; then
+      echo '{"valid": false, "diagnostics": [{"severity": "error", "summary": "Module not installed"}]}'; exit 1
+    fi
+    broken=$(grep -l BROKEN *.tf 2>/dev/null | head -n 1)
+    if [ -n "$broken" ]; then
+      printf '{"valid": false, "diagnostics": [{"severity": "error", "summary": "Unsupported argument",'
+      printf ' "range": {"filename": "%s", "start": {"line": 1}}}]}' "$broken"; exit 1
+    fi
+    echo '{"valid": true, "diagnostics": []}' ;;
+esac
+"""
+
+
+def _setup(tmp_path, monkeypatch) -> Repo:
+    repo = Repo.init(tmp_path / "gitops", initial_branch="main")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Test")
+        writer.set_value("user", "email", "test@example.com")
+    root = Path(repo.working_tree_dir)
+    for module in ("envs/dev", "modules/net"):
+        (root / module).mkdir(parents=True)
+        (root / module / "main.tf").write_text("# ok\n")
+    repo.index.add(["envs/dev/main.tf", "modules/net/main.tf"])
+    repo.index.commit("base")
+
+    script = tmp_path / "terraform"
+    script.write_text(_FAKE_TERRAFORM)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(terraform_validate_tool.settings, "tf_cli_path", str(script))
+    monkeypatch.setenv("FAKE_TF_LOG", str(tmp_path / "init.log"))
+    monkeypatch.setattr(terraform_validate_tool, "workspace_cache", WorkspaceCache(tmp_path / "cache"))
+    return repo
+
+
+def test_validation_reports_fmt_and_validate_diagnostics_per_module(tmp_path, monkeypatch):
+    repo = _setup(tmp_path, monkeypatch)
+    request = GitOpsChangeRequest(
+        ticket_id="tkt-1",
+        repo=repo.working_tree_dir,
+        root_path=".",
+        base_branch="main",
+        preferred_branch_name="tkt-1/change",
+        file_edits=[
+            FileEdit(path="envs/dev/main.tf", content="# UNFORMATTED\n", mode="append"),
+            FileEdit(path="modules/net/main.tf", content="BROKEN = true\n"),
+            FileEdit(path="modules/new/main.tf", content="# new module\n"),
+        ],
+    )
+
+    report = asyncio.run(validate_terraform_changes(request))
+
+    assert not report.passed
+    assert report.modules == ["envs/dev", "modules/net", "modules/new"]
+    found = {(item.check, item.file, item.line) for item in report.diagnostics}
+    assert found == {("fmt", "envs/dev/main.tf", None), ("validate", "modules/net/main.tf", 1)}
+    # The base commit's modules were initialized once in the snapshot; the new module on demand.
+    inits = (tmp_path / "init.log").read_text().splitlines()
+    assert len(inits) == 3 and inits[-1].endswith("modules/new")
+
+    fixed = request.model_copy(update={"file_edits": [FileEdit(path="modules/net/main.tf", content="# fixed\n")]})
+    assert asyncio.run(validate_terraform_changes(fixed)).passed
+    assert len((tmp_path / "init.log").read_text().splitlines()) == 3
+    assert not any((tmp_path / "cache" / "clones").iterdir())
+    assert not repo.is_dirty(untracked_files=True)
+
+
+def test_edits_outside_the_repository_fail_validation(tmp_path, monkeypatch):
+    repo = _setup(tmp_path, monkeypatch)
+    request = GitOpsChangeRequest(
+        ticket_id="tkt-3",
+        repo=repo.working_tree_dir,
+        root_path=".",
+        base_branch="main",
+        preferred_branch_name="tkt-3/change",
+        file_edits=[
+            FileEdit(path="./envs/dev/main.tf", content="# fine\n"),
+            FileEdit(path="../outside.tf", content="# escapes\n"),
+            FileEdit(path="/etc/motd", content="# absolute\n"),
+            FileEdit(path="modules/net", content="# a directory\n"),
+            FileEdit(path="modules/net/main.tf/nested.tf", content="# through a file\n"),
+        ],
+    )
+
+    report = asyncio.run(validate_terraform_changes(request))
+
+    assert not report.passed and report.modules == []
+    found = [(item.check, item.file) for item in report.diagnostics]
+    assert found == [
+        ("path", "../outside.tf"),
+        ("path", "/etc/motd"),
+        ("path", "modules/net"),
+        ("path", "modules/net/main.tf/nested.tf"),
+    ]
+    assert not (tmp_path / "outside.tf").exists()
+
+    monkeypatch.setattr(terraform_validate_tool.settings, "tf_cli_path", str(tmp_path / "missing-terraform"))
+    fine = request.model_copy(update={"file_edits": request.file_edits[:1]})
+    with pytest.raises(ValidationUnavailableError):
+        asyncio.run(validate_terraform_changes(fine))
+
+
+class _Context:
+    def __init__(self) -> None:
+        self.state: dict = {}
+        self.sent: list = []
+
+    async def send_message(self, message, target_id=None) -> None:
+        self.sent.append((target_id, message))
+
+    async def get_shared_state(self, key):
+        return self.state[key]
+
+    async def set_shared_state(self, key, value) -> None:
+        self.state[key] = value
+
+
+def test_failed_validation_loops_back_to_the_coding_agent(monkeypatch):
+    reports = []
+
+    async def _validate(request):
+        return reports.pop(0)
+
+    monkeypatch.setattr(terraform_workflow, "validate_terraform_changes", _validate)
+    monkeypatch.setattr(terraform_workflow.settings, "tf_validate_max_fix_rounds", 1)
+    coding = CodingResponse(
+        description_of_changes="add vnet",
+        gitops_request=GitOpsChangeRequest(
+            ticket_id="tkt-2", root_path=".", base_branch="main", preferred_branch_name="tkt-2/vnet"
+        ),
+    )
+    response = AgentExecutorResponse(
+        executor_id="CodingAgent",
+        agent_run_response=AgentRunResponse(messages=[ChatMessage(role=Role.ASSISTANT, text=coding.model_dump_json())]),
+    )
+    failing = ValidationReport(
+        ticket_id="tkt-2",
+        passed=False,
+        diagnostics=[ValidationDiagnostic(check="validate", severity="error", module=".", summary="Unsupported")],
+        duration_seconds=0.1,
+    )
+    executor = terraform_workflow.ValidateCodingExecutor("CodingAgent", "GitOpsAgent", "OrchestratorAgent")
+    ctx = _Context()
+
+    reports.extend([failing, failing, failing.model_copy(update={"passed": True, "diagnostics": []})])
+    for _ in range(3):
+        asyncio.run(executor.handle(response, ctx))
+
+    targets = [target for target, _ in ctx.sent]
+    assert targets == ["CodingAgent", "OrchestratorAgent", "GitOpsAgent"]
+    feedback = ctx.sent[0][1]
+    assert isinstance(feedback, AgentExecutorRequest) and "Unsupported" in feedback.messages[0].text
+    assert ctx.sent[2][1] is response
+
+
+def test_validation_is_skipped_only_when_it_cannot_run(monkeypatch):
+    async def _unavailable(request):
+        raise ValidationUnavailableError("Terraform binary not found")
+
+    monkeypatch.setattr(terraform_workflow, "validate_terraform_changes", _unavailable)
+    coding = CodingResponse(
+        description_of_changes="add vnet",
+        gitops_request=GitOpsChangeRequest(
+            ticket_id="tkt-4", root_path=".", base_branch="main", preferred_branch_name="tkt-4/vnet"
+        ),
+    )
+    response = AgentExecutorResponse(
+        executor_id="CodingAgent",
+        agent_run_response=AgentRunResponse(messages=[ChatMessage(role=Role.ASSISTANT, text=coding.model_dump_json())]),
+    )
+    ctx = _Context()
+
+    asyncio.run(terraform_workflow.ValidateCodingExecutor("CodingAgent", "GitOpsAgent", "Orch").handle(response, ctx))
+
+    assert ctx.sent == [("GitOpsAgent", response)]
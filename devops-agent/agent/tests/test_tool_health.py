@@ -29,3 +29,34 @@ def test_tool_health_missing(monkeypatch):
     assert _status_by_name(statuses, "github_rest").available is False
     assert _status_by_name(statuses, "terraform_mcp").available is False
     assert _status_by_name(statuses, "ms_learn_mcp").available is False
+
+
+def test_tool_health_reports_mcp_pool_utilisation(monkeypatch):
+    from app.models.tooling import MCPPoolStats
+    from app.services import tool_health
+
+    class _Pool:
+        def __init__(self, stats):
+            self._stats = stats
+
+        def stats(self):
+            return self._stats
+
+    pools = {
+        "terraform-mcp": _Pool(MCPPoolStats(name="terraform-mcp", size=2, ready=2, busy=1, in_flight=1, calls=7)),
+        "github-mcp": _Pool(
+            MCPPoolStats(name="github-mcp", size=1, ready=0, busy=0, restarts=3, last_error="EOF from server")
+        ),
+    }
+    monkeypatch.setattr(tool_health.mcp_pools, "get", pools.get)
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    monkeypatch.setenv("GITHUB_MCP_COMMAND", "/bin/echo")
+    monkeypatch.setenv("TERRAFORM_MCP_COMMAND", "/bin/echo")
+
+    statuses = list_tool_statuses()
+    terraform = _status_by_name(statuses, "terraform_mcp")
+    assert terraform.available is True
+    assert terraform.pool.busy == 1 and terraform.pool.calls == 7
+    github = _status_by_name(statuses, "github_mcp")
+    assert github.available is False
+    assert "3 restarts" in github.reason and "EOF from server" in github.reason
@@ -1,3 +1,5 @@
+import dataclasses
+import hashlib
 import importlib
 from pathlib import Path
 
@@ -27,3 +29,135 @@ def test_resolve_install_dir_default(monkeypatch):
     module = reload_module()
     result = module._resolve_install_dir(None)
     assert result == Path(".tools/bin").expanduser()
+
+
+def _build_mirror(root: Path) -> dict[str, bytes]:
+    import io
+    import tarfile
+    import zipfile
+
+    root.mkdir()
+    payloads = {name: f"#!/bin/sh\necho {name}\n".encode() for name in ("terraform", "checkov", "tfsec", "infracost")}
+    with zipfile.ZipFile(root / "terraform_1.9.5_linux_amd64.zip", "w") as archive:
+        archive.writestr("terraform", payloads["terraform"])
+    with zipfile.ZipFile(root / "checkov_linux_X86_64.zip", "w") as archive:
+        archive.writestr("dist/checkov", payloads["checkov"])
+    (root / "tfsec-linux-amd64").write_bytes(payloads["tfsec"])
+    with tarfile.open(root / "infracost-linux-amd64.tar.gz", "w:gz") as archive:
+        info = tarfile.TarInfo("infracost-linux-amd64")
+        info.size = len(payloads["infracost"])
+        archive.addfile(info, io.BytesIO(payloads["infracost"]))
+
+    def _sum(name: str) -> str:
+        return f"{hashlib.sha256((root / name).read_bytes()).hexdigest()}  {name}\n"
+
+    # The checksum files each project publishes with its release, in their various layouts.
+    (root / "terraform_1.9.5_SHA256SUMS").write_text(
+        f"{'0' * 64}  terraform_1.9.5_darwin_arm64.zip\n" + _sum("terraform_1.9.5_linux_amd64.zip")
+    )
+    (root / "checkov_linux_X86_64.zip.sha256").write_text(_sum("checkov_linux_X86_64.zip"))
+    (root / "tfsec_1.28.3_checksums.txt").write_text(f"{'1' * 64}  tfsec-darwin-amd64\n" + _sum("tfsec-linux-amd64"))
+    (root / "infracost-linux-amd64.tar.gz.sha256").write_text(_sum("infracost-linux-amd64.tar.gz").split()[0])
+    return payloads
+
+
+def _pin(module, mirror: Path, monkeypatch) -> None:
+    """Pin each tool to the digest of its mirrored asset, as PINNED_TOOLS does for real releases."""
+
+    pinned = [
+        dataclasses.replace(spec, sha256=hashlib.sha256((mirror / Path(spec.url).name).read_bytes()).hexdigest())
+        for spec in module.PINNED_TOOLS
+    ]
+    monkeypatch.setattr(module, "PINNED_TOOLS", pinned)
+
+
+def test_install_from_file_mirror_populates_shared_cache(tmp_path, monkeypatch):
+    module = reload_module()
+    mirror = tmp_path / "mirror"
+    payloads = _build_mirror(mirror)
+    _pin(module, mirror, monkeypatch)
+    monkeypatch.setenv("TOOLS_MIRROR_URL", mirror.as_uri())
+    monkeypatch.setenv("PATH", "/usr/bin")
+
+    module.ensure_tool_binaries(tmp_path / "venv-a", cache_dir=tmp_path / "cache")
+    for name, payload in payloads.items():
+        binary = tmp_path / "venv-a" / name
+        assert binary.read_bytes() == payload
+        assert binary.stat().st_mode & 0o111
+    assert len(list((tmp_path / "cache" / "blobs").iterdir())) == 4
+    assert str(tmp_path / "venv-a") in module.os.environ["PATH"]
+    # Pinned digests are authoritative; the release checksum files are never fetched.
+    assert not (tmp_path / "cache" / "checksums").exists()
+
+    # A second install directory on the same host is served from the cache alone.
+    for archive in mirror.iterdir():
+        archive.unlink()
+    module.ensure_tool_binaries(tmp_path / "venv-b", cache_dir=tmp_path / "cache")
+    assert (tmp_path / "venv-b" / "infracost").read_bytes() == payloads["infracost"]
+
+
+def test_checksum_mismatch_fails_that_tool_only(tmp_path, monkeypatch):
+    import pytest
+
+    module = reload_module()
+    mirror = tmp_path / "mirror"
+    _build_mirror(mirror)
+    _pin(module, mirror, monkeypatch)
+    monkeypatch.setenv("TOOLS_MIRROR_URL", mirror.as_uri())
+    monkeypatch.setenv("TERRAFORM_SHA256", "0" * 64)
+
+    with pytest.raises(module.ToolInstallError, match="terraform"):
+        module.ensure_tool_binaries(tmp_path / "bin", cache_dir=tmp_path / "cache")
+    assert not (tmp_path / "bin" / "terraform").exists()
+    assert (tmp_path / "bin" / "tfsec").exists()
+    assert list((tmp_path / "cache" / "partial").iterdir()) == []
+
+
+def test_tools_without_a_known_digest_are_not_installed(tmp_path, monkeypatch):
+    import pytest
+
+    module = reload_module()
+    mirror = tmp_path / "mirror"
+    _build_mirror(mirror)
+    monkeypatch.setenv("TOOLS_MIRROR_URL", mirror.as_uri())
+
+    # Without pinned digests nothing is installed unless the checksum files are explicitly trusted.
+    with pytest.raises(module.ToolInstallError, match="set TERRAFORM_SHA256"):
+        module.ensure_tool_binaries(tmp_path / "bin", cache_dir=tmp_path / "cache")
+    assert not (tmp_path / "bin" / "terraform").exists()
+
+    monkeypatch.setenv("TOOLS_TRUST_CHECKSUM_FILES", "true")
+    (mirror / "tfsec_1.28.3_checksums.txt").write_text(f"{'1' * 64}  tfsec-darwin-amd64\n")
+    # An overridden version is not the release the published checksums describe.
+    monkeypatch.setenv("INFRACOST_VERSION", "0.10.43")
+
+    with pytest.raises(module.ToolInstallError, match="tfsec.*infracost|infracost.*tfsec") as excinfo:
+        module.ensure_tool_binaries(tmp_path / "bin", cache_dir=tmp_path / "cache")
+    assert "lists no SHA256 for tfsec-linux-amd64" in str(excinfo.value)
+    assert "set INFRACOST_SHA256" in str(excinfo.value)
+    assert not (tmp_path / "bin" / "tfsec").exists() and not (tmp_path / "bin" / "infracost").exists()
+    assert (tmp_path / "bin" / "terraform").exists()
+
+
+def test_download_resumes_partial_file_with_range_request(tmp_path, monkeypatch):
+    import io
+
+    module = reload_module()
+    requested = []
+
+    class _Response(io.BytesIO):
+        status = 206
+        headers = {"Content-Length": "6"}
+
+    def fake_urlopen(request):
+        requested.append(request.get_header("Range"))
+        return _Response(b"world!")
+
+    monkeypatch.setattr(module, "urlopen", fake_urlopen)
+    partial = tmp_path / "download.part"
+    partial.write_bytes(b"hello ")
+
+    module._download_file("https://example.invalid/tool.zip", partial)
+
+    assert requested == ["bytes=6-"]
+    assert partial.read_bytes() == b"hello world!"
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import stat
+from pathlib import Path
+
+from git import Repo
+
+from app.services.plan_store import plan_store
+from app.services.workspace_cache import WorkspaceCache, WorkspaceSource, resolve_source, uses_local_state
+from app.tools import terraform_cli_tool
+from app.tools.terraform_cli_tool import (
+    ApplyRequest,
+    DriftRequest,
+    PlanRequest,
+    run_drift_check,
+    run_terraform_apply,
+    run_terraform_plan,
+)
+
+_FAKE_TERRAFORM = """#!/bin/sh
+case "$1" in
+  init)
+    mkdir -p .terraform/providers/registry/azurerm
+    echo provider > .terraform/providers/registry/azurerm/terraform-provider-azurerm
+    pwd >> "$FAKE_TF_LOG.init" ;;
+  plan)
+    for arg in "$@"; do case "$arg" in -out=*) pwd > "${arg#-out=}" ;; esac; done ;;
+  show)
+    echo '{"resource_changes": []}' ;;
+  apply)
+    pwd >> "$FAKE_TF_LOG.apply" ;;
+esac
+"""
+
+
+def _repo(tmp_path) -> Repo:
+    root = tmp_path / "infra"
+    repo = Repo.init(root, initial_branch="main")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Test")
+        writer.set_value("user", "email", "test@example.com")
+    (root / "envs" / "dev").mkdir(parents=True)
+    (root / "modules" / "net").mkdir(parents=True)
+    (root / "envs" / "dev" / "main.tf").write_text('module "net" { source = "../../modules/net" }\n')
+    (root / "envs" / "dev" / "backend.tf").write_text('terraform {\n  backend "azurerm" {}\n}\n')
+    (root / "modules" / "net" / "main.tf").write_text("# net\n")
+    (root / ".gitignore").write_text(".terraform/\n*.tfstate\n")
+    repo.index.add([".gitignore", "envs/dev/main.tf", "envs/dev/backend.tf", "modules/net/main.tf"])
+    repo.index.commit("base")
+    return repo
+
+
+def _fake_terraform(tmp_path, monkeypatch) -> Path:
+    script = tmp_path / "terraform"
+    script.write_text(_FAKE_TERRAFORM)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(terraform_cli_tool.settings, "tf_cli_path", str(script))
+    monkeypatch.setenv("FAKE_TF_LOG", str(tmp_path / "tf"))
+    monkeypatch.setattr(terraform_cli_tool.settings, "plan_store_dir", str(tmp_path / "plans"))
+    return tmp_path / "tf"
+
+
+def _plan_dir(plan) -> Path:
+    return Path(plan_store.metadata(plan.raw_plan_path)["workspace_dir"])
+
+
+def test_concurrent_plans_share_one_initialized_snapshot(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    log = _fake_terraform(tmp_path, monkeypatch)
+    cache = WorkspaceCache(tmp_path / "cache")
+    monkeypatch.setattr(terraform_cli_tool, "workspace_cache", cache)
+    workspace = Path(repo.working_tree_dir) / "envs" / "dev"
+
+    async def _plans():
+        return await asyncio.gather(
+            *(
+                run_terraform_plan(
+                    PlanRequest(ticket_id=f"tkt-{index}", workspace_dir=str(workspace), terraform_workspace="dev")
+                )
+                for index in range(3)
+            )
+        )
+
+    plans = asyncio.run(_plans())
+
+    # One init, in the snapshot; each plan ran in its own clone with the module tree alongside.
+    assert len(Path(f"{log}.init").read_text().splitlines()) == 1
+    plan_dirs = {_plan_dir(plan) for plan in plans}
+    assert len(plan_dirs) == 3
+    snapshot = next((tmp_path / "cache" / "snapshots").glob("*/envs/dev"))
+    provider = Path(".terraform/providers/registry/azurerm/terraform-provider-azurerm")
+    for plan_dir in plan_dirs:
+        assert cache.clone_of(plan_dir) is not None
+        assert (plan_dir / "../../modules/net/main.tf").is_file()
+        assert os.stat(plan_dir / provider).st_ino == os.stat(snapshot / provider).st_ino
+    assert not (workspace / ".terraform").exists()
+
+    apply = ApplyRequest(ticket_id="tkt-0", workspace_dir=str(workspace), plan_path=plans[0].raw_plan_path)
+    assert asyncio.run(run_terraform_apply(apply)).success
+    assert Path(f"{log}.apply").read_text().strip() == str(_plan_dir(plans[0]))
+
+    # Uncommitted edits cannot come from a snapshot, so that plan runs in place.
+    (workspace / "main.tf").write_text("# edited\n")
+    plan = asyncio.run(
+        run_terraform_plan(PlanRequest(ticket_id="tkt-9", workspace_dir=str(workspace), terraform_workspace="dev"))
+    )
+    assert _plan_dir(plan) == workspace.resolve()
+    assert resolve_source(workspace, "main").commit == repo.head.commit.hexsha
+
+
+def test_lru_eviction_keeps_pinned_clones_within_quota(tmp_path):
+    repo = _repo(tmp_path)
+    cache = WorkspaceCache(tmp_path / "cache", max_bytes=10**9)
+
+    def _init(path: Path) -> None:
+        (path / "blob").write_bytes(b"x" * 4096)
+
+    sources = []
+    for index in range(3):
+        (Path(repo.working_tree_dir) / "envs" / "dev" / "main.tf").write_text(f"# v{index}\n")
+        repo.index.add(["envs/dev/main.tf"])
+        sources.append(WorkspaceSource(Path(repo.working_tree_dir), repo.index.commit(f"v{index}").hexsha, "envs/dev"))
+
+    clones = [cache.acquire(source, {}, _init) for source in sources]
+    for clone in clones[1:]:
+        cache.release(clone)
+    cache._max_bytes = 0
+
+    removed = cache.evict()
+
+    # Everything but the pinned clone goes, least recently used first.
+    assert [path.parent.name for path in removed] == ["snapshots", "snapshots", "clones", "snapshots", "clones"]
+    assert clones[0].is_dir() and not any(clone.exists() for clone in clones[1:])
+    cache.release(clones[0])
+    assert cache.evict() == [cache.clone_of(clones[0])]
+
+
+def test_local_state_plans_in_place_and_kept_plans_survive_eviction(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    log = _fake_terraform(tmp_path, monkeypatch)
+    cache = WorkspaceCache(tmp_path / "cache", max_bytes=0)
+    monkeypatch.setattr(terraform_cli_tool, "workspace_cache", cache)
+    workspace = Path(repo.working_tree_dir) / "envs" / "dev"
+
+    def _plan(ticket_id: str):
+        request = PlanRequest(ticket_id=ticket_id, workspace_dir=str(workspace), terraform_workspace="dev")
+        return asyncio.run(run_terraform_plan(request))
+
+    # Gitignored local state never reaches a snapshot, so such workspaces are planned in place.
+    (workspace / "terraform.tfstate").write_text("{}")
+    assert uses_local_state(workspace)
+    assert _plan_dir(_plan("tkt-local")) == workspace.resolve()
+    (workspace / "terraform.tfstate").unlink()
+    assert not uses_local_state(workspace)
+
+    # Over quota, the clone is still kept while the plan store holds its plan.
+    plan = _plan("tkt-1")
+    clone = cache.clone_of(_plan_dir(plan))
+    assert clone is not None and clone not in cache.evict() and clone.is_dir()
+    apply = ApplyRequest(ticket_id="tkt-1", workspace_dir=str(workspace), plan_path=plan.raw_plan_path)
+    assert asyncio.run(run_terraform_apply(apply)).success
+
+    # Once it is gone anyway, apply says so instead of blaming the terraform binary.
+    monkeypatch.setattr(terraform_cli_tool.plan_store, "workspaces_in_use", lambda: set())
+    assert clone in cache.evict()
+    result = asyncio.run(run_terraform_apply(apply))
+    assert not result.success and "evicted" in result.stderr and "re-plan" in result.stderr
+    assert len(Path(f"{log}.apply").read_text().splitlines()) == 1
+
+
+def test_in_place_plans_skip_init_once_the_workspace_is_initialized(tmp_path, monkeypatch):
+    log = _fake_terraform(tmp_path, monkeypatch)
+    monkeypatch.setattr(terraform_cli_tool, "workspace_cache", WorkspaceCache(tmp_path / "cache"))
+    workspace = tmp_path / "plain"  # not a git checkout, so planned in place
+    workspace.mkdir()
+    (workspace / "main.tf").write_text("# v1\n")
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "main.tf").write_text('module "dns" { source = "app.terraform.io/acme/dns/azurerm" }\n')
+
+    def _request(ticket_id: str, **backend_config: str) -> PlanRequest:
+        return PlanRequest(
+            ticket_id=ticket_id, workspace_dir=str(workspace), terraform_workspace="dev", backend_config=backend_config
+        )
+
+    async def _plans():
+        await run_terraform_plan(_request("tkt-0"))
+        drift = DriftRequest(ticket_id="tkt-2", workspace_dir=str(workspace), terraform_workspace="dev")
+        await asyncio.gather(run_terraform_plan(_request("tkt-1")), run_drift_check(drift))
+
+    asyncio.run(_plans())
+    assert len(Path(f"{log}.init").read_text().splitlines()) == 1
+
+    # New configuration or another backend config needs a fresh init.
+    (workspace / "main.tf").write_text('module "net" { source = "./net" }\n')
+    asyncio.run(run_terraform_plan(_request("tkt-3")))
+    asyncio.run(run_terraform_plan(_request("tkt-4", key="other.tfstate")))
+    asyncio.run(run_terraform_plan(_request("tkt-5", key="other.tfstate")))
+    assert len(Path(f"{log}.init").read_text().splitlines()) == 3
+
+    # So do edits to local child modules, inside the workspace or reached through a relative source.
+    (workspace / "net").mkdir()
+    (workspace / "net" / "main.tf").write_text('module "shared" { source = "../../shared" }\n')
+    asyncio.run(run_terraform_plan(_request("tkt-6", key="other.tfstate")))
+    with (tmp_path / "shared" / "main.tf").open("a") as shared:
+        shared.write("# v2\n")
+    asyncio.run(run_terraform_plan(_request("tkt-7", key="other.tfstate")))
+    asyncio.run(run_terraform_plan(_request("tkt-8", key="other.tfstate")))
+    assert len(Path(f"{log}.init").read_text().splitlines()) == 5
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from pathlib import Path
+
+from git import Repo
+
+from app.models import FileEdit, GitOpsChangeRequest
+from app.services.worktree_manager import WorktreeManager
+from app.tools import gitops_tool
+
+
+def _clone(tmp_path):
+    repo = Repo.init(tmp_path / "gitops", initial_branch="main")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Test")
+        writer.set_value("user", "email", "test@example.com")
+    (tmp_path / "gitops" / "main.tf").write_text("# base\n")
+    repo.index.add(["main.tf"])
+    repo.index.commit("base")
+    return repo
+
+
+def test_tickets_get_parallel_worktrees_and_leave_the_shared_clone_alone(tmp_path, monkeypatch):
+    shared = _clone(tmp_path)
+    monkeypatch.setattr(gitops_tool, "worktree_manager", WorktreeManager(tmp_path / "worktrees"))
+    barrier = threading.Barrier(2)
+    results, errors = {}, []
+
+    def _apply(ticket: str) -> None:
+        try:
+            barrier.wait()
+            request = GitOpsChangeRequest(
+                ticket_id=ticket,
+                repo=str(shared.working_tree_dir),
+                root_path=".",
+                base_branch="main",
+                preferred_branch_name=f"{ticket}/change",
+                file_edits=[FileEdit(path=f"{ticket}.tf", content=f"# {ticket}\n", mode="overwrite")],
+            )
+            results[ticket] = asyncio.run(gitops_tool.apply_git_changes(request))
+        except Exception as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_apply, args=(ticket,)) for ticket in ("tkt-1", "tkt-2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert shared.active_branch.name == "main" and not shared.is_dirty(untracked_files=True)
+    for ticket in ("tkt-1", "tkt-2"):
+        assert results[ticket].branch == f"{ticket}/change"
+        files = shared.git.ls_tree("--name-only", f"{ticket}/change").splitlines()
+        assert sorted(files) == sorted(["main.tf", f"{ticket}.tf"])
+
+
+def test_dirty_worktree_is_reset_and_stale_worktrees_are_collected(tmp_path):
+    shared = _clone(tmp_path)
+    manager = WorktreeManager(tmp_path / "worktrees")
+    with manager.checkout(shared.working_tree_dir, "TKT 9", "tkt-9/x", "main") as worktree:
+        path = worktree.working_tree_dir
+        Path(path, "scratch.tf").write_text("# left behind\n")
+        Path(path, "main.tf").write_text("# half-applied\n")
+
+    # A failed run's leftovers do not block the ticket's next attempt.
+    with manager.checkout(shared.working_tree_dir, "TKT 9", "tkt-9/x", "main") as worktree:
+        assert not worktree.is_dirty(untracked_files=True)
+        assert Path(path, "main.tf").read_text() == "# base\n" and not Path(path, "scratch.tf").exists()
+
+    assert manager.collect_garbage(max_age_seconds=3600) == []
+    assert [str(path) for path in manager.collect_garbage(max_age_seconds=0)] == [path]
+    assert "TKT-9" not in shared.git.worktree("list")